@@ -0,0 +1,35 @@
+import grpc
+import argparse
+
+from proto import chat_server_pb2 as pb
+from proto import chat_server_pb2_grpc as pb_grpc
+
+
+# Ferramenta de diagnóstico de um servidor vivo (AdminModule.Profile)
+# Os arquivos são gravados no diretório de perfis do próprio servidor (--profile-dir)
+ACTIONS = ('cpu-start', 'cpu-stop', 'stacks', 'heap-snapshot', 'heap-stop', 'status')
+
+
+def profile(server: str, action: str, mode: str = '', timeout: float = 30.0):
+    with grpc.insecure_channel(server) as channel:
+        stub = pb_grpc.AdminModuleStub(channel)
+        return stub.Profile(pb.ProfileRequest(action=action, mode=mode), timeout=timeout)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Diagnóstico de um servidor do chat em execução')
+    parser.add_argument('action', choices=ACTIONS,
+                        help='cpu-start/cpu-stop: perfil de CPU; stacks: pilhas das threads; '
+                             'heap-snapshot/heap-stop: tracemalloc; status: estado atual')
+    parser.add_argument('--server', type=str, default='localhost:50051', help='Endereço "host:port" do servidor')
+    parser.add_argument('--mode', choices=('sampling', 'deterministic'), default='',
+                        help='Modo do perfil de CPU (padrão: --profile-mode do servidor)')
+    args = parser.parse_args()
+
+    try:
+        response = profile(args.server, args.action, args.mode)
+    except grpc.RpcError as e:
+        raise SystemExit(f"Erro: {e.code()} {e.details()}")
+    print(response.message if response.success else f"Falhou: {response.message}")
+    for path in response.files:
+        print(f"  {path}")
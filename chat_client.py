@@ -12,9 +12,15 @@ from common import LamportClock
 # Classe do Cliente do Chat distribuído
 # servers: lista de endereços de servidores no formato ["host:port", ...]
 # O cliente tentará conectar ao líder automaticamente.
+# ack_level (opcional): nível de confirmação das escritas pedido ao servidor
+# ("leader", "async" ou "majority"); None usa o padrão do servidor.
+# on_message (opcional): função chamada com cada TextMessage recebida, no lugar
+# de imprimi-la (usada pelos experimentos para medir a entrega ponta a ponta).
 class ChatClient:
-    def __init__(self, servers: list):
+    def __init__(self, servers: list, ack_level: str = None, on_message=None):
         self._servers = servers  # Lista de todos os servidores conhecidos
+        self._metadata = (('ack-level', ack_level),) if ack_level else None
+        self._on_message = on_message
         self._current_server = None
         self._channel = None
         self._stub = None
@@ -114,10 +120,14 @@ class ChatClient:
                         new_addr = msg.content.split(':', 1)[1]
                         logging.info(f"Redirecionando para líder: {new_addr}")
                         self._current_server = new_addr
-                        if self._channel:
-                            self._channel.close()
+                        old_channel = self._channel
                         self._channel = grpc.insecure_channel(new_addr)
                         self._stub = pb_grpc.ClientModuleStub(self._channel)
+                        # Fecha o canal antigo depois, sem cancelar envios ainda em andamento
+                        if old_channel:
+                            closer = threading.Timer(5.0, old_channel.close)
+                            closer.daemon = True
+                            closer.start()
                         continue
 
                     # Server envia uma mensagem que inicia com "ID Atribuido"
@@ -129,8 +139,11 @@ class ChatClient:
                             logging.exception('Falha em atribuir ID')
                         continue
 
-                    # Atualiza Lamport e printa a mensagem recebida
+                    # Atualiza Lamport e entrega a mensagem recebida
                     self._lamport_clock.updateRelogio(msg.lamport_timestamp)
+                    if self._on_message is not None:
+                        self._on_message(msg)
+                        continue
                     print(f"[rec][ts={msg.lamport_timestamp}] Mensagem vinda de {msg.client_id_from}: {msg.content}")
 
             except grpc.RpcError as e:
@@ -150,19 +163,35 @@ class ChatClient:
         msg = pb.TextMessage(client_id_from=client_id, content=content, lamport_timestamp=ts)
         
         try:
-            resp = self._stub.SendMessageToServer(msg)
+            resp = self._send_with_backoff(msg)
             return resp
         except grpc.RpcError as e:
             logging.warning(f'Falha no envio: {e.code()}')
+            if e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+                # Servidor vivo, mas recusando carga: reconectar não ajuda
+                raise
             # Tenta reconectar e reenviar
             if self._reconnect():
                 try:
-                    resp = self._stub.SendMessageToServer(msg)
+                    resp = self._send_with_backoff(msg)
                     return resp
                 except grpc.RpcError:
                     logging.exception('Falha no reenvio após reconexão')
             raise
 
+    # Envia respeitando o retry-after do servidor quando ele recusa por limite de taxa
+    # ou sobrecarga (RESOURCE_EXHAUSTED)
+    def _send_with_backoff(self, msg, max_retries: int = 3):
+        for attempt in range(max_retries + 1):
+            try:
+                return self._stub.SendMessageToServer(msg, metadata=self._metadata)
+            except grpc.RpcError as e:
+                if e.code() != grpc.StatusCode.RESOURCE_EXHAUSTED or attempt == max_retries:
+                    raise
+                wait = retry_after_hint(e)
+                logging.info(f'Servidor ocupado ({e.details()}); aguardando {wait:.3f}s')
+                time.sleep(wait)
+
     # Fecha conexão (Ctrl + C)
     def close(self):
         self._running = False
@@ -172,6 +201,16 @@ class ChatClient:
         except Exception:
             pass
 
+# Extrai o tempo de espera sugerido (s) do trailer "retry-after-ms" de um erro gRPC
+def retry_after_hint(error, default: float = 0.5) -> float:
+    try:
+        for key, value in error.trailing_metadata() or ():
+            if key == 'retry-after-ms':
+                return int(value) / 1000.0
+    except Exception:
+        pass
+    return default
+
 # Faz o parse da string de servidores no formato "host1:port1,host2:port2"
 # Server deafault: localhost:50051
 def parse_servers(servers_str: str) -> list:
@@ -0,0 +1,325 @@
+import grpc
+from concurrent import futures
+from collections import OrderedDict
+import threading
+import queue
+import time
+import logging
+import argparse
+
+from proto import chat_server_pb2 as pb
+from proto import chat_server_pb2_grpc as pb_grpc
+from chat_client import parse_servers
+
+
+# Proxy de entrada ciente do líder
+# Os clientes conectam a um único endereço estável (o proxy) em vez de conhecer
+# todos os servidores, descobrir o líder e tratar REDIRECT.
+# Funcionamento:
+# 1. LeaderTracker acompanha o líder: heartbeat periódico ao líder atual e,
+#    se ele falhar ou apontar outro líder, GetLeader nos servidores conhecidos
+# 2. Envios e consultas são repassados ao líder por canais compartilhados
+#    (um canal por servidor, multiplexado pelo HTTP/2); só as consultas são
+#    repetidas em outro líder, pois um envio que falhou pode já ter sido gravado
+# 3. Todos os streams dos clientes são atendidos por UMA assinatura no líder:
+#    cada mensagem recebida é copiada para a fila de cada cliente, exceto a do
+#    remetente (como no broadcast do servidor)
+# 4. Na troca de líder a assinatura é refeita no novo líder e as mensagens
+#    perdidas no intervalo são recuperadas via SyncState; os streams dos
+#    clientes continuam abertos. Duplicatas são reconhecidas por
+#    (timestamp, remetente), como no merge_histories do servidor: um novo líder
+#    pode dar a outra mensagem um timestamp que não chegou a ser replicado
+class LeaderTracker:
+    def __init__(self, servers: list, interval: float = 0.5, on_change=None):
+        self._servers = servers
+        self.interval = interval
+        self._on_change = on_change
+        self._channels = {}
+        self._lock = threading.Lock()
+        self._known = threading.Condition(self._lock)
+        self.leader_id = None
+        self.leader_addr = None
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def channel(self, addr: str):
+        with self._lock:
+            channel = self._channels.get(addr)
+            if channel is None:
+                channel = self._channels[addr] = grpc.insecure_channel(addr)
+            return channel
+
+    def start(self):
+        self.refresh()
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        with self._lock:
+            self._known.notify_all()
+            for channel in self._channels.values():
+                channel.close()
+
+    # Espera até haver um líder conhecido; retorna seu endereço (ou None no timeout)
+    def wait_leader(self, timeout: float = None):
+        with self._known:
+            self._known.wait_for(lambda: self.leader_addr is not None or not self._running, timeout=timeout)
+            return self.leader_addr
+
+    def _set_leader(self, leader_id, leader_addr):
+        with self._known:
+            changed = leader_addr != self.leader_addr
+            self.leader_id = leader_id
+            self.leader_addr = leader_addr
+            self._known.notify_all()
+        if changed:
+            logging.info(f"[PROXY] Líder: {leader_id} ({leader_addr})")
+            if self._on_change:
+                self._on_change(leader_addr)
+
+    # Troca imediata (ex.: REDIRECT recebido na assinatura)
+    def redirect(self, leader_addr: str):
+        self._set_leader(None, leader_addr)
+
+    # Descobre o líder perguntando aos servidores conhecidos; o candidato precisa confirmar
+    def refresh(self):
+        for server_addr in [self.leader_addr] + list(self._servers):
+            if not server_addr:
+                continue
+            try:
+                info = pb_grpc.ClientModuleStub(self.channel(server_addr)).GetLeader(pb.Empty(), timeout=1.0)
+                if not (info.is_leader_known and info.leader_address):
+                    continue
+                if info.leader_address != server_addr:
+                    confirm = pb_grpc.ClientModuleStub(self.channel(info.leader_address)).GetLeader(
+                        pb.Empty(), timeout=1.0)
+                    if confirm.leader_address != info.leader_address:
+                        continue
+                self._set_leader(info.leader_id, info.leader_address)
+                return info.leader_address
+            except grpc.RpcError:
+                continue
+        logging.warning("[PROXY] Nenhum líder encontrado")
+        # Esquece o líder antigo: quem chamar wait_leader espera a eleição terminar
+        self._set_leader(None, None)
+        return None
+
+    def _loop(self):
+        while self._running:
+            time.sleep(self.interval)
+            addr = self.leader_addr
+            if addr is None:
+                self.refresh()
+                continue
+            # Heartbeat ao líder (ping/pong, sem Lamport): confirma que continua líder
+            try:
+                response = pb_grpc.ElectionModuleStub(self.channel(addr)).Heartbeat(
+                    pb.HeartbeatRequest(server_id=0, lamport_timestamp=0), timeout=self.interval * 2)
+                if self.leader_id is not None and response.leader_id == self.leader_id:
+                    continue
+            except grpc.RpcError:
+                logging.warning(f"[PROXY] Líder {addr} não respondeu ao heartbeat")
+            self.refresh()
+
+
+class ChatProxy(pb_grpc.ClientModuleServicer):
+    # Quantas mensagens recentes (timestamp, remetente) são lembradas para descartar
+    # duplicatas após a troca de líder
+    SEEN_WINDOW = 10000
+
+    def __init__(self, port: int, servers: list, interval: float = 0.5, id_base: int = 100000,
+                 rpc_timeout: float = 5.0):
+        self._address = f"localhost:{port}"
+        self._rpc_timeout = rpc_timeout
+        self._tracker = LeaderTracker(servers, interval=interval, on_change=self._on_leader_change)
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        # IDs dos clientes atendidos pelo proxy (faixa separada dos IDs dados pelo líder)
+        self._next_client_id = id_base + 1
+        self._seen = OrderedDict()  # (timestamp, remetente) já entregues
+        self._upstream = None  # assinatura atual no líder
+        self._running = True
+        self._fanout_thread = threading.Thread(target=self._fanout_loop, daemon=True)
+
+    def start(self):
+        self._tracker.start()
+        self._fanout_thread.start()
+
+    def stop(self):
+        self._running = False
+        upstream = self._upstream
+        if upstream is not None:
+            upstream.cancel()
+        with self._lock:
+            for q in self._subscribers.values():
+                q.put(None)
+        self._tracker.stop()
+
+    # Troca de líder: derruba a assinatura antiga para o fan-out assinar o novo líder
+    def _on_leader_change(self, leader_addr: str):
+        upstream = self._upstream
+        if upstream is not None:
+            upstream.cancel()
+
+    # Repassa uma chamada unária ao líder; se ele estiver indisponível (falha ou
+    # eleição em andamento), redescobre e tenta de novo até o prazo rpc_timeout
+    # Sem retry (envios): depois que a chamada saiu, o erro volta ao cliente, como
+    # numa conexão direta; repetir poderia gravar a mesma mensagem duas vezes
+    def _forward(self, method: str, request, context, retry: bool = True):
+        metadata = tuple((k, v) for k, v in context.invocation_metadata()
+                         if not k.startswith((':', 'grpc-', 'user-agent')))
+        deadline = time.monotonic() + self._rpc_timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            addr = self._tracker.wait_leader(timeout=max(remaining, 0))
+            if addr is None or remaining <= 0:
+                context.abort(grpc.StatusCode.UNAVAILABLE, "proxy: nenhum líder disponível")
+            stub = pb_grpc.ClientModuleStub(self._tracker.channel(addr))
+            try:
+                return getattr(stub, method)(request, metadata=metadata, timeout=remaining)
+            except grpc.RpcError as e:
+                if e.code() == grpc.StatusCode.UNAVAILABLE:
+                    self._tracker.refresh()
+                    if retry and time.monotonic() < deadline:
+                        time.sleep(0.05)
+                        continue
+                context.set_trailing_metadata(e.trailing_metadata() or ())
+                context.abort(e.code(), e.details() or "erro no líder")
+
+    def SendMessageToServer(self, request, context):
+        return self._forward('SendMessageToServer', request, context, retry=False)
+
+    def QueryHistory(self, request, context):
+        return self._forward('QueryHistory', request, context)
+
+    def SearchMessages(self, request, context):
+        return self._forward('SearchMessages', request, context)
+
+    # O proxy se apresenta como líder: o cliente fica conectado a ele
+    def GetLeader(self, request, context):
+        return pb.LeaderInfo(
+            leader_id=self._tracker.leader_id or 0,
+            leader_address=self._address,
+            is_leader_known=True,
+        )
+
+    def SubscribeToServerEvents(self, request, context):
+        q = queue.Queue()
+        with self._lock:
+            client_id = self._next_client_id
+            self._next_client_id += 1
+            self._subscribers[client_id] = q
+        logging.info(f"[PROXY] Cliente {client_id} conectado ({len(self._subscribers)} no total)")
+        yield pb.TextMessage(client_id_from=0, content=f"ID Atribuido:{client_id}", lamport_timestamp=0)
+        try:
+            while context.is_active():
+                try:
+                    msg = q.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                if msg is None:
+                    return
+                yield msg
+        finally:
+            with self._lock:
+                self._subscribers.pop(client_id, None)
+            logging.info(f"[PROXY] Cliente {client_id} desconectado")
+
+    # Copia a mensagem para a fila de cada cliente, descartando duplicatas
+    # O remetente não recebe a própria mensagem, como no _broadcast do servidor:
+    # os clientes do proxy enviam com o ID atribuído aqui (chave de _subscribers)
+    def _deliver(self, msg):
+        key = (msg.lamport_timestamp, msg.client_id_from)
+        if key in self._seen:
+            return
+        self._seen[key] = None
+        if len(self._seen) > self.SEEN_WINDOW:
+            self._seen.popitem(last=False)
+        with self._lock:
+            queues = [q for cid, q in self._subscribers.items() if cid != msg.client_id_from]
+        for q in queues:
+            q.put(msg)
+
+    # Recupera do novo líder o que pode ter sido perdido durante a troca
+    def _resync(self, addr: str):
+        if not self._seen:
+            return
+        since = min(ts for ts, _ in self._seen)
+        try:
+            response = pb_grpc.ElectionModuleStub(self._tracker.channel(addr)).SyncState(
+                pb.SyncRequest(server_id=0, last_timestamp=since), timeout=self._rpc_timeout)
+        except grpc.RpcError as e:
+            logging.warning(f"[PROXY] Falha ao recuperar mensagens de {addr}: {e.code()}")
+            return
+        for msg in response.messages:
+            self._deliver(msg)
+
+    # Uma única assinatura no líder alimenta todos os clientes do proxy
+    def _fanout_loop(self):
+        while self._running:
+            addr = self._tracker.wait_leader(timeout=1.0)
+            if addr is None:
+                continue
+            stub = pb_grpc.ClientModuleStub(self._tracker.channel(addr))
+            stream = self._upstream = stub.SubscribeToServerEvents(pb.Empty())
+            try:
+                for msg in stream:
+                    if msg.client_id_from == 0 and msg.content.startswith('REDIRECT:'):
+                        self._tracker.redirect(msg.content.split(':', 1)[1])
+                        break
+                    if msg.client_id_from == 0 and msg.content.startswith('ID Atribuido:'):
+                        # Assinatura registrada no líder: completa o que faltou
+                        logging.info(f"[PROXY] Assinatura no líder {addr}")
+                        self._resync(addr)
+                        continue
+                    self._deliver(msg)
+            except grpc.RpcError as e:
+                if not self._running:
+                    break
+                if e.code() != grpc.StatusCode.CANCELLED:
+                    logging.warning(f"[PROXY] Assinatura em {addr} caiu: {e.code()}")
+                    self._tracker.refresh()
+                    time.sleep(0.1)
+            finally:
+                stream.cancel()
+            if addr == self._tracker.leader_addr and self._running:
+                # Stream terminou sem troca de líder conhecida (ex.: drenagem): redescobre
+                self._tracker.refresh()
+                time.sleep(0.1)
+
+
+def serve(port: int, servers: list, **proxy_opts):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=proxy_opts.pop('max_workers', 100)))
+    proxy = ChatProxy(port=port, servers=servers, **proxy_opts)
+    pb_grpc.add_ClientModuleServicer_to_server(proxy, server)
+    server.add_insecure_port(f"[::]:{port}")
+    server.start()
+    proxy.start()
+    logging.info(f"Proxy na porta {port}, servidores: {servers}")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        logging.info("Parando proxy...")
+        proxy.stop()
+        server.stop(2.0).wait()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
+    parser = argparse.ArgumentParser(description='Proxy de entrada ciente do líder do chat distribuído')
+    parser.add_argument('--port', type=int, default=50050, help='Porta do proxy (endereço único dos clientes)')
+    parser.add_argument('--servers', type=str, default='localhost:50051',
+                        help='Lista de servidores no formato "host1:port1,host2:port2"')
+    parser.add_argument('--interval', type=float, default=0.5,
+                        help='Intervalo (s) do heartbeat do proxy ao líder')
+    parser.add_argument('--id-base', type=int, default=100000,
+                        help='Início da faixa de IDs atribuídos aos clientes do proxy')
+    parser.add_argument('--max-workers', type=int, default=100,
+                        help='Threads do servidor gRPC do proxy (cada stream de cliente ocupa uma)')
+    args = parser.parse_args()
+
+    serve(args.port, parse_servers(args.servers),
+          interval=args.interval,
+          id_base=args.id_base,
+          max_workers=args.max_workers)
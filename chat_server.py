@@ -5,195 +5,531 @@ import queue
 import time
 import logging
 import argparse
+import heapq
+import os
+import signal
 
 from proto import chat_server_pb2 as pb
 from proto import chat_server_pb2_grpc as pb_grpc
-from common import LamportClock
+from common import LamportClock, HybridLogicalClock, MessageHistory, SearchIndex
+from common import RateLimiter, OverloadDetector
+from common import RuntimeProfiler, PROFILE_MODES
+from common import TraceWriter
+from election import ELECTION_STRATEGIES, PEER_CHANNEL_OPTIONS, make_election
+from membership import SwimMembership
 
 
-# Algoritmo de Eleição Bullying entre os servidores 
+# Metadado (trailer) com o tempo sugerido de espera quando o envio é rejeitado
+RETRY_AFTER_KEY = 'retry-after-ms'
+
+
+# Níveis de confirmação (durabilidade) de escrita:
+# - leader:   confirma assim que a mensagem está na memória do líder (sem replicação)
+# - async:    confirma imediatamente e replica para os peers em background
+# - majority: confirma só depois que a maioria do cluster (líder incluso) tem a mensagem
+ACK_LEVELS = ('leader', 'async', 'majority')
+
+# Resposta do nível majority quando a maioria não confirma a tempo: a mensagem
+# foi gravada e entregue pelo líder, mas a durabilidade não está garantida
+QUORUM_TIMEOUT_MESSAGE = "Gravada no líder e entregue; maioria não confirmou a tempo (não reenviar)"
+
+# Metadado opcional que permite ao cliente escolher o nível por requisição
+ACK_LEVEL_KEY = 'ack-level'
+
+# Metadado opcional com a sala da mensagem (só usado na captura de tráfego)
+ROOM_KEY = 'room'
+
+
+# Replicação das mensagens do líder para os peers
 # Funcionamento:
-# 1. Quando um processo detecta que o líder falhou, inicia uma eleição
-# 2. Envia ELECTION para todos os processos com ID maior
-# 3. Se receber OK de algum, espera pelo COORDINATOR
-# 4. Se não receber OK, declara-se líder e envia COORDINATOR para todos
-# 5. O processo com maior ID sempre vence
-# 6. O id é passado como argumento na inicialização do servidor
-# 7. Cada servidor conhece os peers (id, address) dos outros servidores
-# 8. Usa heartbeat para detectar falha do líder (a cada 2 segundos envia um ping)
-class BullyElection:
-    def __init__(self, server_id: int, peers: list, lamport_clock: LamportClock, on_leader_change=None):
+# 1. O líder acrescenta cada mensagem a um log em memória (append)
+# 2. Uma thread por peer envia em lote tudo o que está pendente (ReplicateMessages)
+# 3. O peer responde com o último timestamp aplicado; o líder guarda esse valor
+# 4. Quem espera quorum (wait_for_quorum) é acordado a cada lote confirmado
+class Replicator:
+    MAX_BATCH = 512  # mensagens por RPC
+    MAX_LOG = 100000  # peers mais atrasados que isso perdem entradas (precisam de SyncState)
+
+    def __init__(self, server_id: int, peers: list, lamport_clock, rpc_timeout: float = 2.0):
         self.server_id = server_id
-        self.peers = peers  # Lista de (id, address) dos outros servidores
+        self.peers = peers
         self.lamport_clock = lamport_clock
-        self.leader_id = None
-        self.is_leader = False
-        self._lock = threading.Lock()
-        self._election_in_progress = False
-        self._on_leader_change = on_leader_change
-        
-        # Timeouts
-        self.election_timeout = 3.0  # segundos para esperar resposta OK
-        self.coordinator_timeout = 5.0  # segundos para esperar COORDINATOR
-        
-    def get_leader(self):
-        with self._lock:
-            return self.leader_id
-    
-    def am_i_leader(self):
-        with self._lock:
-            return self.is_leader
-    
-    def set_leader(self, leader_id: int):
-        with self._lock:
-            old_leader = self.leader_id
-            self.leader_id = leader_id
-            self.is_leader = (leader_id == self.server_id)
-            if old_leader != leader_id:
-                logging.info(f"[ELEIÇÃO] Novo líder: Servidor {leader_id}")
-                if self._on_leader_change:
-                    self._on_leader_change(leader_id)
-    
-    # Inicia o processo de eleição 
-    def start_election(self):
-        # Evita múltiplas eleições simultâneas
-        with self._lock:
-            if self._election_in_progress:
-                logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Eleição já em progresso")
-                return
-            self._election_in_progress = True
-        
-        logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Iniciando eleição...")
-        ts = self.lamport_clock.incrementaRelogio()
-        
-        # Encontra servidores com ID maior
-        higher_peers = [(pid, addr) for pid, addr in self.peers if pid > self.server_id]
-        
-        if not higher_peers:
-            # Eu tenho o maior ID, então me declaro líder
-            logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Nenhum peer com ID maior. Declarando-me líder!")
-            self._declare_me_leader()
-            return
-        
-        # Envia ELECTION para todos com ID maior, caso não seja o ID maior
-        received_ok = False
-        for peer_id, peer_addr in higher_peers:
-            try:
-                channel = grpc.insecure_channel(peer_addr)
-                stub = pb_grpc.ElectionModuleStub(channel)
-                request = pb.ElectionRequest(
-                    candidate_id=self.server_id,
-                    lamport_timestamp=ts
+        self.rpc_timeout = rpc_timeout
+        self._cond = threading.Condition()
+        self._log = []  # (lamport_timestamp, client_id, content)
+        self._log_base = 0  # índice global da posição 0 do log
+        self._next = {pid: 0 for pid, _ in peers}  # próximo índice global a enviar
+        self._acked = {pid: 0 for pid, _ in peers}  # último timestamp confirmado
+        self._loops = set()  # peers com _peer_loop ativo
+        self._started = False
+        self._running = True
+
+    # Quantidade de peers que precisam confirmar para haver maioria
+    # peers é a pertinência conhecida (com gossip inclui suspeitos e mortos):
+    # uma falha não reduz o quorum
+    def quorum_peers(self):
+        cluster_size = len(self.peers) + 1
+        return cluster_size // 2
+
+    def start(self):
+        with self._cond:
+            self._started = True
+            for peer_id, peer_addr in self.peers:
+                self._start_loop(peer_id, peer_addr)
+
+    # Deve ser chamado com self._cond
+    def _start_loop(self, peer_id: int, peer_addr: str):
+        if peer_id not in self._loops:
+            self._loops.add(peer_id)
+            threading.Thread(target=self._peer_loop, args=(peer_id, peer_addr), daemon=True).start()
+
+    # Membro novo (pertinência dinâmica): recebe só o que for escrito daqui em diante;
+    # o histórico anterior ele obtém no bootstrap
+    def add_peer(self, peer_id: int, peer_addr: str):
+        with self._cond:
+            if peer_id not in self._next:
+                self._next[peer_id] = self._log_base + len(self._log)
+                self._acked[peer_id] = 0
+            if self._started:
+                self._start_loop(peer_id, peer_addr)
+
+    # Membro que saiu: seu _peer_loop termina e ele deixa de segurar o log
+    def remove_peer(self, peer_id: int):
+        with self._cond:
+            self._next.pop(peer_id, None)
+            self._acked.pop(peer_id, None)
+            self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    # Acrescenta uma mensagem ao log de replicação (chamado em ordem de timestamp)
+    def append(self, lamport_timestamp: int, client_id: int, content: str):
+        with self._cond:
+            self._log.append((lamport_timestamp, client_id, content))
+            if len(self._log) > self.MAX_LOG:
+                self._trim(len(self._log) - self.MAX_LOG)
+            self._cond.notify_all()
+
+    # Espera até a maioria do cluster confirmar o timestamp (ou estourar o timeout)
+    def wait_for_quorum(self, lamport_timestamp: int, timeout: float) -> bool:
+        needed = self.quorum_peers()
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: sum(1 for ts in self._acked.values() if ts >= lamport_timestamp) >= needed,
+                timeout=timeout,
+            )
+
+    def _trim(self, n):
+        del self._log[:n]
+        self._log_base += n
+
+    def _peer_loop(self, peer_id: int, peer_addr: str):
+        channel = grpc.insecure_channel(peer_addr)
+        stub = pb_grpc.ServerModuleStub(channel)
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: not self._running or peer_id not in self._next
+                    or self._next[peer_id] < self._log_base + len(self._log)
                 )
-                response = stub.Election(request, timeout=self.election_timeout)
-                if response.ok:
-                    logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Recebeu OK de {response.responder_id}")
-                    self.lamport_clock.updateRelogio(response.lamport_timestamp)
-                    received_ok = True
-                channel.close()
-            except grpc.RpcError as e:
-                logging.debug(f"[ELEIÇÃO] Servidor {peer_id} não respondeu: {e.code()}")
-        
-        if received_ok:
-            # Espera pelo COORDINATOR
-            logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Aguardando COORDINATOR...")
-            time.sleep(self.coordinator_timeout)
-            # Se não recebeu coordinator, inicia nova eleição
-            with self._lock:
-                if self.leader_id is None:
-                    self._election_in_progress = False
-                    threading.Thread(target=self.start_election, daemon=True).start()
-        else:
-            # Nenhum respondeu, eu sou o líder (precaução caso falhe durante a eleição)
-            logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Nenhuma resposta OK. Declarando-me líder!")
-            self._declare_me_leader()
-        
-        with self._lock:
-            self._election_in_progress = False
-    
-    # Declara-se líder e envia COORDINATOR para todos
-    def _declare_me_leader(self):
-        self.set_leader(self.server_id)
-        ts = self.lamport_clock.incrementaRelogio()
-        
-        # Envia COORDINATOR para todos os peers
-        for peer_id, peer_addr in self.peers:
+                if not self._running or peer_id not in self._next:
+                    self._loops.discard(peer_id)
+                    break
+                start = max(self._next[peer_id], self._log_base) - self._log_base
+                batch = self._log[start:start + self.MAX_BATCH]
+                end = self._log_base + start + len(batch)
+
+            request = pb.ReplicationRequest(
+                leader_id=self.server_id,
+                messages=[pb.TextMessage(client_id_from=cid, content=content, lamport_timestamp=ts)
+                          for ts, cid, content in batch],
+                lamport_timestamp=self.lamport_clock.get_time(),
+            )
             try:
-                channel = grpc.insecure_channel(peer_addr)
-                stub = pb_grpc.ElectionModuleStub(channel)
-                request = pb.CoordinatorRequest(
-                    leader_id=self.server_id,
-                    lamport_timestamp=ts
-                )
-                stub.Coordinator(request, timeout=2.0)
-                channel.close()
-                logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Enviou COORDINATOR para {peer_id}")
-            except grpc.RpcError:
-                logging.debug(f"[ELEIÇÃO] Falha ao enviar COORDINATOR para {peer_id}")
-        
-        with self._lock:
-            self._election_in_progress = False
-    
-    # Responde a uma mensagem ELECTION
-    def handle_election(self, candidate_id: int, timestamp: int) -> tuple:
-        self.lamport_clock.updateRelogio(timestamp)
-        
-        if self.server_id > candidate_id:
-            # Respondo OK e inicio minha própria eleição, pois tenho ID maior
-            logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Recebeu ELECTION de {candidate_id}, respondendo OK")
-            threading.Thread(target=self.start_election, daemon=True).start()
-            return True, self.server_id
-        return False, self.server_id
-    
-    # Recebe anúncio de novo líder
-    def handle_coordinator(self, leader_id: int, timestamp: int):
-        self.lamport_clock.updateRelogio(timestamp)
-        logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Recebeu COORDINATOR - Novo líder é {leader_id}")
-        self.set_leader(leader_id)
+                response = stub.ReplicateMessages(request, timeout=self.rpc_timeout)
+            except grpc.RpcError as e:
+                logging.debug(f"[REPLICAÇÃO] Peer {peer_id} não respondeu: {e.code()}")
+                time.sleep(0.5)
+                continue
+
+            with self._cond:
+                if peer_id not in self._next:
+                    continue
+                if response.success:
+                    self._next[peer_id] = end
+                    self._acked[peer_id] = max(self._acked[peer_id], response.last_timestamp)
+                # Descarta do log o que todos os peers já receberam
+                done = min(self._next.values()) - self._log_base
+                if done > 0:
+                    self._trim(done)
+                self._cond.notify_all()
+            if not response.success:
+                time.sleep(0.5)
+        channel.close()
+
+
+# Tamanho dos blocos do snapshot enviados em FetchSnapshot
+SNAPSHOT_CHUNK_SIZE = 1024 * 1024
+
+# Tamanho máximo das respostas de sincronização entre servidores (padrão do gRPC é 4MB)
+SYNC_CHANNEL_OPTIONS = [('grpc.max_receive_message_length', 256 * 1024 * 1024)]
+
+
+# K-way merge dos históricos (já ordenados) recebidos dos peers
+# Ordena por (lamport_timestamp, client_id_from) e remove duplicatas
+def merge_histories(histories: list) -> list:
+    merged = []
+    last_key = None
+    for m in heapq.merge(*histories, key=lambda m: (m.lamport_timestamp, m.client_id_from)):
+        key = (m.lamport_timestamp, m.client_id_from)
+        if key != last_key:
+            merged.append(m)
+            last_key = key
+    return merged
+
+
+# Perfil determinístico dos handlers de RPC
+# Até o Python 3.11 o cProfile só enxerga a thread que o liga; o interceptor executa
+# cada handler (e cada passo dos streams) sob o perfil da thread do pool do gRPC.
+# No 3.12+ o perfil é do processo e `call` apenas repassa a chamada.
+# Com o perfil desligado o handler original é devolvido sem embrulho.
+class ProfilingInterceptor(grpc.ServerInterceptor):
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if (handler is None or self._profiler.cpu_mode != 'deterministic'
+                or handler_call_details.method.startswith('/chat_server.AdminModule/')):
+            return handler
+        call = self._profiler.call
+        if handler.unary_unary:
+            fn = handler.unary_unary
+            return grpc.unary_unary_rpc_method_handler(
+                lambda request, context: call(fn, request, context),
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer)
+        if handler.unary_stream:
+            fn = handler.unary_stream
+
+            def stream(request, context):
+                it = fn(request, context)
+                while True:
+                    try:
+                        item = call(next, it)
+                    except StopIteration:
+                        return
+                    yield item
+
+            return grpc.unary_stream_rpc_method_handler(
+                stream,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer)
+        return handler
 
 
 # Classe do serviço de chat distribuído com eleição (servidor)
-class ChatService(pb_grpc.ClientModuleServicer, pb_grpc.ServerModuleServicer, pb_grpc.ElectionModuleServicer):
-    def __init__(self, server_id: int, port: int, peers: list):
+class ChatService(pb_grpc.ClientModuleServicer, pb_grpc.ServerModuleServicer, pb_grpc.ElectionModuleServicer,
+                  pb_grpc.MembershipModuleServicer, pb_grpc.AdminModuleServicer):
+    # Máximo de mensagens retornadas por consulta ao histórico
+    HISTORY_PAGE_MAX = 1000
+
+    def __init__(self, server_id: int, port: int, peers: list,
+                 history_max_messages=100, history_max_bytes=None, history_max_age=None,
+                 clock='lamport', rate_limit=0.0, rate_burst=100.0,
+                 max_ingest_rate=0.0, max_backlog=10000,
+                 ack_level='leader', ack_timeout=2.0, snapshot_interval=30.0,
+                 sticky_leader=False, claim_leadership=False, election='bully',
+                 gossip=False, seeds=(), gossip_interval=0.5,
+                 heartbeat_interval=2.0, election_timeout=3.0,
+                 profile_dir='profiles', profile_mode='sampling', profile_interval=0.005,
+                 capture_trace=None, advertise=None):
+        # Lista de peers compartilhada (eleição, replicação); com gossip é a pertinência
+        # conhecida, atualizada no lugar: cresce com entradas e só encolhe com LEFT
+        peers = list(peers)
         self._server_id = server_id
         self._port = port
         self._address = f"localhost:{port}"
         self._subscribers = {}
         self._lock = threading.Lock()
         self._next_client_id = 1
-        self._lamport_clock = LamportClock()
-        self._message_history = []  # Para sincronização
+        # Relógio lógico do servidor: Lamport puro ou híbrido (HLC), que também
+        # carrega o tempo físico e permite consultar o histórico por tempo
+        self._use_hlc = (clock == 'hlc')
+        self._lamport_clock = HybridLogicalClock() if self._use_hlc else LamportClock()
+        # Histórico compacto para sincronização (retenção por quantidade, bytes ou idade)
+        self._message_history = MessageHistory(
+            max_messages=history_max_messages,
+            max_bytes=history_max_bytes,
+            max_age_s=history_max_age,
+        )
+        # Índice de busca textual, alimentado em background a cada mensagem
+        self._search_index = SearchIndex()
+
+        # Controle de admissão: limite por cliente e detecção de sobrecarga global
+        self._rate_limiter = RateLimiter(rate_limit, rate_burst)
+        self._overload = OverloadDetector(max_ingest_rate=max_ingest_rate, max_backlog=max_backlog)
+        self._load_monitor_thread = threading.Thread(target=self._load_monitor_loop, daemon=True)
+
+        # Replicação para os peers e nível de confirmação padrão das escritas
+        self._ack_level = ack_level
+        self._ack_timeout = ack_timeout
+        self._replicator = Replicator(server_id, peers, self._lamport_clock)
+
+        # Escritas só são aceitas depois que um novo líder termina o catch-up
+        self._writes_ready = threading.Event()
+        self._writes_ready.set()
+        self._catch_up_timeout = 5.0
+
+        # Snapshot periódico do histórico e do relógio, usado para bootstrap de
+        # servidores que reentram no cluster: (snapshot_ts, clock_ts, bytes)
+        self._snapshot = None
+        self._snapshot_interval = snapshot_interval
+        # Prazo para baixar o snapshot inteiro de um peer; estourado, tenta o próximo
+        self._snapshot_timeout = 30.0
+        self._snapshot_thread = threading.Thread(target=self._snapshot_loop, daemon=True)
         
-        # Instancia o algoritmo de eleição
-        self._election = BullyElection(
+        # Instancia a estratégia de eleição (bully, raft ou ring)
+        self._election = make_election(
+            election,
             server_id=server_id,
             peers=peers,
             lamport_clock=self._lamport_clock,
-            on_leader_change=self._on_leader_change
+            on_leader_change=self._on_leader_change,
+            sticky=sticky_leader,
         )
+        self._election.election_timeout = election_timeout
+        self._claim_leadership = claim_leadership
+
+        # Pertinência dinâmica (SWIM): entrada por seed, detecção de falhas por gossip
+        # no lugar do heartbeat direto ao líder
+        self._seeds = list(seeds)
+        self._membership = None
+        if gossip or self._seeds:
+            self._membership = SwimMembership(
+                server_id, self._address, peers,
+                protocol_period=gossip_interval,
+                on_join=self._on_member_join,
+                on_leave=self._on_member_leave,
+            )
+
+        # Drenagem (desligamento planejado do líder): durante a drenagem as escritas
+        # esperam o handoff e são repassadas ao sucessor
+        self._draining = False
+        self._handoff_done = threading.Event()
+        self._handoff_addr = None
+        self._handoff_client_addr = None
+        # Endereços anunciados aos clientes (GetLeader, REDIRECT) por ID de servidor.
+        # Por padrão são os mesmos usados entre servidores; diferem quando há um
+        # proxy no caminho (ex.: experiments/fault_proxy.py)
+        self._advertise = dict(advertise or {})
         
+        # Diagnóstico em tempo de execução (AdminModule.Profile ou sinais SIGUSR1/SIGUSR2)
+        self._profile_mode = profile_mode
+        self.profiler = RuntimeProfiler(output_dir=profile_dir, name=f"server{server_id}-{os.getpid()}",
+                                        sample_interval=profile_interval)
+
+        # Captura anonimizada dos envios (instante, remetente, tamanho, sala) para replay
+        self._trace = TraceWriter(capture_trace) if capture_trace else None
+
         # Thread de heartbeat para detectar falha do líder
-        self._heartbeat_interval = 2.0 # ping a cada 2 segundos
+        self._heartbeat_interval = heartbeat_interval  # ping a cada 2 segundos (padrão)
         self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
         self._running = True
 
     # Inicia threads de background após o servidor estar rodando
     def start_background_tasks(self):
-        self._heartbeat_thread.start()
-        # Inicia uma eleição ao entrar no cluster
+        if self._membership is not None:
+            if self._seeds and not self._membership.join(self._seeds):
+                logging.warning(f"[SERVER {self._server_id}] Nenhum seed respondeu; iniciando sozinho")
+            self._membership.start()
+        # Recupera o histórico de um peer (snapshot + cauda do log) antes de participar
+        self._bootstrap()
+        if self._membership is None:
+            self._heartbeat_thread.start()
+        self._load_monitor_thread.start()
+        self._replicator.start()
+        self._snapshot_thread.start()
+        # Inicia uma eleição ao entrar no cluster (ou adota o líder ativo, no modo sticky)
         time.sleep(1)  # Espera servidor inicializar
-        threading.Thread(target=self._election.start_election, daemon=True).start()
+        threading.Thread(target=self._join_cluster, daemon=True).start()
+
+    def _join_cluster(self):
+        self._election.join_cluster()
+        if self._claim_leadership and not self._election.am_i_leader():
+            self._election.request_leadership()
 
     # Callback quando o líder muda
+    # Chamado com o lock da eleição: o catch-up roda em outra thread
     def _on_leader_change(self, new_leader_id: int):
         logging.info(f"[SERVER {self._server_id}] Líder mudou para: {new_leader_id}")
+        if new_leader_id == self._server_id:
+            self._writes_ready.clear()
+            threading.Thread(target=self._catch_up, daemon=True).start()
+
+    # Callbacks da pertinência dinâmica (gossip)
+    def _on_member_join(self, peer_id: int, peer_addr: str):
+        self._replicator.add_peer(peer_id, peer_addr)
+
+    # A falha do líder detectada pelo gossip dispara a eleição (substitui o heartbeat)
+    def _on_member_leave(self, peer_id: int):
+        self._replicator.remove_peer(peer_id)
+        if peer_id == self._election.get_leader():
+            logging.warning(f"[SERVER {self._server_id}] Líder {peer_id} saiu do cluster!")
+            self._election.on_leader_failure(peer_id)
+
+    # Catch-up do novo líder: busca em paralelo (SyncState) o histórico de todos os
+    # peers alcançáveis, faz o merge e carrega o resultado antes de aceitar escritas
+    def _catch_up(self):
+        t0 = time.time()
+        try:
+            with self._lock:
+                since = self._message_history.last_timestamp()
+            peers = self._election.peers
+            with futures.ThreadPoolExecutor(max_workers=max(len(peers), 1)) as pool:
+                results = list(pool.map(lambda p: self._fetch_history(p[0], p[1], since), peers))
+            histories = [r for r in results if r]
+            merged = merge_histories(histories)
+            loaded = self._load_history(merged)
+            logging.info(f"[SERVER {self._server_id}] Catch-up: {loaded} mensagem(ns) de "
+                         f"{len(histories)} peer(s) em {time.time() - t0:.3f}s")
+            return loaded
+        finally:
+            self._writes_ready.set()
+
+    # Busca as mensagens de um peer após o timestamp informado (lista vazia se falhar)
+    def _fetch_history(self, peer_id: int, peer_addr: str, since: int) -> list:
+        try:
+            with grpc.insecure_channel(peer_addr, options=SYNC_CHANNEL_OPTIONS) as channel:
+                stub = pb_grpc.ElectionModuleStub(channel)
+                response = stub.SyncState(
+                    pb.SyncRequest(server_id=self._server_id, last_timestamp=since),
+                    timeout=self._catch_up_timeout,
+                )
+            self._lamport_clock.updateRelogio(response.lamport_timestamp)
+            return list(response.messages)
+        except grpc.RpcError as e:
+            logging.warning(f"[SERVER {self._server_id}] Catch-up: peer {peer_id} indisponível ({e.code()})")
+            return []
+
+    # Tira snapshots periódicos enquanto o histórico muda
+    def _snapshot_loop(self):
+        while self._running:
+            time.sleep(self._snapshot_interval)
+            with self._lock:
+                last = self._message_history.last_timestamp()
+            if self._snapshot is None or self._snapshot[0] != last:
+                self.take_snapshot()
+
+    # Gera um snapshot compacto do histórico e do relógio
+    # Sob o lock só as fatias das colunas são copiadas; a serialização fica fora,
+    # para não parar as escritas a cada snapshot_interval
+    def take_snapshot(self):
+        with self._lock:
+            captured = self._message_history.capture()
+            snapshot_ts = self._message_history.last_timestamp()
+            clock_ts = self._lamport_clock.get_time()
+        data = MessageHistory.encode_snapshot(captured)
+        self._snapshot = (snapshot_ts, clock_ts, data)
+        logging.info(f"[SERVER {self._server_id}] Snapshot: ts={snapshot_ts}, {len(data)} bytes")
+        return self._snapshot
+
+    # Envia o último snapshot em blocos (gera um na hora se ainda não houver)
+    def FetchSnapshot(self, request, context):
+        snapshot = self._snapshot or self.take_snapshot()
+        snapshot_ts, clock_ts, data = snapshot
+        view = memoryview(data)
+        for pos in range(0, max(len(data), 1), SNAPSHOT_CHUNK_SIZE):
+            yield pb.SnapshotChunk(
+                data=bytes(view[pos:pos + SNAPSHOT_CHUNK_SIZE]),
+                snapshot_timestamp=snapshot_ts,
+                lamport_timestamp=clock_ts,
+                total_size=len(data),
+            )
+
+    # Bootstrap ao (re)entrar no cluster: tenta o líder conhecido pelos peers e,
+    # em seguida, os demais peers, até um responder
+    # Peer travado ou particionado estoura o prazo (DEADLINE_EXCEEDED) e é pulado
+    def _bootstrap(self):
+        peers = list(self._election.peers)
+        leader_addr = None
+        for _, addr in peers:
+            try:
+                with grpc.insecure_channel(addr) as channel:
+                    info = pb_grpc.ClientModuleStub(channel).GetLeader(pb.Empty(), timeout=1.0)
+                if info.is_leader_known and info.leader_address:
+                    leader_addr = info.leader_address
+                    break
+            except grpc.RpcError:
+                continue
+        candidates = [leader_addr] if leader_addr else []
+        candidates += [addr for _, addr in peers if addr != leader_addr]
+        for addr in candidates:
+            try:
+                return self._bootstrap_from_peer(addr)
+            except grpc.RpcError as e:
+                logging.info(f"[SERVER {self._server_id}] Bootstrap: {addr} indisponível ({e.code()})")
+        return 0
+
+    # Baixa o snapshot de um peer e depois apenas a cauda do log (SyncState)
+    def _bootstrap_from_peer(self, peer_addr: str) -> int:
+        t0 = time.time()
+        with grpc.insecure_channel(peer_addr, options=SYNC_CHANNEL_OPTIONS) as channel:
+            chunks = []
+            snapshot_ts = clock_ts = 0
+            for chunk in pb_grpc.ServerModuleStub(channel).FetchSnapshot(
+                    pb.SnapshotRequest(server_id=self._server_id), timeout=self._snapshot_timeout):
+                chunks.append(chunk.data)
+                snapshot_ts, clock_ts = chunk.snapshot_timestamp, chunk.lamport_timestamp
+            data = b''.join(chunks)
+
+            with self._lock:
+                if data:
+                    self._message_history.load_bytes(data)
+                self._lamport_clock.updateRelogio(clock_ts)
+                entries = [(ts, content) for ts, _, content in self._message_history]
+                oldest = self._message_history.first_timestamp()
+            self._search_index.submit_many(entries, oldest)
+            t_snapshot = time.time()
+
+            response = pb_grpc.ElectionModuleStub(channel).SyncState(
+                pb.SyncRequest(server_id=self._server_id, last_timestamp=snapshot_ts),
+                timeout=self._catch_up_timeout,
+            )
+        self._lamport_clock.updateRelogio(response.lamport_timestamp)
+        tail = self._load_history(response.messages)
+
+        with self._lock:
+            total = len(self._message_history)
+        logging.info(f"[SERVER {self._server_id}] Bootstrap de {peer_addr}: snapshot com "
+                     f"{len(data)} bytes em {t_snapshot - t0:.3f}s, cauda de {tail} mensagem(ns) "
+                     f"em {time.time() - t_snapshot:.3f}s")
+        return total
+
+    # Acrescenta ao histórico as mensagens (ordenadas) mais novas que as locais
+    # Os timestamps do líder são mantidos: o relógio avança uma vez por lote
+    # (updateRelogio do maior), sem reservar timestamps novos (reservaRelogio)
+    def _load_history(self, messages: list) -> int:
+        with self._lock:
+            last = self._message_history.last_timestamp()
+            new = [m for m in messages if m.lamport_timestamp > last]
+            for m in new:
+                self._store(m.client_id_from, m.lamport_timestamp, m.content)
+            if new:
+                self._lamport_clock.updateRelogio(new[-1].lamport_timestamp)
+            oldest = self._message_history.first_timestamp()
+        self._search_index.submit_many(((m.lamport_timestamp, m.content) for m in new), oldest)
+        return len(new)
     
     def _heartbeat_loop(self):
         """
         Loop que verifica se o líder está vivo.
         
         O Heartbeat é um mecanismo de DETECÇÃO DE FALHAS:
-        - A cada 2 segundos, servidores backup enviam "ping" ao líder
+        - A cada heartbeat_interval segundos (padrão 2), servidores backup enviam "ping" ao líder
         - Se o líder não responder, significa que falhou
         - Quando detecta falha, inicia uma nova ELEIÇÃO
         
@@ -222,7 +558,7 @@ class ChatService(pb_grpc.ClientModuleServicer, pb_grpc.ServerModuleServicer, pb
             
             # Envia heartbeat para o líder (apenas ping/pong, sem Lamport)
             try:
-                channel = grpc.insecure_channel(leader_addr)
+                channel = grpc.insecure_channel(leader_addr, options=PEER_CHANNEL_OPTIONS)
                 stub = pb_grpc.ElectionModuleStub(channel)
                 request = pb.HeartbeatRequest(
                     server_id=self._server_id,
@@ -232,8 +568,36 @@ class ChatService(pb_grpc.ClientModuleServicer, pb_grpc.ServerModuleServicer, pb
                 channel.close()
             except grpc.RpcError:
                 logging.warning(f"[SERVER {self._server_id}] Líder {leader_id} não respondeu ao heartbeat!")
-                # Líder falhou, inicia eleição
-                threading.Thread(target=self._election.start_election, daemon=True).start()
+                # Líder falhou, inicia eleição (cada estratégia decide quando)
+                self._election.on_leader_failure(leader_id)
+
+    # Amostra periodicamente a taxa de ingestão e o backlog das filas dos assinantes
+    def _load_monitor_loop(self):
+        while self._running:
+            time.sleep(self._overload.interval)
+            with self._lock:
+                queues = list(self._subscribers.values())
+            backlog = max((q.qsize() for q in queues), default=0)
+            if self._overload.sample(backlog):
+                logging.warning(f"[SERVER {self._server_id}] Sobrecarga: ingestão={self._overload.ingest_rate:.0f} msg/s, backlog={backlog}")
+
+    # Decide se a mensagem pode ser aceita; senão rejeita com RESOURCE_EXHAUSTED
+    # e o tempo sugerido de espera no trailer "retry-after-ms"
+    # O limite por cliente usa o client_id_from informado pelo próprio cliente, e não o
+    # endereço de origem: atrás do chat_proxy (ou de uma drenagem) todos os clientes chegam
+    # pela mesma conexão. É um limite de cooperação, não proteção contra IDs forjados
+    def _admit(self, request, context):
+        retry_after = self._overload.retry_after()
+        reason = "servidor sobrecarregado"
+        if not retry_after:
+            key = request.client_id_from or context.peer()
+            retry_after = self._rate_limiter.check(key)
+            reason = "limite de taxa excedido"
+        if retry_after:
+            context.set_trailing_metadata(((RETRY_AFTER_KEY, str(int(retry_after * 1000) + 1)),))
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED,
+                          f"{reason}, tente novamente em {retry_after:.3f}s")
+        self._overload.record_ingest()
 
     # Heartbeat para detectar falha do líder (ping/pong)
     # Não incrementa o Relógio de Lamport
@@ -244,46 +608,137 @@ class ChatService(pb_grpc.ClientModuleServicer, pb_grpc.ServerModuleServicer, pb
             lamport_timestamp=0  # Não altera o relógio de Lamport
         )
     
-    # Métodos do Algoritmo de Eleição Bully
-    # Recebe mensagem ELECTION do Algoritmo de Bully
+    # Métodos do Algoritmo de Eleição
+    # Recebe mensagem ELECTION (a semântica depende da estratégia)
     def Election(self, request, context):
-        ok, responder_id = self._election.handle_election(
-            request.candidate_id, 
-            request.lamport_timestamp
-        )
+        ok, responder_id = self._election.handle_election(request)
         ts = self._lamport_clock.get_time()
         return pb.ElectionResponse(
             ok=ok,
             responder_id=responder_id,
-            lamport_timestamp=ts
+            lamport_timestamp=ts,
+            term=self._election.term
         )
     
-    # Recebe mensagem COORDINATOR do Algoritmo de Bully com o anuncio de novo líder
+    # Recebe mensagem COORDINATOR com o anuncio de novo líder
     def Coordinator(self, request, context):
-        self._election.handle_coordinator(
-            request.leader_id,
-            request.lamport_timestamp
-        )
+        self._election.handle_coordinator(request)
         ts = self._lamport_clock.get_time()
         return pb.CoordinatorResponse(
             acknowledged=True,
             lamport_timestamp=ts
         )
     
+    # Pedido explícito de transferência de liderança para target_id
+    # Se este servidor é o alvo, assume a liderança; senão, repassa o pedido ao alvo
+    def TransferLeadership(self, request, context):
+        self._lamport_clock.updateRelogio(request.lamport_timestamp)
+        if request.target_id == self._server_id:
+            threading.Thread(target=self._election.request_leadership, daemon=True).start()
+            return pb.TransferResponse(accepted=True, lamport_timestamp=self._lamport_clock.get_time())
+        for pid, addr in self._election.peers:
+            if pid == request.target_id:
+                try:
+                    with grpc.insecure_channel(addr) as channel:
+                        return pb_grpc.ElectionModuleStub(channel).TransferLeadership(request, timeout=2.0)
+                except grpc.RpcError as e:
+                    logging.warning(f"[SERVER {self._server_id}] Handoff: servidor {pid} indisponível ({e.code()})")
+        return pb.TransferResponse(accepted=False, lamport_timestamp=self._lamport_clock.get_time())
+
+    # Métodos da pertinência dinâmica (SWIM)
+    def _require_membership(self, context):
+        if self._membership is None:
+            context.abort(grpc.StatusCode.FAILED_PRECONDITION, "gossip desativado neste servidor")
+        return self._membership
+
+    def Ping(self, request, context):
+        return self._require_membership(context).handle_ping(request)
+
+    def PingReq(self, request, context):
+        return self._require_membership(context).handle_ping_req(request)
+
+    def Join(self, request, context):
+        return self._require_membership(context).handle_join(request)
+
+    # Custo da estratégia de eleição observado por este servidor
+    def GetElectionStats(self, request, context):
+        stats = self._election.stats.as_dict()
+        # Eventos são registrados no relógio monotônico; converte para o relógio de
+        # parede, comparável entre processos da mesma máquina
+        offset = time.time() - time.monotonic()
+        events = [pb.ElectionEvent(kind=kind, wall_time=at + offset, leader_id=leader_id)
+                  for at, kind, leader_id in self._election.stats.recent_events()]
+        return pb.ElectionStats(strategy=self._election.name, term=self._election.term,
+                                events=events, **stats)
+
     # Sincroniza estado (mensagens) com outro servidor (novo líder)
     def SyncState(self, request, context):
         ts = self._lamport_clock.updateRelogio(request.last_timestamp)
         with self._lock:
             # Retorna mensagens após o timestamp solicitado
-            msgs = [m for m in self._message_history if m.lamport_timestamp > request.last_timestamp]
+            entries = self._message_history.since(request.last_timestamp)
+        msgs = [
+            pb.TextMessage(client_id_from=cid, content=content, lamport_timestamp=mts)
+            for mts, cid, content in entries
+        ]
         return pb.SyncResponse(messages=msgs, lamport_timestamp=ts)
     
+    # Consulta paginada do histórico para clientes (scrollback, filtro por remetente)
+    # Usa o índice primário (ordem de Lamport) e o índice secundário por remetente,
+    # com custo limitado ao tamanho da página
+    def QueryHistory(self, request, context):
+        limit = self._page_limit(request, context)
+        cursor = request.cursor or None
+        with self._lock:
+            entries = self._message_history.query(
+                after_ts=None if request.reverse else cursor,
+                before_ts=cursor if request.reverse else None,
+                start_time=request.start_time_ms / 1000.0 if request.start_time_ms else None,
+                end_time=request.end_time_ms / 1000.0 if request.end_time_ms else None,
+                client_id=request.sender_id or None,
+                limit=limit + 1,
+                reverse=request.reverse,
+            )
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        msgs = [
+            pb.TextMessage(client_id_from=cid, content=content, lamport_timestamp=mts)
+            for mts, cid, content in entries
+        ]
+        return pb.HistoryPage(
+            messages=msgs,
+            lamport_timestamp=self._lamport_clock.get_time(),
+            next_cursor=entries[-1][0] if entries else request.cursor,
+            has_more=has_more,
+        )
+
+    # Tamanho da página pedido (0 = máximo), limitado a HISTORY_PAGE_MAX
+    def _page_limit(self, request, context):
+        if request.limit < 0:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"limit negativo: {request.limit}")
+        return min(request.limit or self.HISTORY_PAGE_MAX, self.HISTORY_PAGE_MAX)
+
+    # Busca textual no histórico usando o índice invertido
+    def SearchMessages(self, request, context):
+        limit = self._page_limit(request, context)
+        found = self._search_index.search(request.query, limit=limit, order_by_time=request.order_by_time)
+        msgs = []
+        with self._lock:
+            for ts in found:
+                entry = self._message_history.lookup(ts)
+                if entry is not None:
+                    mts, cid, content = entry
+                    msgs.append(pb.TextMessage(client_id_from=cid, content=content, lamport_timestamp=mts))
+        return pb.SearchResponse(messages=msgs, lamport_timestamp=self._lamport_clock.get_time())
+
     # Lida quando o cliente pergunta quem é o líder
     def GetLeader(self, request, context):
         leader_id = self._election.get_leader()
         leader_addr = ""
         
-        if leader_id == self._server_id:
+        if leader_id in self._advertise:
+            leader_addr = self._advertise[leader_id]
+        elif leader_id == self._server_id:
             leader_addr = self._address
         else:
             for pid, addr in self._election.peers:
@@ -333,6 +788,9 @@ class ChatService(pb_grpc.ClientModuleServicer, pb_grpc.ServerModuleServicer, pb
                     msg = q.get(timeout=1.0)
                 except queue.Empty:
                     continue
+                if msg is None:
+                    # Fim do stream (drenagem): o cliente já recebeu o REDIRECT
+                    return
                 yield msg
         finally:
             with self._lock:
@@ -342,47 +800,244 @@ class ChatService(pb_grpc.ClientModuleServicer, pb_grpc.ServerModuleServicer, pb
 
     # Recebe mensagem do cliente (caso seja o líder)
     def SendMessageToServer(self, request, context):
+        if self._trace is not None:
+            # Registra a chegada (antes da admissão): o trace reproduz a carga oferecida
+            self._trace.record(request.client_id_from, len(request.content.encode('utf-8')),
+                               self._request_room(context))
+        if self._draining:
+            return self._forward_to_successor(request, context)
+        # Novo líder ainda carregando o histórico dos peers
+        if not self._writes_ready.wait(timeout=self._catch_up_timeout):
+            context.abort(grpc.StatusCode.UNAVAILABLE, "líder em catch-up, tente novamente")
+        self._admit(request, context)
         print(f"[SERVER {self._server_id}] Mensagem recebida de cliente {request.client_id_from} (ts_recebido={request.lamport_timestamp}): '{request.content}'")
         
-        # Armazena no histórico
+        ack_level = self._request_ack_level(context)
+
+        # Atribui o timestamp, armazena no histórico e entra no log de replicação
+        # na mesma seção crítica, mantendo ambos ordenados por Lamport
         with self._lock:
-            self._message_history.append(request)
-            # Mantém apenas as últimas 100 mensagens
-            if len(self._message_history) > 100:
-                self._message_history = self._message_history[-100:]
-        
-        return self.PushMessageToClients(request, context)
+            new_ts = self._lamport_clock.updateRelogio(request.lamport_timestamp)
+            self._store(request.client_id_from, new_ts, request.content)
+            if ack_level != 'leader':
+                self._replicator.append(new_ts, request.client_id_from, request.content)
+            oldest = self._message_history.first_timestamp()
+        # Indexação (e remoção do que saiu do histórico) fora do caminho do ack
+        self._search_index.submit(new_ts, request.content, oldest)
+
+        quorum_ok = ack_level != 'majority' or self._replicator.wait_for_quorum(new_ts, self._ack_timeout)
+
+        # Sem quorum a mensagem já está no histórico, no índice e no log de replicação:
+        # é entregue aos assinantes como qualquer outra, e a resposta avisa que a
+        # durabilidade não foi confirmada (reenviar geraria uma segunda cópia)
+        to_broadcast = pb.TextMessage(
+            client_id_from=request.client_id_from,
+            content=request.content,
+            lamport_timestamp=new_ts,
+        )
+        response = self._broadcast(to_broadcast)
+        if not quorum_ok:
+            logging.warning(f"[SERVER {self._server_id}] Timeout aguardando quorum para ts={new_ts}")
+            return pb.StatusResponse(success=False, client_id=request.client_id_from,
+                                     message=QUORUM_TIMEOUT_MESSAGE)
+        return response
+
+    # Durante a drenagem: espera o handoff e repassa a escrita ao novo líder
+    def _forward_to_successor(self, request, context):
+        if not self._handoff_done.wait(timeout=self._catch_up_timeout) or not self._handoff_addr:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "servidor em desligamento, tente novamente")
+        with grpc.insecure_channel(self._handoff_addr) as channel:
+            stub = pb_grpc.ClientModuleStub(channel)
+            try:
+                return stub.SendMessageToServer(request, metadata=context.invocation_metadata(),
+                                                timeout=self._catch_up_timeout)
+            except grpc.RpcError as e:
+                context.abort(e.code(), e.details() or "falha ao repassar ao novo líder")
+
+    # Desligamento planejado do líder:
+    # 1. para de aceitar escritas (novas escritas esperam o handoff e são repassadas)
+    # 2. esvazia as filas dos assinantes
+    # 3. transfere a liderança ao sucessor (TransferLeadership) e espera o COORDINATOR
+    # 4. envia REDIRECT com o endereço do novo líder a cada assinante e encerra os streams
+    def drain(self, timeout: float = 5.0):
+        if not self._election.am_i_leader():
+            return None
+        t0 = time.time()
+        deadline = t0 + timeout
+        self._draining = True
+        logging.info(f"[SERVER {self._server_id}] Drenagem: parando de aceitar escritas")
+
+        while time.time() < deadline:
+            with self._lock:
+                queues = list(self._subscribers.values())
+            if all(q.empty() for q in queues):
+                break
+            time.sleep(0.05)
+
+        successor = self._choose_successor()
+        if successor is not None:
+            successor_id, successor_addr = successor
+            try:
+                with grpc.insecure_channel(successor_addr) as channel:
+                    pb_grpc.ElectionModuleStub(channel).TransferLeadership(
+                        pb.TransferRequest(target_id=successor_id,
+                                           lamport_timestamp=self._lamport_clock.incrementaRelogio()),
+                        timeout=2.0,
+                    )
+                while time.time() < deadline and self._election.get_leader() != successor_id:
+                    time.sleep(0.05)
+                self._handoff_addr = successor_addr
+                self._handoff_client_addr = self._advertise.get(successor_id, successor_addr)
+            except grpc.RpcError as e:
+                logging.warning(f"[SERVER {self._server_id}] Drenagem: handoff para {successor_id} falhou ({e.code()})")
+        self._handoff_done.set()
+
+        with self._lock:
+            queues = list(self._subscribers.values())
+        for q in queues:
+            if self._handoff_addr:
+                q.put(pb.TextMessage(client_id_from=0, content=f"REDIRECT:{self._handoff_client_addr}",
+                                     lamport_timestamp=self._lamport_clock.get_time()))
+            q.put(None)
+        logging.info(f"[SERVER {self._server_id}] Drenagem concluída em {time.time() - t0:.3f}s "
+                     f"(novo líder: {self._handoff_addr or 'nenhum'})")
+        return self._handoff_addr
+
+    # Sucessor: peer vivo de maior ID (prioridade do Bully)
+    def _choose_successor(self):
+        for pid, addr in sorted(self._election.peers, reverse=True):
+            if self._election.is_alive(pid):
+                return pid, addr
+        return None
+
+    # Nível de confirmação da requisição (metadado "ack-level") ou o padrão do servidor
+    def _request_ack_level(self, context):
+        for key, value in context.invocation_metadata() or ():
+            if key == ACK_LEVEL_KEY and value in ACK_LEVELS:
+                return value
+        return self._ack_level
+
+    # Sala da requisição (metadado "room"), vazia se o cliente não informou
+    def _request_room(self, context):
+        for key, value in context.invocation_metadata() or ():
+            if key == ROOM_KEY:
+                return value
+        return ''
+
+    # Armazena uma mensagem já carimbada no histórico (chamar com self._lock)
+    def _store(self, client_id: int, lamport_timestamp: int, content: str):
+        # Com HLC o índice por tempo usa o instante embutido no timestamp
+        wall_time = HybridLogicalClock.wall_time(lamport_timestamp) if self._use_hlc else None
+        self._message_history.append(client_id, lamport_timestamp, content, wall_time)
+
+    # Recebe do líder um lote de mensagens replicadas
+    def ReplicateMessages(self, request, context):
+        if self._election.am_i_leader() and request.leader_id != self._server_id:
+            # Outro servidor acha que é líder; não aceita escritas dele
+            return pb.ReplicationResponse(success=False, last_timestamp=0,
+                                          lamport_timestamp=self._lamport_clock.get_time())
+        # Ignora mensagens já aplicadas (reenvios após timeout)
+        self._load_history(request.messages)
+        with self._lock:
+            last = self._message_history.last_timestamp()
+        return pb.ReplicationResponse(success=True, last_timestamp=last,
+                                      lamport_timestamp=self._lamport_clock.get_time())
 
     # Broadcast da mensagem para todos os clientes conectados
     def PushMessageToClients(self, request, context):
-        with self._lock:
-            new_ts = self._lamport_clock.updateRelogio(request.lamport_timestamp)
+        # O relógio tem lock próprio; não precisa do lock do serviço
+        new_ts = self._lamport_clock.updateRelogio(request.lamport_timestamp)
         
         to_broadcast = pb.TextMessage(
             client_id_from=request.client_id_from,
             content=request.content,
             lamport_timestamp=new_ts,
         )
+        return self._broadcast(to_broadcast)
 
+    # Entrega uma mensagem já carimbada para as filas dos assinantes
+    def _broadcast(self, to_broadcast):
         with self._lock:
             subscribers = list(self._subscribers.items())
 
-        target_nodes = [cid for cid, _ in subscribers if cid != request.client_id_from]
+        target_nodes = [cid for cid, _ in subscribers if cid != to_broadcast.client_id_from]
         print(f"[SERVER {self._server_id}] Encaminhando mensagem (ts={to_broadcast.lamport_timestamp}) para {len(target_nodes)} cliente(s): {target_nodes}")
 
         for cid, q in subscribers:
-            if cid == request.client_id_from:
+            if cid == to_broadcast.client_id_from:
                 continue
             try:
                 q.put_nowait(to_broadcast)
             except Exception:
                 logging.exception("Falha em enviar mensagem para cliente %s", cid)
 
-        return pb.StatusResponse(success=True, client_id=request.client_id_from, message="Pushed")
+        return pb.StatusResponse(success=True, client_id=to_broadcast.client_id_from, message="Pushed")
+
+    # Diagnóstico: perfil de CPU, pilhas das threads e snapshots de memória
+    # Os arquivos ficam no diretório de perfis do servidor
+    def Profile(self, request, context):
+        action = request.action
+        files = []
+        try:
+            if action == 'cpu-start':
+                mode = request.mode or self._profile_mode
+                self.profiler.start_cpu(mode)
+                message = f"perfil de CPU ({mode}) iniciado"
+            elif action == 'cpu-stop':
+                files = self.profiler.stop_cpu()
+                message = "perfil de CPU gravado"
+            elif action == 'stacks':
+                files = self.profiler.dump_stacks()
+                message = "pilhas das threads gravadas"
+            elif action == 'heap-snapshot':
+                files = self.profiler.heap_snapshot()
+                message = "snapshot do tracemalloc gravado"
+            elif action == 'heap-stop':
+                self.profiler.heap_stop()
+                message = "tracemalloc desligado"
+            elif action == 'status':
+                message = self.profiler.status()
+            else:
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"ação desconhecida: {action}")
+        except ValueError as e:
+            return pb.ProfileResponse(success=False, message=str(e))
+        logging.info(f"[SERVER {self._server_id}] Profile {action}: {message} {files}")
+        return pb.ProfileResponse(success=True, message=message, files=files)
+
+    # SIGUSR1: pilhas das threads; SIGUSR2: liga/desliga o perfil de CPU no modo padrão
+    def install_profile_signals(self):
+        if not hasattr(signal, 'SIGUSR1'):
+            return  # Windows
+
+        def on_stacks(signum, frame):
+            logging.info(f"[SERVER {self._server_id}] Pilhas gravadas: {self.profiler.dump_stacks()}")
+
+        def on_toggle(signum, frame):
+            # A escrita dos arquivos (e o join da thread de amostragem) fica fora do handler
+            threading.Thread(target=self._toggle_cpu_profile, daemon=True).start()
+
+        signal.signal(signal.SIGUSR1, on_stacks)
+        signal.signal(signal.SIGUSR2, on_toggle)
+
+    def _toggle_cpu_profile(self):
+        try:
+            if self.profiler.cpu_mode is None:
+                self.profiler.start_cpu(self._profile_mode)
+                logging.info(f"[SERVER {self._server_id}] Perfil de CPU ({self._profile_mode}) iniciado")
+            else:
+                logging.info(f"[SERVER {self._server_id}] Perfil de CPU gravado: {self.profiler.stop_cpu()}")
+        except ValueError as e:
+            logging.warning(f"[SERVER {self._server_id}] Perfil de CPU: {e}")
 
     # Para o servidor (Ctrl + C)
     def stop(self):
         self._running = False
+        self._search_index.stop()
+        self._replicator.stop()
+        if self._trace is not None:
+            self._trace.close()
+        if self._membership is not None:
+            self._membership.leave()
 
 # Faz o parse da string de peers no formato "id1:host1:port1,id2:host2:port2"
 # Retorna lista de (id, address) conhecidos, excluindo o próprio servidor
@@ -401,13 +1056,19 @@ def parse_peers(peers_str: str, my_id: int) -> list:
     return peers
 
 # Inicializa o servidor 
-def serve(server_id: int, port: int, peers: list):
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    servicer = ChatService(server_id=server_id, port=port, peers=peers)
+# service_opts são repassadas ao ChatService (histórico, relógio, admissão)
+def serve(server_id: int, port: int, peers: list, **service_opts):
+    max_workers = service_opts.pop('max_workers', 10)
+    servicer = ChatService(server_id=server_id, port=port, peers=peers, **service_opts)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers),
+                         interceptors=[ProfilingInterceptor(servicer.profiler)])
     
     pb_grpc.add_ClientModuleServicer_to_server(servicer, server)
     pb_grpc.add_ServerModuleServicer_to_server(servicer, server)
     pb_grpc.add_ElectionModuleServicer_to_server(servicer, server)
+    pb_grpc.add_MembershipModuleServicer_to_server(servicer, server)
+    pb_grpc.add_AdminModuleServicer_to_server(servicer, server)
+    servicer.install_profile_signals()
     
     server.add_insecure_port(f"[::]:{port}")
     server.start()
@@ -422,18 +1083,101 @@ def serve(server_id: int, port: int, peers: list):
             time.sleep(60)
     except KeyboardInterrupt:
         logging.info("Parando server...")
+        # Se for o líder, drena e transfere a liderança antes de sair
+        if servicer.drain():
+            time.sleep(1.0)  # tempo para o sucessor concluir o catch-up via SyncState
         servicer.stop()
-        server.stop(0)
+        server.stop(2.0).wait()
 
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
-    parser = argparse.ArgumentParser(description='Chat Server com Algoritmo de Eleição Bully')
+    parser = argparse.ArgumentParser(description='Chat Server com eleição de líder (Bully, Raft ou anel)')
     parser.add_argument('--id', type=int, required=True, help='ID único do servidor (usado na eleição)')
     parser.add_argument('--port', type=int, default=50051, help='Porta do servidor')
     parser.add_argument('--peers', type=str, default='', 
                         help='Lista de peers no formato "id1:host1:port1,id2:host2:port2"')
+    parser.add_argument('--history-max-messages', type=int, default=100,
+                        help='Máximo de mensagens retidas no histórico')
+    parser.add_argument('--history-max-bytes', type=int, default=None,
+                        help='Máximo de bytes de conteúdo retidos no histórico')
+    parser.add_argument('--history-max-age', type=float, default=None,
+                        help='Idade máxima (segundos) das mensagens no histórico')
+    parser.add_argument('--clock', choices=['lamport', 'hlc'], default='lamport',
+                        help='Relógio lógico: Lamport ou híbrido (HLC, indexável por tempo)')
+    parser.add_argument('--rate-limit', type=float, default=0.0,
+                        help='Mensagens por segundo permitidas por cliente (padrão 0: desativado)')
+    parser.add_argument('--rate-burst', type=float, default=100.0,
+                        help='Rajada máxima de mensagens por cliente')
+    parser.add_argument('--max-ingest-rate', type=float, default=0.0,
+                        help='Taxa global de ingestão (msg/s) acima da qual o líder rejeita envios (0 desativa)')
+    parser.add_argument('--max-backlog', type=int, default=10000,
+                        help='Backlog máximo na fila de um assinante antes de rejeitar envios (0 desativa)')
+    parser.add_argument('--ack-level', choices=ACK_LEVELS, default='leader',
+                        help='Confirmação das escritas: leader (memória do líder), async (replicação em '
+                             'background) ou majority (espera a maioria do cluster)')
+    parser.add_argument('--ack-timeout', type=float, default=2.0,
+                        help='Tempo máximo (s) esperando a maioria no nível majority')
+    parser.add_argument('--snapshot-interval', type=float, default=30.0,
+                        help='Intervalo (s) entre snapshots do histórico usados no bootstrap de peers')
+    parser.add_argument('--sticky-leader', action='store_true',
+                        help='Ao reentrar no cluster com um líder ativo, vira seguidor mesmo tendo ID maior')
+    parser.add_argument('--claim-leadership', action='store_true',
+                        help='Após entrar no cluster, pede explicitamente a liderança (handoff de prioridade)')
+    parser.add_argument('--election', choices=sorted(ELECTION_STRATEGIES), default='bully',
+                        help='Estratégia de eleição: bully (maior ID vence), raft (termos e timeout '
+                             'aleatório) ou ring (anel)')
+    parser.add_argument('--gossip', action='store_true',
+                        help='Pertinência dinâmica com gossip (SWIM) no lugar do heartbeat ao líder')
+    parser.add_argument('--seed', type=str, default='',
+                        help='Endereço(s) "host:port" de membros já no cluster para entrar via gossip '
+                             '(implica --gossip; dispensa --peers)')
+    parser.add_argument('--gossip-interval', type=float, default=0.5,
+                        help='Período (s) do protocolo de gossip (uma sonda por período)')
+    parser.add_argument('--heartbeat-interval', type=float, default=2.0,
+                        help='Intervalo (s) entre heartbeats dos seguidores ao líder')
+    parser.add_argument('--election-timeout', type=float, default=3.0,
+                        help='Espera (s) pela resposta a uma mensagem ELECTION (raft: teto do atraso aleatório)')
+    parser.add_argument('--max-workers', type=int, default=10,
+                        help='Threads do servidor gRPC (cada stream de assinante ocupa uma enquanto aberto)')
+    parser.add_argument('--advertise', type=str, default='',
+                        help='Endereços anunciados aos clientes "id1:host1:port1,..." (inclusive o próprio); '
+                             'por padrão os de --peers')
+    parser.add_argument('--capture-trace', type=str, default=None,
+                        help='Arquivo onde gravar o trace anonimizado dos envios (para trace_replay.py)')
+    parser.add_argument('--profile-dir', type=str, default='profiles',
+                        help='Diretório dos arquivos de diagnóstico (perfis de CPU, pilhas, tracemalloc)')
+    parser.add_argument('--profile-mode', choices=PROFILE_MODES, default='sampling',
+                        help='Modo padrão do perfil de CPU: sampling (todas as threads, baixo custo) '
+                             'ou deterministic (cProfile nos handlers de RPC)')
+    parser.add_argument('--profile-interval', type=float, default=0.005,
+                        help='Intervalo (s) entre amostras no modo sampling')
     args = parser.parse_args()
     
     peers = parse_peers(args.peers, args.id)
-    serve(args.id, args.port, peers)
+    serve(args.id, args.port, peers,
+          history_max_messages=args.history_max_messages,
+          history_max_bytes=args.history_max_bytes,
+          history_max_age=args.history_max_age,
+          clock=args.clock,
+          rate_limit=args.rate_limit,
+          rate_burst=args.rate_burst,
+          max_ingest_rate=args.max_ingest_rate,
+          max_backlog=args.max_backlog,
+          ack_level=args.ack_level,
+          ack_timeout=args.ack_timeout,
+          snapshot_interval=args.snapshot_interval,
+          sticky_leader=args.sticky_leader,
+          claim_leadership=args.claim_leadership,
+          election=args.election,
+          gossip=args.gossip,
+          seeds=[s.strip() for s in args.seed.split(',') if s.strip()],
+          gossip_interval=args.gossip_interval,
+          heartbeat_interval=args.heartbeat_interval,
+          election_timeout=args.election_timeout,
+          profile_dir=args.profile_dir,
+          profile_mode=args.profile_mode,
+          profile_interval=args.profile_interval,
+          max_workers=args.max_workers,
+          capture_trace=args.capture_trace,
+          advertise=dict(parse_peers(args.advertise, my_id=None)))
@@ -3,5 +3,13 @@ Common utilities for the distributed chat system.
 """
 
 from .lamport_clock import LamportClock
+from .hybrid_clock import HybridLogicalClock
+from .message_history import MessageHistory
+from .search_index import SearchIndex
+from .rate_limiter import RateLimiter, OverloadDetector, TokenBucket
+from .profiler import RuntimeProfiler, PROFILE_MODES
+from .traffic_trace import TraceWriter, TraceRecord, read_trace
 
-__all__ = ['LamportClock']
+__all__ = ['LamportClock', 'HybridLogicalClock', 'MessageHistory', 'SearchIndex',
+           'RateLimiter', 'OverloadDetector', 'TokenBucket', 'RuntimeProfiler', 'PROFILE_MODES',
+           'TraceWriter', 'TraceRecord', 'read_trace']
@@ -0,0 +1,97 @@
+"""
+Implementação do Relógio Lógico Híbrido (HLC)
+
+O HLC combina o tempo físico com um contador lógico. Assim como o Relógio de
+Lamport, é monotônico e respeita causalidade (um evento recebido sempre fica
+com timestamp maior que o do remetente), mas o timestamp também carrega o
+instante aproximado em que o evento ocorreu.
+
+O timestamp é codificado num único inteiro de 64 bits:
+    (milissegundos desde a época << 16) | contador lógico
+de modo que a comparação de inteiros equivale a comparar (físico, lógico) e o
+valor cabe nos campos int64 lamport_timestamp já existentes no protocolo.
+"""
+
+import threading
+import time
+
+LOGICAL_BITS = 16
+
+
+class HybridLogicalClock:
+    """
+    Relógio Lógico Híbrido thread-safe, com a mesma interface do LamportClock.
+
+    Regras:
+    1. Evento local: max(local + 1, agora)
+    2. Ao receber mensagem: max(local + 1, recebido + 1, agora)
+    onde "agora" é o tempo físico atual com contador lógico zerado.
+    """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._timestamp = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def from_wall_time(seconds):
+        """Converte um instante (segundos desde a época) no menor timestamp HLC correspondente."""
+        return int(seconds * 1000) << LOGICAL_BITS
+
+    @staticmethod
+    def wall_time(timestamp):
+        """Retorna o instante físico (segundos desde a época) embutido no timestamp."""
+        return (timestamp >> LOGICAL_BITS) / 1000.0
+
+    def _now(self):
+        return self.from_wall_time(self._clock())
+
+    def get_time(self):
+        """Retorna o timestamp atual sem modificá-lo."""
+        return self._timestamp
+
+    def incrementaRelogio(self):
+        """
+        Avança o relógio antes de um evento local.
+        Retorna o novo timestamp.
+        """
+        now = self._now()
+        with self._lock:
+            self._timestamp = max(self._timestamp + 1, now)
+            return self._timestamp
+
+    def updateRelogio(self, received_timestamp):
+        """
+        Atualiza o relógio ao receber um evento externo.
+        Aplica a regra: max(local + 1, recebido + 1, agora)
+
+        Args:
+            received_timestamp: timestamp recebido de outro processo
+
+        Returns:
+            O novo timestamp local
+        """
+        now = self._now()
+        with self._lock:
+            self._timestamp = max(self._timestamp, received_timestamp) + 1
+            if now > self._timestamp:
+                self._timestamp = now
+            return self._timestamp
+
+    def reservaRelogio(self, n, received_timestamp=0):
+        """
+        Reserva um intervalo contíguo de n timestamps numa única operação.
+
+        Mesma semântica de LamportClock.reservaRelogio (usada só pelos
+        microbenchmarks; o servidor não carimba lotes novos).
+
+        Returns:
+            O primeiro timestamp do intervalo; o lote usa first .. first + n - 1
+        """
+        if n < 1:
+            raise ValueError("n deve ser >= 1")
+        now = self._now()
+        with self._lock:
+            first = max(self._timestamp + 1, received_timestamp + 1, now)
+            self._timestamp = first + n - 1
+            return first
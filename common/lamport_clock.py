@@ -24,9 +24,13 @@ class LamportClock:
         self._lock = threading.Lock()
 
     def get_time(self):
-        """Retorna o timestamp atual sem modificá-lo."""
-        with self._lock:
-            return self._timestamp
+        """
+        Retorna o timestamp atual sem modificá-lo.
+
+        Leitura sem lock: a atribuição de um int é atômica, então o valor lido
+        é sempre um timestamp já publicado (nunca um valor parcial).
+        """
+        return self._timestamp
 
     def incrementaRelogio(self):
         """
@@ -51,3 +55,32 @@ class LamportClock:
         with self._lock:
             self._timestamp = max(self._timestamp, received_timestamp) + 1
             return self._timestamp
+
+    def reservaRelogio(self, n, received_timestamp=0):
+        """
+        Reserva um intervalo contíguo de n timestamps numa única operação.
+
+        Equivale a aplicar updateRelogio(received_timestamp) seguido de n - 1
+        chamadas a incrementaRelogio, mas com uma só aquisição do lock. Serve
+        para carimbar um lote de mensagens NOVAS (ingestão em lote).
+
+        Hoje só os microbenchmarks (experiments/microbenchmarks.py) a usam: o
+        servidor recebe um envio por RPC, e os lotes que ele aplica
+        (replicação, catch-up, cauda do bootstrap) mantêm os timestamps dados
+        pelo líder, avançando o relógio uma vez por lote com
+        updateRelogio(maior timestamp). Reservar n timestamps nesses casos
+        gastaria n valores sem carimbar nada.
+
+        Args:
+            n: quantidade de timestamps a reservar (n >= 1)
+            received_timestamp: maior timestamp recebido no lote (0 se local)
+
+        Returns:
+            O primeiro timestamp do intervalo; o lote usa first .. first + n - 1
+        """
+        if n < 1:
+            raise ValueError("n deve ser >= 1")
+        with self._lock:
+            first = max(self._timestamp, received_timestamp) + 1
+            self._timestamp = first + n - 1
+            return first
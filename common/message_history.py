@@ -0,0 +1,291 @@
+"""
+Histórico compacto de mensagens do chat
+
+Em vez de guardar objetos pb.TextMessage inteiros numa lista, o histórico é
+armazenado em colunas:
+- timestamps de Lamport em array('q')
+- IDs de cliente em array('i')
+- instante de chegada (wall time) em array('d')
+- conteúdo das mensagens concatenado numa única arena de bytes (UTF-8)
+
+Além do índice primário (ordem de Lamport), há um índice secundário por
+remetente, permitindo paginar as mensagens de um cliente sem varrer as demais.
+
+A retenção pode ser limitada por quantidade de mensagens, por bytes ou por
+idade. A remoção da mensagem mais antiga é O(1): apenas avança o índice de
+início; a compactação física das colunas é feita de forma amortizada.
+
+O formato colunar também permite gerar snapshots compactos do histórico
+(to_bytes/load_bytes) copiando as colunas diretamente, sem serializar
+mensagem por mensagem; capture() separa a cópia (rápida, sob o lock do
+chamador) da serialização.
+"""
+
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+# Cabeçalho do snapshot: assinatura, quantidade de mensagens, bytes da arena
+_SNAPSHOT_MAGIC = b'CHH1'
+_SNAPSHOT_HEADER = struct.Struct('<4sqq')
+
+
+class MessageHistory:
+    """
+    Armazena o histórico recente de mensagens com custo de memória previsível.
+
+    Não é thread-safe: o chamador (ChatService) protege o acesso com seu lock.
+    Os timestamps devem ser inseridos em ordem não decrescente, o que permite
+    buscas por timestamp em O(log n). O instante de chegada também é mantido
+    não decrescente, formando um índice por tempo físico.
+    """
+
+    # Só compacta quando há pelo menos este número de entradas removidas
+    _COMPACT_MIN = 1024
+
+    def __init__(self, max_messages=100, max_bytes=None, max_age_s=None, clock=time.time):
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self._clock = clock
+
+        self._timestamps = array('q')
+        self._client_ids = array('i')
+        self._wall_times = array('d')
+        self._offsets = array('q')  # início de cada mensagem na arena
+        self._arena = bytearray()
+        self._head = 0  # índice da mensagem mais antiga ainda retida
+        self._base = 0  # número de sequência global da posição 0 das colunas
+        self._nbytes = 0
+        # Índice secundário: client_id -> números de sequência (crescentes)
+        self._by_sender = {}
+
+    def __len__(self):
+        return len(self._timestamps) - self._head
+
+    @property
+    def nbytes(self):
+        """Total de bytes de conteúdo retidos."""
+        return self._nbytes
+
+    def first_timestamp(self):
+        """Timestamp da mensagem mais antiga retida (0 se vazio)."""
+        return self._timestamps[self._head] if len(self) else 0
+
+    def last_timestamp(self):
+        """Timestamp da mensagem mais recente (0 se vazio)."""
+        return self._timestamps[-1] if len(self) else 0
+
+    def append(self, client_id, lamport_timestamp, content, wall_time=None):
+        """
+        Adiciona uma mensagem ao final do histórico e aplica a retenção.
+
+        Args:
+            client_id: ID do cliente remetente
+            lamport_timestamp: timestamp de Lamport atribuído pelo servidor
+            content: conteúdo (str) da mensagem
+            wall_time: instante de chegada (padrão: agora)
+        """
+        if wall_time is None:
+            wall_time = self._clock()
+        # Mantém a coluna de tempo ordenada mesmo se o relógio físico recuar
+        if len(self) and wall_time < self._wall_times[-1]:
+            wall_time = self._wall_times[-1]
+        data = content.encode('utf-8')
+
+        seq = self._base + len(self._timestamps)
+        self._by_sender.setdefault(client_id, array('q')).append(seq)
+        self._timestamps.append(lamport_timestamp)
+        self._client_ids.append(client_id)
+        self._wall_times.append(wall_time)
+        self._offsets.append(len(self._arena))
+        self._arena += data
+        self._nbytes += len(data)
+
+        self.evict(wall_time)
+
+    def evict(self, now=None):
+        """Remove mensagens antigas até respeitar todos os limites de retenção."""
+        if now is None:
+            now = self._clock()
+        while len(self):
+            if self.max_messages is not None and len(self) > self.max_messages:
+                self._pop_oldest()
+            elif self.max_bytes is not None and self._nbytes > self.max_bytes:
+                self._pop_oldest()
+            elif self.max_age_s is not None and now - self._wall_times[self._head] > self.max_age_s:
+                self._pop_oldest()
+            else:
+                break
+
+    def _end_offset(self, i):
+        return self._offsets[i + 1] if i + 1 < len(self._offsets) else len(self._arena)
+
+    def _pop_oldest(self):
+        i = self._head
+        self._nbytes -= self._end_offset(i) - self._offsets[i]
+        self._head += 1
+        if self._head >= self._COMPACT_MIN and self._head * 2 >= len(self._timestamps):
+            self._compact()
+
+    def _compact(self):
+        # Descarta fisicamente as entradas já removidas (custo amortizado)
+        head = self._head
+        base = self._offsets[head] if head < len(self._offsets) else len(self._arena)
+        del self._arena[:base]
+        del self._timestamps[:head]
+        del self._client_ids[:head]
+        del self._wall_times[:head]
+        self._offsets = array('q', (o - base for o in self._offsets[head:]))
+        self._head = 0
+        self._base += head
+
+        # Remove do índice por remetente as sequências já descartadas
+        for cid in list(self._by_sender):
+            seqs = self._by_sender[cid]
+            cut = bisect_left(seqs, self._base)
+            if cut == len(seqs):
+                del self._by_sender[cid]
+            elif cut:
+                del seqs[:cut]
+
+    def _entry(self, i):
+        content = bytes(self._arena[self._offsets[i]:self._end_offset(i)]).decode('utf-8')
+        return self._timestamps[i], self._client_ids[i], content
+
+    def __iter__(self):
+        for i in range(self._head, len(self._timestamps)):
+            yield self._entry(i)
+
+    def lookup(self, lamport_timestamp):
+        """Retorna a mensagem com o timestamp informado, ou None se não estiver retida."""
+        i = bisect_left(self._timestamps, lamport_timestamp, self._head)
+        if i < len(self._timestamps) and self._timestamps[i] == lamport_timestamp:
+            return self._entry(i)
+        return None
+
+    def since(self, lamport_timestamp):
+        """
+        Retorna as mensagens com timestamp maior que o informado, em ordem.
+
+        Returns:
+            Lista de tuplas (lamport_timestamp, client_id, content)
+        """
+        start = bisect_right(self._timestamps, lamport_timestamp, self._head)
+        return [self._entry(i) for i in range(start, len(self._timestamps))]
+
+    def query(self, after_ts=None, before_ts=None, start_time=None, end_time=None,
+              client_id=None, limit=None, reverse=False):
+        """
+        Consulta paginada do histórico. Todos os filtros são opcionais e combináveis.
+
+        Args:
+            after_ts: apenas mensagens com timestamp > after_ts
+            before_ts: apenas mensagens com timestamp < before_ts
+            start_time, end_time: intervalo de chegada [start_time, end_time)
+            client_id: apenas mensagens deste remetente (índice secundário)
+            limit: tamanho máximo da página
+            reverse: se True, retorna das mais recentes para as mais antigas
+
+        Returns:
+            Lista de tuplas (lamport_timestamp, client_id, content)
+        """
+        lo, hi = self._head, len(self._timestamps)
+        if start_time is not None:
+            lo = max(lo, bisect_left(self._wall_times, start_time, self._head))
+        if end_time is not None:
+            hi = min(hi, bisect_left(self._wall_times, end_time, self._head))
+        if after_ts is not None:
+            lo = max(lo, bisect_right(self._timestamps, after_ts, self._head))
+        if before_ts is not None:
+            hi = min(hi, bisect_left(self._timestamps, before_ts, self._head))
+        if lo >= hi:
+            return []
+
+        if client_id is None:
+            positions = range(lo, hi)
+        else:
+            seqs = self._by_sender.get(client_id)
+            if not seqs:
+                return []
+            first = bisect_left(seqs, self._base + lo)
+            last = bisect_left(seqs, self._base + hi, first)
+            positions = range(first, last)
+
+        # Recorta a página antes de materializar, mantendo o custo limitado a limit
+        if limit is not None:
+            if reverse:
+                positions = positions[max(0, len(positions) - limit):]
+            else:
+                positions = positions[:limit]
+        if reverse:
+            positions = positions[::-1]
+
+        if client_id is None:
+            return [self._entry(i) for i in positions]
+        return [self._entry(seqs[j] - self._base) for j in positions]
+
+    def capture(self):
+        """
+        Copia as colunas retidas para um snapshot, sem serializar.
+
+        Só faz cópias de fatias (memcpy), então é barato o bastante para o
+        chamador segurar seu lock; a serialização (encode_snapshot) fica fora.
+        """
+        head = self._head
+        base = self._offsets[head] if len(self) else len(self._arena)
+        return (base, self._timestamps[head:], self._client_ids[head:], self._wall_times[head:],
+                self._offsets[head:], bytes(self._arena[base:]))
+
+    @staticmethod
+    def encode_snapshot(captured):
+        """
+        Serializa o resultado de capture().
+
+        Formato: cabeçalho seguido das colunas timestamps (q), client_ids (i),
+        wall_times (d), offsets (q, relativos ao início da arena) e da arena,
+        todas em little-endian.
+        """
+        base, timestamps, client_ids, wall_times, offsets, arena = captured
+        columns = [timestamps, client_ids, wall_times, array('q', (o - base for o in offsets))]
+        if sys.byteorder != 'little':
+            for col in columns:
+                col.byteswap()
+        parts = [_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, len(timestamps), len(arena))]
+        parts.extend(col.tobytes() for col in columns)
+        parts.append(arena)
+        return b''.join(parts)
+
+    def to_bytes(self):
+        """Gera um snapshot compacto das mensagens retidas (capture + encode_snapshot)."""
+        return self.encode_snapshot(self.capture())
+
+    def load_bytes(self, data):
+        """Substitui o conteúdo do histórico por um snapshot gerado por to_bytes()."""
+        magic, count, arena_len = _SNAPSHOT_HEADER.unpack_from(data, 0)
+        if magic != _SNAPSHOT_MAGIC:
+            raise ValueError("snapshot de histórico inválido")
+        view = memoryview(data)
+        pos = _SNAPSHOT_HEADER.size
+        columns = []
+        for typecode in ('q', 'i', 'd', 'q'):
+            col = array(typecode)
+            size = count * col.itemsize
+            col.frombytes(view[pos:pos + size])
+            pos += size
+            if sys.byteorder != 'little':
+                col.byteswap()
+            columns.append(col)
+        self._timestamps, self._client_ids, self._wall_times, self._offsets = columns
+        self._arena = bytearray(view[pos:pos + arena_len])
+        self._head = 0
+        self._base = 0
+        self._nbytes = arena_len
+
+        self._by_sender = {}
+        for seq, cid in enumerate(self._client_ids):
+            self._by_sender.setdefault(cid, array('q')).append(seq)
+        self.evict()
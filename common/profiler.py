@@ -0,0 +1,290 @@
+"""
+Diagnóstico em tempo de execução de um servidor vivo (sem reiniciar)
+
+- Perfil de CPU em dois modos:
+  - sampling: uma thread lê periodicamente a pilha de TODAS as threads
+    (sys._current_frames) e conta as pilhas; baixo custo, mostra também onde
+    as threads esperam (locks, filas). Saída em formato "collapsed" (uma
+    pilha por linha, compatível com flamegraph.pl e speedscope) + resumo.
+  - deterministic: cProfile. Até o Python 3.11 o cProfile só vale para a
+    thread que o ativa, então cada thread ganha o seu Profile e as chamadas de
+    interesse (handlers de RPC) são executadas por `call`; no fim os perfis são
+    somados. A partir do 3.12 o cProfile usa sys.monitoring e é do processo
+    inteiro (um segundo enable() falha), então há um único Profile, ligado em
+    start_cpu e desligado em stop_cpu, que mede todas as threads.
+- Dump das pilhas de todas as threads (ex.: procurar deadlocks e contenção)
+- Snapshots do tracemalloc; cada snapshot é comparado com o anterior
+
+Todos os arquivos são gravados em `output_dir` com o prefixo do processo.
+"""
+
+import cProfile
+import collections
+import contextlib
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+
+PROFILE_MODES = ('sampling', 'deterministic')
+
+# cProfile sobre sys.monitoring: um único perfil ativo por processo
+PROCESS_WIDE_CPROFILE = sys.version_info >= (3, 12)
+
+
+class _ThreadProfile:
+    """cProfile de uma thread; o lock impede somar o perfil enquanto ele coleta."""
+
+    __slots__ = ('profile', 'lock')
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.lock = threading.Lock()
+
+
+class RuntimeProfiler:
+    # Linhas nos resumos em texto
+    TOP_N = 40
+
+    def __init__(self, output_dir='profiles', name='server', sample_interval=0.005,
+                 trace_frames=10):
+        self.output_dir = output_dir
+        self.name = name
+        self.sample_interval = sample_interval
+        self.trace_frames = trace_frames
+        self._lock = threading.Lock()
+        self._seq = 0
+        # Perfil de CPU ativo: None, 'sampling' ou 'deterministic'
+        self.cpu_mode = None
+        self._cpu_started = 0.0
+        self._thread_profiles = {}  # deterministic: ident da thread -> _ThreadProfile
+        self._process_profile = None  # deterministic no 3.12+: perfil do processo
+        self._local = threading.local()
+        self._samples = None  # sampling: pilha -> contagem
+        self._sampler_stop = None
+        self._sampler_thread = None
+        self._last_heap = None  # último snapshot do tracemalloc
+
+    def _path(self, kind, ext):
+        os.makedirs(self.output_dir, exist_ok=True)
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        return os.path.join(self.output_dir, f"{self.name}-{kind}-{stamp}-{seq}.{ext}")
+
+    # ======================================================
+    # Perfil de CPU
+    # ======================================================
+
+    def start_cpu(self, mode='sampling'):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"modo de perfil desconhecido: {mode}")
+        with self._lock:
+            if self.cpu_mode is not None:
+                raise ValueError(f"perfil de CPU já ativo ({self.cpu_mode})")
+            self._cpu_started = time.monotonic()
+            if mode == 'sampling':
+                self._samples = collections.Counter()
+                self._sampler_stop = threading.Event()
+                self._sampler_thread = threading.Thread(
+                    target=self._sample_loop, args=(self._sampler_stop, self._samples),
+                    name='profiler-sampler', daemon=True)
+                self._sampler_thread.start()
+            elif PROCESS_WIDE_CPROFILE:
+                profile = cProfile.Profile()
+                # ValueError se outra ferramenta (ex.: depurador) já usa o sys.monitoring
+                profile.enable()
+                self._process_profile = profile
+            else:
+                self._thread_profiles = {}
+            self.cpu_mode = mode
+
+    def stop_cpu(self):
+        """Encerra o perfil ativo e grava os arquivos; retorna a lista de caminhos."""
+        with self._lock:
+            mode = self.cpu_mode
+            if mode is None:
+                raise ValueError("nenhum perfil de CPU ativo")
+            self.cpu_mode = None
+            elapsed = time.monotonic() - self._cpu_started
+            thread_profiles = list(self._thread_profiles.values())
+            self._thread_profiles = {}
+            process_profile, self._process_profile = self._process_profile, None
+        if mode == 'sampling':
+            self._sampler_stop.set()
+            self._sampler_thread.join()
+            return self._write_samples(self._samples, elapsed)
+        if process_profile is not None:
+            try:
+                process_profile.disable()
+            except Exception as e:
+                logging.warning(f"[PROFILER] Falha ao desligar o cProfile: {e!r}")
+            return self._write_cprofile([(process_profile, contextlib.nullcontext())], elapsed)
+        return self._write_cprofile([(tp.profile, tp.lock) for tp in thread_profiles], elapsed)
+
+    def call(self, fn, *args):
+        """Executa fn(*args); com o modo deterministic ativo, sob o cProfile da thread.
+
+        Falha do próprio perfil nunca chega ao chamador (RPC): fn roda sem perfil.
+        """
+        if self.cpu_mode != 'deterministic' or PROCESS_WIDE_CPROFILE:
+            return fn(*args)
+        tp = self._thread_profile()
+        with tp.lock:
+            # Pode ter sido desligado enquanto esperava o lock
+            if self.cpu_mode != 'deterministic':
+                return fn(*args)
+            try:
+                tp.profile.enable()
+            except Exception as e:
+                logging.warning(f"[PROFILER] Falha ao ligar o cProfile; executando sem perfil: {e!r}")
+                return fn(*args)
+            try:
+                return fn(*args)
+            finally:
+                try:
+                    tp.profile.disable()
+                except Exception as e:
+                    logging.warning(f"[PROFILER] Falha ao desligar o cProfile: {e!r}")
+
+    def _thread_profile(self):
+        tp = getattr(self._local, 'profile', None)
+        ident = threading.get_ident()
+        with self._lock:
+            # O dicionário é recriado a cada início: perfil da sessão anterior não vale
+            if tp is None or self._thread_profiles.get(ident) is not tp:
+                tp = self._thread_profiles[ident] = self._local.profile = _ThreadProfile()
+        return tp
+
+    def _write_cprofile(self, profiles, elapsed):
+        """Soma os perfis (pares perfil, lock) num único pstats e grava .prof e .txt."""
+        stats = None
+        used = 0
+        for profile, lock in profiles:
+            with lock:
+                # Perfil que nunca coletou nada quebra o pstats (TypeError no add)
+                if not profile.getstats():
+                    continue
+                used += 1
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+        prof_path = self._path('cpu', 'prof')
+        txt_path = self._path('cpu', 'txt')
+        with open(txt_path, 'w') as f:
+            scope = "processo" if PROCESS_WIDE_CPROFILE else f"{used} thread(s)"
+            f.write(f"# cProfile de {scope} em {elapsed:.1f}s\n")
+            if stats is None:
+                f.write("# nenhuma chamada perfilada\n")
+                open(prof_path, 'wb').close()
+                return [prof_path, txt_path]
+            stats.dump_stats(prof_path)
+            stats.stream = f
+            stats.sort_stats('cumulative').print_stats(self.TOP_N)
+            stats.sort_stats('tottime').print_stats(self.TOP_N)
+        return [prof_path, txt_path]
+
+    def _sample_loop(self, stop, samples):
+        own = threading.get_ident()
+        while not stop.wait(self.sample_interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                stack.reverse()
+                samples[tuple(stack)] += 1
+
+    def _write_samples(self, samples, elapsed):
+        collapsed_path = self._path('cpu', 'collapsed')
+        txt_path = self._path('cpu', 'txt')
+        with open(collapsed_path, 'w') as f:
+            for stack, count in samples.most_common():
+                f.write(f"{';'.join(stack)} {count}\n")
+
+        # Resumo por função: amostras no topo da pilha (self) e em qualquer nível (total)
+        own = collections.Counter()
+        total = collections.Counter()
+        for stack, count in samples.items():
+            own[stack[-1]] += count
+            for frame in set(stack[1:]):
+                total[frame] += count
+        n = sum(samples.values())
+        with open(txt_path, 'w') as f:
+            f.write(f"# {n} amostras em {elapsed:.1f}s (intervalo {self.sample_interval * 1000:.1f}ms)\n")
+            f.write("# threads ociosas (fila, Event.wait) também aparecem: são esperas, não CPU\n\n")
+            for title, counter in (("self", own), ("total", total)):
+                f.write(f"{title:>8} {'%':>6}  função (arquivo:linha)\n")
+                for frame, count in counter.most_common(self.TOP_N):
+                    f.write(f"{count:>8} {100.0 * count / max(n, 1):>5.1f}%  {frame}\n")
+                f.write("\n")
+        return [collapsed_path, txt_path]
+
+    # ======================================================
+    # Pilhas das threads
+    # ======================================================
+
+    def dump_stacks(self):
+        path = self._path('stacks', 'txt')
+        frames = sys._current_frames()
+        with open(path, 'w') as f:
+            f.write(f"# {len(frames)} threads em {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+            for t in threading.enumerate():
+                frame = frames.get(t.ident)
+                if frame is None:
+                    continue
+                f.write(f"\n--- {t.name} (ident={t.ident}, daemon={t.daemon}) ---\n")
+                f.write(''.join(traceback.format_stack(frame)))
+        return [path]
+
+    # ======================================================
+    # Memória (tracemalloc)
+    # ======================================================
+
+    def heap_snapshot(self):
+        """Tira um snapshot; o primeiro só liga o rastreamento e serve de base."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+            self._last_heap = None
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        snap_path = self._path('heap', 'snapshot')
+        snapshot.dump(snap_path)
+        txt_path = self._path('heap', 'txt')
+        current, peak = tracemalloc.get_traced_memory()
+        with open(txt_path, 'w') as f:
+            f.write(f"# memória rastreada: atual {current / 1024:.0f} KiB, pico {peak / 1024:.0f} KiB\n\n")
+            if self._last_heap is None:
+                f.write("# primeiro snapshot (base): maiores alocações\n")
+                for stat in snapshot.statistics('lineno')[:self.TOP_N]:
+                    f.write(f"{stat}\n")
+            else:
+                f.write("# diferença para o snapshot anterior\n")
+                for stat in snapshot.compare_to(self._last_heap, 'lineno')[:self.TOP_N]:
+                    f.write(f"{stat}\n")
+        self._last_heap = snapshot
+        return [snap_path, txt_path]
+
+    def heap_stop(self):
+        if not tracemalloc.is_tracing():
+            raise ValueError("tracemalloc não está ativo")
+        tracemalloc.stop()
+        self._last_heap = None
+
+    def status(self):
+        cpu = self.cpu_mode or 'desligado'
+        heap = 'ativo' if tracemalloc.is_tracing() else 'desligado'
+        return f"cpu={cpu} tracemalloc={heap} dir={os.path.abspath(self.output_dir)}"
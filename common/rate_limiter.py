@@ -0,0 +1,124 @@
+"""
+Controle de admissão do líder: limite de taxa por cliente e detecção de sobrecarga
+
+- TokenBucket: balde de fichas clássico. Recarrega `rate` fichas por segundo
+  até `burst`; cada mensagem consome uma ficha.
+- RateLimiter: um TokenBucket por cliente.
+- OverloadDetector: estima a taxa global de ingestão (média móvel
+  exponencial) e acompanha o backlog das filas dos assinantes; acima dos
+  limites configurados o servidor rejeita envios temporariamente.
+
+Em todos os casos a resposta inclui quanto tempo o cliente deve esperar
+antes de tentar novamente (retry-after).
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Balde de fichas (não thread-safe; o RateLimiter protege o acesso)."""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def try_acquire(self, now):
+        """
+        Tenta consumir uma ficha.
+
+        Returns:
+            0.0 se conseguiu, senão o tempo (s) até haver uma ficha disponível
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Limite de taxa por cliente com rajadas (burst). rate <= 0 desativa o limite."""
+
+    # Baldes sem uso há mais que isso (s) são descartados
+    IDLE_EXPIRY = 60.0
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self._clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._last_cleanup = clock()
+
+    def check(self, key):
+        """Retorna 0.0 se a mensagem de `key` pode passar, senão o retry-after (s)."""
+        if self.rate <= 0:
+            return 0.0
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+            wait = bucket.try_acquire(now)
+            if now - self._last_cleanup > self.IDLE_EXPIRY:
+                self._cleanup(now)
+            return wait
+
+    def _cleanup(self, now):
+        self._last_cleanup = now
+        idle = [k for k, b in self._buckets.items() if now - b.updated > self.IDLE_EXPIRY]
+        for k in idle:
+            del self._buckets[k]
+
+
+class OverloadDetector:
+    """
+    Detecta sobrecarga global do líder.
+
+    record_ingest() é chamado a cada mensagem aceita; sample() é chamado
+    periodicamente com o maior backlog entre as filas dos assinantes.
+    Limites <= 0 desativam o respectivo critério.
+    """
+
+    def __init__(self, max_ingest_rate=0.0, max_backlog=0, interval=0.5, alpha=0.5,
+                 clock=time.monotonic):
+        self.max_ingest_rate = max_ingest_rate
+        self.max_backlog = max_backlog
+        self.interval = interval
+        self._alpha = alpha
+        self._clock = clock
+        self._count = 0
+        self._last_sample = clock()
+        self.ingest_rate = 0.0
+        self.backlog = 0
+        self._overloaded = False
+
+    def record_ingest(self):
+        # Incremento de int sob o GIL; uma contagem perdida não afeta a estimativa
+        self._count += 1
+
+    def sample(self, backlog):
+        """Atualiza a taxa de ingestão e o backlog; retorna se está sobrecarregado."""
+        now = self._clock()
+        elapsed = now - self._last_sample
+        if elapsed > 0:
+            count, self._count = self._count, 0
+            rate = count / elapsed
+            self.ingest_rate = self._alpha * rate + (1 - self._alpha) * self.ingest_rate
+            self._last_sample = now
+        self.backlog = backlog
+        self._overloaded = (
+            (self.max_ingest_rate > 0 and self.ingest_rate > self.max_ingest_rate)
+            or (self.max_backlog > 0 and backlog > self.max_backlog)
+        )
+        return self._overloaded
+
+    def retry_after(self):
+        """Retorna 0.0 se pode aceitar, senão o retry-after (s) sugerido."""
+        return self.interval if self._overloaded else 0.0
@@ -0,0 +1,250 @@
+"""
+Índice invertido para busca textual no histórico do chat
+
+Mapeia cada termo (token normalizado) para a lista de timestamps de Lamport
+das mensagens que o contêm (postings), em ordem crescente. A indexação é
+feita por uma thread em background alimentada por uma fila, para que o custo
+de tokenizar e indexar não fique no caminho de resposta do envio.
+
+A remoção acompanha a retenção do histórico: cada envio leva junto o
+timestamp da mensagem mais antiga ainda retida, que vira a marca d'água.
+Postings abaixo dela são ignorados nas buscas e descartados fisicamente
+quando as mensagens removidas passam a ser maioria no índice, de modo que o
+tamanho do índice fica limitado a um múltiplo do histórico retido.
+"""
+
+import math
+import queue
+import re
+import threading
+from array import array
+from bisect import bisect_left
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Quebra o texto em termos normalizados (minúsculas, apenas caracteres de palavra)."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class _Postings:
+    """Timestamps (crescentes) das mensagens que contêm um termo e a frequência em cada uma."""
+
+    __slots__ = ('timestamps', 'freqs')
+
+    def __init__(self):
+        self.timestamps = array('q')
+        self.freqs = array('i')
+
+
+class SearchIndex:
+    """
+    Índice invertido incremental, thread-safe.
+
+    Consultas aceitam termos exatos e prefixos (termo terminado em '*');
+    todos os termos da consulta devem aparecer na mensagem.
+    """
+
+    # Descarta fisicamente postings removidos quando as mensagens abaixo da marca
+    # d'água superam as vivas (e pelo menos este número, para não podar a cada envio)
+    PRUNE_MIN = 1000
+
+    def __init__(self):
+        self._postings = {}
+        # Termos ordenados, para buscas por prefixo. Termos novos esperam em
+        # _new_terms e só entram na lista ordenada na próxima busca por prefixo
+        # (None: reconstruir tudo, após a poda), em vez de um insort O(V) por termo
+        self._vocabulary = []
+        self._new_terms = []
+        self._watermark = 0  # timestamps menores que este foram removidos
+        self._timestamps = array('q')  # mensagens presentes fisicamente no índice
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._running = True
+        self._thread = threading.Thread(target=self._indexer_loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, lamport_timestamp, content, oldest=0):
+        """
+        Enfileira uma mensagem para indexação (não bloqueia o chamador).
+
+        oldest: timestamp da mensagem mais antiga retida no histórico; as
+                menores são removidas do índice (ver evict_before).
+        """
+        self._queue.put(([(lamport_timestamp, content)], oldest))
+
+    def submit_many(self, entries, oldest=0):
+        """Enfileira várias mensagens (lamport_timestamp, content) de uma só vez."""
+        entries = list(entries)
+        if entries:
+            self._queue.put((entries, oldest))
+
+    def pending(self):
+        """Quantidade de lotes aguardando indexação."""
+        return self._queue.qsize()
+
+    def flush(self):
+        """Bloqueia até que tudo o que já foi enfileirado esteja indexado."""
+        self._queue.join()
+
+    def stop(self):
+        self._running = False
+        self._queue.put(None)
+
+    def _indexer_loop(self):
+        while self._running:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()  # flush() depois do stop() não pode travar
+                break
+            # Processa em lote o que já estiver na fila
+            batch, oldest = list(item[0]), item[1]
+            taken = 1
+            while len(batch) < 1024:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is None:
+                    self._running = False
+                    break
+                batch.extend(item[0])
+                oldest = max(oldest, item[1])
+            with self._lock:
+                for ts, content in batch:
+                    self._add(ts, content)
+                if oldest > self._watermark:
+                    self._watermark = oldest
+                self._maybe_prune()
+            for _ in range(taken):
+                self._queue.task_done()
+
+    def _add(self, ts, content):
+        counts = {}
+        for term in tokenize(content):
+            counts[term] = counts.get(term, 0) + 1
+        for term, freq in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = _Postings()
+                self._new_terms.append(term)
+            postings.timestamps.append(ts)
+            postings.freqs.append(freq)
+        self._timestamps.append(ts)
+
+    def evict_before(self, lamport_timestamp):
+        """Remove logicamente as mensagens com timestamp menor que o informado."""
+        with self._lock:
+            if lamport_timestamp > self._watermark:
+                self._watermark = lamport_timestamp
+            self._maybe_prune()
+
+    def size(self):
+        """(mensagens, postings, termos) presentes fisicamente no índice."""
+        with self._lock:
+            postings = sum(len(p.timestamps) for p in self._postings.values())
+            return len(self._timestamps), postings, len(self._postings)
+
+    def _live(self):
+        # Mensagens indexadas com timestamp >= marca d'água (chamar com self._lock)
+        return len(self._timestamps) - bisect_left(self._timestamps, self._watermark)
+
+    def _maybe_prune(self):
+        dead = len(self._timestamps) - self._live()
+        if dead >= max(self.PRUNE_MIN, len(self._timestamps) - dead):
+            self._prune()
+
+    def _prune(self):
+        del self._timestamps[:bisect_left(self._timestamps, self._watermark)]
+        removed = []
+        for term, postings in self._postings.items():
+            cut = bisect_left(postings.timestamps, self._watermark)
+            if cut == len(postings.timestamps):
+                removed.append(term)
+            elif cut:
+                del postings.timestamps[:cut]
+                del postings.freqs[:cut]
+        for term in removed:
+            del self._postings[term]
+        if removed:
+            self._vocabulary = None
+
+    def _sorted_vocabulary(self):
+        # Deve ser chamado com self._lock
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+            self._new_terms = []
+        elif self._new_terms:
+            # Timsort aproveita as duas sequências já ordenadas: O(V + k log k)
+            self._new_terms.sort()
+            self._vocabulary = sorted(self._vocabulary + self._new_terms)
+            self._new_terms = []
+        return self._vocabulary
+
+    def _matches(self, term):
+        # Retorna {timestamp: frequência} das mensagens que casam com o termo
+        if term.endswith('*'):
+            prefix = term[:-1]
+            vocabulary = self._sorted_vocabulary()
+            i = bisect_left(vocabulary, prefix)
+            terms = []
+            while i < len(vocabulary) and vocabulary[i].startswith(prefix):
+                terms.append(vocabulary[i])
+                i += 1
+        else:
+            terms = [term]
+
+        result = {}
+        for t in terms:
+            postings = self._postings.get(t)
+            if postings is None:
+                continue
+            start = bisect_left(postings.timestamps, self._watermark)
+            for j in range(start, len(postings.timestamps)):
+                ts = postings.timestamps[j]
+                result[ts] = result.get(ts, 0) + postings.freqs[j]
+        return result
+
+    def search(self, query, limit=50, order_by_time=False):
+        """
+        Busca mensagens que contêm todos os termos da consulta.
+
+        Args:
+            query: termos separados por espaço; 'term*' busca por prefixo
+            limit: número máximo de resultados
+            order_by_time: se True, ordena das mais recentes para as mais antigas;
+                           senão, ordena por relevância (TF-IDF)
+
+        Returns:
+            Lista de timestamps de Lamport das mensagens encontradas
+        """
+        terms = []
+        for word in query.split():
+            tokens = tokenize(word)
+            if tokens and word.endswith('*'):
+                tokens[-1] += '*'
+            terms.extend(tokens)
+        if not terms:
+            return []
+
+        with self._lock:
+            total = max(self._live(), 1)
+            matched = [self._matches(t) for t in terms]
+        matched.sort(key=len)
+
+        scores = {}
+        for ts, freq in matched[0].items():
+            scores[ts] = freq * math.log(1 + total / len(matched[0]))
+        for m in matched[1:]:
+            idf = math.log(1 + total / len(m)) if m else 0.0
+            scores = {ts: s + m[ts] * idf for ts, s in scores.items() if ts in m}
+            if not scores:
+                break
+
+        if order_by_time:
+            ranked = sorted(scores, reverse=True)
+        else:
+            ranked = sorted(scores, key=lambda ts: (-scores[ts], -ts))
+        return ranked[:limit]
@@ -0,0 +1,108 @@
+"""
+Captura anonimizada do tráfego de envios em formato binário compacto
+
+Cada envio recebido pelo servidor vira um registro de 16 bytes, sem o
+conteúdo da mensagem:
+
+    delta_us (uint32)  microssegundos desde o envio anterior
+    sender   (uint32)  remetente anonimizado (ordem de primeira aparição: 1, 2, ...)
+    size     (uint32)  tamanho do conteúdo em bytes (UTF-8)
+    room     (uint32)  sala (hash do metadado "room"; 0 = sala única)
+
+O arquivo começa com um cabeçalho (MAGIC, versão). Os timestamps são
+relativos ao início da captura, então o trace só preserva o padrão de
+chegadas (intervalos, rajadas), não o horário real.
+"""
+
+import struct
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+MAGIC = b'CHTR'
+VERSION = 1
+_HEADER = struct.Struct('<4sB')
+_RECORD = struct.Struct('<IIII')
+_MAX_DELTA_US = 0xFFFFFFFF
+
+# t: segundos desde o início do trace
+TraceRecord = namedtuple('TraceRecord', ['t', 'sender', 'size', 'room'])
+
+
+def room_id(room: str) -> int:
+    """Sala anonimizada: hash estável de 32 bits (0 fica para a sala única)."""
+    return (zlib.crc32(room.encode('utf-8')) or 1) if room else 0
+
+
+class TraceWriter:
+    # Uma thread em background descarrega o buffer a cada FLUSH_INTERVAL segundos,
+    # mesmo com o tráfego parado: um kill -9 perde no máximo esse intervalo
+    FLUSH_INTERVAL = 1.0
+
+    def __init__(self, path, clock=time.monotonic):
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._file = open(path, 'wb')
+        self._file.write(_HEADER.pack(MAGIC, VERSION))
+        self._senders = {}
+        self._last = None
+        self._dirty = True  # cabeçalho ainda no buffer
+        self.records = 0
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name='trace-flush', daemon=True)
+        self._flusher.start()
+
+    def record(self, client_id: int, size: int, room: str = ''):
+        with self._lock:
+            if self._file is None:
+                return
+            now = self._clock()
+            delta = 0 if self._last is None else int((now - self._last) * 1e6)
+            self._last = now
+            sender = self._senders.get(client_id)
+            if sender is None:
+                sender = self._senders[client_id] = len(self._senders) + 1
+            self._file.write(_RECORD.pack(min(delta, _MAX_DELTA_US), sender, size, room_id(room)))
+            self.records += 1
+            self._dirty = True
+
+    def flush(self):
+        """Grava em disco os registros ainda no buffer."""
+        with self._lock:
+            if self._file is not None and self._dirty:
+                self._file.flush()
+                self._dirty = False
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.FLUSH_INTERVAL):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_trace(path):
+    """Itera os registros de um trace (TraceRecord, em ordem de chegada)."""
+    with open(path, 'rb') as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"{path}: trace vazio ou sem cabeçalho")
+        magic, version = _HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: não é um trace de tráfego (versão {VERSION})")
+        t_us = 0
+        while True:
+            chunk = f.read(_RECORD.size * 4096)
+            # Registro incompleto no fim (servidor morto no meio da escrita) é descartado
+            usable = len(chunk) - len(chunk) % _RECORD.size
+            if not usable:
+                return
+            for delta, sender, size, room in _RECORD.iter_unpack(chunk[:usable]):
+                t_us += delta
+                yield TraceRecord(t_us / 1e6, sender, size, room)
@@ -0,0 +1,661 @@
+"""
+Estratégias de eleição de líder do cluster
+
+O ChatService conversa apenas com a interface ElectionStrategy; o algoritmo
+concreto é escolhido na inicialização (--election):
+- bully: algoritmo Bully original (o maior ID vivo vence). Pior caso O(n²)
+  mensagens, pois cada servidor que responde OK inicia a própria eleição.
+- raft:  eleição por termos no estilo Raft. Um seguidor que detecta a falha
+  do líder espera um timeout aleatório, incrementa o termo e pede votos; quem
+  obtém a maioria vira líder do termo. O(n) mensagens por rodada.
+- ring:  eleição em anel (Chang-Roberts). A mensagem ELECTION percorre o
+  anel acumulando os IDs vivos; ao voltar ao iniciador, o maior ID vence e o
+  COORDINATOR é anunciado. ~2n mensagens, sem disparar eleições paralelas.
+
+Todas as estratégias contabilizam as mensagens enviadas (por tipo), as
+threads criadas e o tempo de convergência (início da eleição até conhecer o
+novo líder), para comparar o custo de cada uma em clusters maiores. Também
+guardam uma linha do tempo recente (detecção da falha, primeiro ELECTION,
+COORDINATOR, novo líder), usada para medir o failover de ponta a ponta.
+
+O transporte (envio das mensagens) e o runtime (relógio, sleep, threads e
+números aleatórios) são injetáveis: o servidor usa gRPC e o tempo real; o
+simulador de experiments/election_simulator.py usa uma rede em memória e
+tempo virtual.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+import grpc
+
+from proto import chat_server_pb2 as pb
+from proto import chat_server_pb2_grpc as pb_grpc
+
+
+class ElectionStats:
+    """Contadores thread-safe de custo de uma estratégia de eleição."""
+
+    # Quantos eventos recentes são guardados na linha do tempo
+    MAX_EVENTS = 256
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.messages_by_type = {}
+        # Heartbeats de detecção (find_live_leader, is_alive) não são mensagens de eleição
+        self.heartbeats_sent = 0
+        self.threads_spawned = 0
+        self.elections_started = 0
+        self.convergence_times = []
+        self.events = deque(maxlen=self.MAX_EVENTS)  # (instante do runtime, tipo, líder)
+
+    @property
+    def messages_sent(self):
+        return sum(self.messages_by_type.values())
+
+    def count_message(self, kind):
+        with self._lock:
+            self.messages_by_type[kind] = self.messages_by_type.get(kind, 0) + 1
+
+    def count_heartbeat(self):
+        with self._lock:
+            self.heartbeats_sent += 1
+
+    def count_thread(self):
+        with self._lock:
+            self.threads_spawned += 1
+
+    def count_election(self):
+        with self._lock:
+            self.elections_started += 1
+
+    def record_convergence(self, seconds):
+        with self._lock:
+            self.convergence_times.append(seconds)
+
+    def record_event(self, kind, at, leader_id=0):
+        with self._lock:
+            self.events.append((at, kind, leader_id))
+
+    def recent_events(self):
+        with self._lock:
+            return list(self.events)
+
+    def as_dict(self):
+        with self._lock:
+            times = list(self.convergence_times)
+            return {
+                'messages_sent': sum(self.messages_by_type.values()),
+                'messages_by_type': dict(self.messages_by_type),
+                'heartbeats_sent': self.heartbeats_sent,
+                'threads_spawned': self.threads_spawned,
+                'elections_started': self.elections_started,
+                'last_convergence_s': times[-1] if times else 0.0,
+                'mean_convergence_s': sum(times) / len(times) if times else 0.0,
+            }
+
+
+class SystemRuntime:
+    """Relógio, espera, threads e aleatoriedade reais (padrão fora do simulador)."""
+
+    now = staticmethod(time.monotonic)
+    sleep = staticmethod(time.sleep)
+    uniform = staticmethod(random.uniform)
+
+    def spawn(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        return thread
+
+
+# Opções dos canais curtos (um por chamada) entre servidores: sem o pool local, o
+# canal novo reaproveita a subconexão global do processo e, se outro canal (ex.: a
+# replicação) insistiu num peer morto, herda o backoff de reconexão dele e falha com
+# o erro antigo por alguns segundos mesmo depois de o peer voltar
+PEER_CHANNEL_OPTIONS = [('grpc.use_local_subchannel_pool', 1)]
+
+
+class GrpcTransport:
+    """Envia as mensagens de eleição por gRPC (um canal por chamada)."""
+
+    def call(self, peer_addr: str, method: str, request, timeout: float):
+        with grpc.insecure_channel(peer_addr, options=PEER_CHANNEL_OPTIONS) as channel:
+            return getattr(pb_grpc.ElectionModuleStub(channel), method)(request, timeout=timeout)
+
+
+# Interface comum das estratégias
+# O ChatService usa: get_leader, am_i_leader, set_leader, join_cluster,
+# on_leader_failure, handle_election, handle_coordinator, request_leadership,
+# is_alive, peers, term e stats
+class ElectionStrategy:
+    name = None
+
+    def __init__(self, server_id: int, peers: list, lamport_clock, on_leader_change=None,
+                 sticky: bool = False, transport=None, runtime=None):
+        self.server_id = server_id
+        self.peers = peers  # Lista de (id, address) dos outros servidores
+        self.lamport_clock = lamport_clock
+        self.leader_id = None
+        self.is_leader = False
+        self.term = 0  # só usado pela estratégia raft
+        self._lock = threading.Lock()
+        self._election_in_progress = False
+        self._on_leader_change = on_leader_change
+        self.sticky = sticky
+        self.transport = transport or GrpcTransport()
+        self.runtime = runtime or SystemRuntime()
+        self.stats = ElectionStats()
+        self._election_started_at = None
+
+        # Timeouts
+        self.election_timeout = 3.0  # segundos para esperar resposta OK
+        self.coordinator_timeout = 5.0  # segundos para esperar COORDINATOR
+
+    def get_leader(self):
+        with self._lock:
+            return self.leader_id
+
+    def am_i_leader(self):
+        with self._lock:
+            return self.is_leader
+
+    def set_leader(self, leader_id: int):
+        with self._lock:
+            old_leader = self.leader_id
+            self.leader_id = leader_id
+            self.is_leader = (leader_id == self.server_id)
+            if self._election_started_at is not None:
+                self.stats.record_convergence(self.runtime.now() - self._election_started_at)
+                self._election_started_at = None
+            if old_leader != leader_id:
+                self._event('leader', leader_id)
+                logging.info(f"[ELEIÇÃO] Novo líder: Servidor {leader_id}")
+                if self._on_leader_change:
+                    self._on_leader_change(leader_id)
+
+    # Marca o início de uma eleição para medir o tempo de convergência
+    # Deve ser chamado com self._lock
+    def _mark_election_start(self):
+        self.stats.count_election()
+        if self._election_started_at is None:
+            self._election_started_at = self.runtime.now()
+
+    # Registra um evento na linha do tempo (detect, election, coordinator ou leader)
+    def _event(self, kind: str, leader_id: int = 0):
+        self.stats.record_event(kind, self.runtime.now(), leader_id)
+
+    # Envia uma mensagem de eleição a um peer, contabilizando-a (heartbeats à parte)
+    # Propaga grpc.RpcError se o peer não responder
+    def _send(self, peer_addr: str, method: str, request, timeout: float = 2.0):
+        if method == 'Heartbeat':
+            self.stats.count_heartbeat()
+        else:
+            self.stats.count_message(method.lower())
+        if method == 'Election':
+            self._event('election')
+        elif method == 'Coordinator':
+            self._event('coordinator', request.leader_id)
+        return self.transport.call(peer_addr, method, request, timeout)
+
+    # Cria uma thread daemon, contabilizando-a
+    def _spawn(self, target, *args):
+        self.stats.count_thread()
+        return self.runtime.spawn(target, *args)
+
+    def _address_of(self, peer_id: int):
+        for pid, addr in self.peers:
+            if pid == peer_id:
+                return addr
+        return None
+
+    # Anuncia o líder (COORDINATOR) para todos os peers
+    def _announce(self, leader_id: int, term: int = 0):
+        ts = self.lamport_clock.incrementaRelogio()
+        for peer_id, peer_addr in self.peers:
+            try:
+                self._send(peer_addr, 'Coordinator',
+                           pb.CoordinatorRequest(leader_id=leader_id, lamport_timestamp=ts, term=term))
+                logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Enviou COORDINATOR para {peer_id}")
+            except grpc.RpcError:
+                logging.debug(f"[ELEIÇÃO] Falha ao enviar COORDINATOR para {peer_id}")
+
+    # Entrada no cluster: no modo sticky, adota o líder vivo em vez de disputar a liderança
+    def join_cluster(self):
+        if self.sticky:
+            leader_id = self.find_live_leader()
+            if leader_id is not None:
+                logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Líder {leader_id} ativo, entrando como seguidor (sticky)")
+                self.set_leader(leader_id)
+                return
+        self.start_election()
+
+    # Procura um peer que responda ao heartbeat declarando-se líder
+    def find_live_leader(self):
+        for peer_id, peer_addr in self.peers:
+            try:
+                response = self._send(peer_addr, 'Heartbeat',
+                                      pb.HeartbeatRequest(server_id=self.server_id, lamport_timestamp=0),
+                                      timeout=self.election_timeout)
+                if response.alive and response.leader_id == peer_id:
+                    return peer_id
+            except grpc.RpcError:
+                continue
+        return None
+
+    # Verifica se um peer responde ao heartbeat
+    def is_alive(self, peer_id: int) -> bool:
+        addr = self._address_of(peer_id)
+        if addr is None:
+            return False
+        try:
+            self._send(addr, 'Heartbeat', pb.HeartbeatRequest(server_id=self.server_id, lamport_timestamp=0),
+                       timeout=self.election_timeout)
+            return True
+        except grpc.RpcError:
+            return False
+
+    # Chamado pelo heartbeat quando o líder atual não responde
+    def on_leader_failure(self, leader_id: int):
+        self._event('detect', leader_id)
+        self._spawn(self.start_election)
+
+    def start_election(self):
+        raise NotImplementedError
+
+    # Pedido explícito de liderança (handoff de prioridade)
+    def request_leadership(self):
+        raise NotImplementedError
+
+    # Responde a uma mensagem ELECTION; retorna (ok, responder_id)
+    def handle_election(self, request) -> tuple:
+        raise NotImplementedError
+
+    # Recebe anúncio de novo líder
+    def handle_coordinator(self, request):
+        self.lamport_clock.updateRelogio(request.lamport_timestamp)
+        logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Recebeu COORDINATOR - Novo líder é {request.leader_id}")
+        self.set_leader(request.leader_id)
+
+
+# Algoritmo de Eleição Bullying entre os servidores
+# Funcionamento:
+# 1. Quando um processo detecta que o líder falhou, inicia uma eleição
+# 2. Envia ELECTION para todos os processos com ID maior
+# 3. Se receber OK de algum, espera pelo COORDINATOR
+# 4. Se não receber OK, declara-se líder e envia COORDINATOR para todos
+# 5. O processo com maior ID sempre vence
+# 6. O id é passado como argumento na inicialização do servidor
+# 7. Cada servidor conhece os peers (id, address) dos outros servidores
+# 8. Usa heartbeat para detectar falha do líder (a cada 2 segundos envia um ping)
+#
+# Modo "sticky" (opcional): um servidor que (re)entra no cluster com um líder vivo
+# torna-se seguidor, mesmo tendo ID maior; só há eleição quando o líder falha.
+# A troca para o servidor de maior prioridade acontece apenas por pedido explícito
+# (RPC TransferLeadership), evitando reconexão em massa dos clientes a cada restart.
+class BullyElection(ElectionStrategy):
+    name = 'bully'
+
+    # Inicia o processo de eleição
+    def start_election(self):
+        # Evita múltiplas eleições simultâneas
+        with self._lock:
+            if self._election_in_progress:
+                logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Eleição já em progresso")
+                return
+            self._election_in_progress = True
+            self._mark_election_start()
+
+        logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Iniciando eleição...")
+        ts = self.lamport_clock.incrementaRelogio()
+
+        # Encontra servidores com ID maior
+        higher_peers = [(pid, addr) for pid, addr in self.peers if pid > self.server_id]
+
+        if not higher_peers:
+            # Eu tenho o maior ID, então me declaro líder
+            logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Nenhum peer com ID maior. Declarando-me líder!")
+            self._declare_me_leader()
+            return
+
+        # Envia ELECTION para todos com ID maior, caso não seja o ID maior
+        received_ok = False
+        for peer_id, peer_addr in higher_peers:
+            try:
+                request = pb.ElectionRequest(
+                    candidate_id=self.server_id,
+                    lamport_timestamp=ts
+                )
+                response = self._send(peer_addr, 'Election', request, timeout=self.election_timeout)
+                if response.ok:
+                    logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Recebeu OK de {response.responder_id}")
+                    self.lamport_clock.updateRelogio(response.lamport_timestamp)
+                    received_ok = True
+            except grpc.RpcError as e:
+                logging.debug(f"[ELEIÇÃO] Servidor {peer_id} não respondeu: {e.code()}")
+
+        if received_ok:
+            # Espera pelo COORDINATOR
+            logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Aguardando COORDINATOR...")
+            self.runtime.sleep(self.coordinator_timeout)
+            # Se não recebeu coordinator, inicia nova eleição
+            with self._lock:
+                if self.leader_id is None:
+                    self._election_in_progress = False
+                    self._spawn(self.start_election)
+        else:
+            # Nenhum respondeu, eu sou o líder (precaução caso falhe durante a eleição)
+            logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Nenhuma resposta OK. Declarando-me líder!")
+            self._declare_me_leader()
+
+        with self._lock:
+            self._election_in_progress = False
+
+    # Declara-se líder e envia COORDINATOR para todos
+    def _declare_me_leader(self):
+        self.set_leader(self.server_id)
+        self._announce(self.server_id)
+
+        with self._lock:
+            self._election_in_progress = False
+
+    # Modo sticky: se o líder atual está vivo, só informa o candidato; senão, disputa a eleição
+    def _sticky_election(self, candidate_id: int):
+        leader_id = self.get_leader()
+        if leader_id is not None and leader_id != self.server_id and self.is_alive(leader_id):
+            logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Líder {leader_id} ainda ativo, informando {candidate_id}")
+            addr = self._address_of(candidate_id)
+            if addr is not None:
+                try:
+                    self._send(addr, 'Coordinator',
+                               pb.CoordinatorRequest(leader_id=leader_id,
+                                                     lamport_timestamp=self.lamport_clock.incrementaRelogio()))
+                except grpc.RpcError:
+                    logging.debug(f"[ELEIÇÃO] Falha ao informar líder para {candidate_id}")
+            return
+        self.start_election()
+
+    # Pedido explícito de liderança (handoff de prioridade): declara-se líder
+    def request_leadership(self):
+        logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Assumindo liderança por pedido explícito")
+        with self._lock:
+            self._election_in_progress = True
+        self._declare_me_leader()
+
+    # Responde a uma mensagem ELECTION
+    def handle_election(self, request) -> tuple:
+        self.lamport_clock.updateRelogio(request.lamport_timestamp)
+        candidate_id = request.candidate_id
+
+        if self.server_id > candidate_id:
+            # Respondo OK e inicio minha própria eleição, pois tenho ID maior
+            logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Recebeu ELECTION de {candidate_id}, respondendo OK")
+            if self.sticky:
+                self._spawn(self._sticky_election, candidate_id)
+            else:
+                self._spawn(self.start_election)
+            return True, self.server_id
+        return False, self.server_id
+
+
+# Eleição por termos no estilo Raft (apenas a eleição de líder, sem log replicado)
+# Funcionamento:
+# 1. Ao detectar a falha do líder, o seguidor espera um timeout aleatório
+#    (até election_timeout); se outro já venceu nesse meio tempo, desiste
+# 2. Incrementa o termo, vota em si mesmo e pede votos (ELECTION) a todos em paralelo
+# 3. Cada servidor concede no máximo um voto por termo; termos antigos são recusados
+# 4. Com a maioria dos votos, vira líder do termo e anuncia COORDINATOR
+# 5. Sem maioria (votos divididos), tenta de novo após outro timeout aleatório
+# Ao entrar no cluster o servidor primeiro procura um líder vivo: com um líder
+# ativo ele é seguidor, como no Raft, em vez de disputar um novo termo.
+class RaftElection(ElectionStrategy):
+    name = 'raft'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._voted_for = None  # voto concedido no termo atual
+
+    # Maioria da pertinência conhecida (peers não encolhe com falhas)
+    def _majority(self):
+        return (len(self.peers) + 1) // 2 + 1
+
+    def join_cluster(self):
+        leader_id = self.find_live_leader()
+        if leader_id is not None:
+            logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Líder {leader_id} ativo, entrando como seguidor")
+            self.set_leader(leader_id)
+            return
+        self.start_election()
+
+    # Timeout aleatório: evita que todos os seguidores disputem o mesmo termo
+    def on_leader_failure(self, leader_id: int):
+        self._event('detect', leader_id)
+        self._spawn(self._delayed_election, leader_id)
+
+    def _delayed_election(self, failed_leader: int):
+        self.runtime.sleep(self.runtime.uniform(0, self.election_timeout))
+        with self._lock:
+            if self.leader_id != failed_leader:
+                return  # outro servidor já venceu um termo mais novo
+        self.start_election()
+
+    def _step_down(self, term: int):
+        # Deve ser chamado com self._lock
+        if term > self.term:
+            self.term = term
+            self._voted_for = None
+
+    def start_election(self):
+        with self._lock:
+            if self._election_in_progress:
+                logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Eleição já em progresso")
+                return
+            self._election_in_progress = True
+            self._mark_election_start()
+            self.term += 1
+            self._voted_for = self.server_id
+            term = self.term
+            leader_before = self.leader_id
+
+        logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Candidato no termo {term}")
+        ts = self.lamport_clock.incrementaRelogio()
+        votes = [self.server_id]
+        request = pb.ElectionRequest(candidate_id=self.server_id, lamport_timestamp=ts, term=term)
+
+        def request_vote(peer_id, peer_addr):
+            try:
+                response = self._send(peer_addr, 'Election', request, timeout=self.election_timeout)
+            except grpc.RpcError as e:
+                logging.debug(f"[ELEIÇÃO] Servidor {peer_id} não respondeu: {e.code()}")
+                return
+            self.lamport_clock.updateRelogio(response.lamport_timestamp)
+            with self._lock:
+                self._step_down(response.term)
+            if response.ok:
+                votes.append(peer_id)
+
+        threads = [self._spawn(request_vote, pid, addr) for pid, addr in self.peers]
+        for t in threads:
+            t.join(self.election_timeout + 1.0)
+
+        with self._lock:
+            won = self.term == term and len(votes) >= self._majority()
+            if not won:
+                self._election_in_progress = False
+        if won:
+            logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Eleito no termo {term} com {len(votes)} votos")
+            self._become_leader(term)
+            return
+
+        # Votos divididos ou termo superado: tenta de novo se ninguém venceu
+        logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Sem maioria no termo {term} ({len(votes)} votos)")
+        self.runtime.sleep(self.runtime.uniform(0.5, 1.0) * self.election_timeout)
+        with self._lock:
+            retry = self.term == term and self.leader_id == leader_before
+        if retry:
+            self.start_election()
+
+    def _become_leader(self, term: int):
+        self.set_leader(self.server_id)
+        self._announce(self.server_id, term)
+        with self._lock:
+            self._election_in_progress = False
+
+    # Pedido explícito de liderança: assume um termo novo e se anuncia
+    def request_leadership(self):
+        logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Assumindo liderança por pedido explícito")
+        with self._lock:
+            self.term += 1
+            self._voted_for = self.server_id
+            term = self.term
+        self._become_leader(term)
+
+    # Concede o voto se o termo não é antigo e ainda não votou em outro neste termo
+    def handle_election(self, request) -> tuple:
+        self.lamport_clock.updateRelogio(request.lamport_timestamp)
+        with self._lock:
+            if request.term < self.term:
+                return False, self.server_id
+            self._step_down(request.term)
+            granted = self._voted_for in (None, request.candidate_id)
+            if granted:
+                self._voted_for = request.candidate_id
+        logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Voto para {request.candidate_id} "
+                     f"no termo {request.term}: {'sim' if granted else 'não'}")
+        return granted, self.server_id
+
+    # Ignora anúncios de termos antigos (líder deposto que ainda não soube)
+    def handle_coordinator(self, request):
+        with self._lock:
+            if request.term < self.term:
+                return
+            self._step_down(request.term)
+        super().handle_coordinator(request)
+
+
+# Eleição em anel (Chang-Roberts com lista de participantes)
+# Funcionamento:
+# 1. Os servidores formam um anel lógico em ordem crescente de ID
+# 2. O iniciador envia ELECTION com participants=[seu ID] ao sucessor vivo
+#    (sucessores que não respondem são pulados)
+# 3. Cada servidor acrescenta seu ID e repassa ao próprio sucessor
+# 4. Quando a mensagem volta ao iniciador, o maior ID da lista vence e o
+#    iniciador anuncia COORDINATOR a todos
+# Quando vários servidores detectam a falha ao mesmo tempo, cada um descarta as
+# mensagens de iniciadores menores que o maior que já viu (Chang-Roberts), então
+# só a eleição do maior iniciador dá a volta completa: ~2n mensagens por eleição.
+class RingElection(ElectionStrategy):
+    name = 'ring'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._best_initiator = None  # (maior iniciador visto, instante) na eleição corrente
+
+    # Registra o iniciador; retorna False se uma eleição recente de iniciador maior já passou aqui
+    # Deve ser chamado com self._lock
+    def _track_initiator(self, initiator: int) -> bool:
+        now = self.runtime.now()
+        best = self._best_initiator
+        if best is not None and now - best[1] < self.coordinator_timeout and best[0] > initiator:
+            return False
+        self._best_initiator = (initiator, now)
+        return True
+
+    def _successors(self):
+        ring = sorted([self.server_id] + [pid for pid, _ in self.peers])
+        i = ring.index(self.server_id)
+        return ring[i + 1:] + ring[:i]
+
+    # Repassa a mensagem ao próximo servidor vivo; retorna False se ninguém respondeu
+    def _forward(self, initiator: int, participants: list) -> bool:
+        ts = self.lamport_clock.incrementaRelogio()
+        request = pb.ElectionRequest(candidate_id=initiator, lamport_timestamp=ts, participants=participants)
+        for peer_id in self._successors():
+            try:
+                self._send(self._address_of(peer_id), 'Election', request, timeout=self.election_timeout)
+                return True
+            except grpc.RpcError as e:
+                logging.debug(f"[ELEIÇÃO] Servidor {peer_id} não respondeu no anel: {e.code()}")
+        return False
+
+    def start_election(self):
+        with self._lock:
+            if self._election_in_progress:
+                logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Eleição já em progresso")
+                return
+            self._election_in_progress = True
+            self._mark_election_start()
+            self._track_initiator(self.server_id)
+            leader_before = self.leader_id
+
+        logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Iniciando eleição no anel...")
+        if not self._forward(self.server_id, [self.server_id]):
+            logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Nenhum sucessor vivo. Declarando-me líder!")
+            self._finish(self.server_id)
+            return
+
+        # Se a mensagem se perder (iniciador ou sucessor caiu no meio), tenta de novo
+        self.runtime.sleep(self.coordinator_timeout)
+        with self._lock:
+            retry = self._election_in_progress and self.leader_id == leader_before
+            self._election_in_progress = False
+        if retry:
+            self.start_election()
+
+    # A mensagem deu a volta: anuncia o vencedor
+    def _finish(self, winner: int):
+        logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Anel completo, líder é {winner}")
+        self.set_leader(winner)
+        self._announce(winner)
+        with self._lock:
+            self._election_in_progress = False
+            self._best_initiator = None
+
+    def request_leadership(self):
+        logging.info(f"[ELEIÇÃO] Servidor {self.server_id}: Assumindo liderança por pedido explícito")
+        self._finish(self.server_id)
+
+    # Acrescenta o próprio ID e repassa; o repasse roda em outra thread para não
+    # manter a cadeia de RPCs aberta ao longo de todo o anel
+    def handle_election(self, request) -> tuple:
+        self.lamport_clock.updateRelogio(request.lamport_timestamp)
+        participants = list(request.participants)
+        if self.server_id in participants:
+            if request.candidate_id == self.server_id:
+                self._spawn(self._finish, max(participants))
+            return True, self.server_id
+        with self._lock:
+            if not self._track_initiator(request.candidate_id):
+                return True, self.server_id  # eleição redundante: descarta
+            if self._election_started_at is None:
+                self._election_started_at = self.runtime.now()
+        self._spawn(self._relay, request.candidate_id, participants + [self.server_id])
+        return True, self.server_id
+
+    def handle_coordinator(self, request):
+        with self._lock:
+            self._best_initiator = None
+        super().handle_coordinator(request)
+
+    def _relay(self, initiator: int, participants: list):
+        if not self._forward(initiator, participants):
+            # Todos os outros caíram: só resta este servidor
+            self.start_election()
+
+
+ELECTION_STRATEGIES = {
+    BullyElection.name: BullyElection,
+    RaftElection.name: RaftElection,
+    RingElection.name: RingElection,
+}
+
+
+def make_election(strategy: str, **kwargs) -> ElectionStrategy:
+    """Instancia a estratégia de eleição pelo nome (bully, raft ou ring)."""
+    try:
+        cls = ELECTION_STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f"estratégia de eleição desconhecida: {strategy}")
+    return cls(**kwargs)
@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Simulador determinístico de eleição do Chat gRPC Distribuído.
+
+performance_analysis.py sobe um cluster real de 3 servidores com
+subprocessos e espera em tempo real; aqui dezenas de instâncias das
+estratégias de eleição (election.py) rodam no mesmo processo, com:
+- transporte em memória (SimNetwork) no lugar do gRPC, com latência,
+  falhas de servidor e partições de rede;
+- tempo virtual (VirtualRuntime): sleep, timeouts e threads são
+  cooperativos e avançam um relógio simulado, então um minuto de cluster
+  roda em frações de segundo e o resultado depende apenas da semente.
+
+Cada servidor simulado reproduz o ChatService no que importa para a
+eleição: o heartbeat periódico ao líder (_heartbeat_loop), a entrada no
+cluster (join_cluster) e o tratamento dos RPCs Heartbeat, Election e
+Coordinator.
+
+Para cada janela de falha o simulador mede:
+- convergência: tempo até todos os servidores vivos concordarem num líder vivo
+- mensagens enviadas (por tipo) e threads criadas
+- tempestade de eleições: eleições iniciadas e quantos servidores as iniciaram
+
+Uso:
+    python election_simulator.py [--strategy bully] [--sizes 5 10 20 50]
+                                 [--pattern leader_crash] [--json saida.jsonl]
+"""
+
+import os
+import sys
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import heapq
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+
+import grpc
+
+from proto import chat_server_pb2 as pb
+from common import LamportClock
+from election import ELECTION_STRATEGIES, make_election
+
+
+# ======================================================
+# Tempo virtual
+# ======================================================
+
+class _Stop(BaseException):
+    """Encerra tarefas pendentes no fim da simulação (não é capturada pelas estratégias)."""
+
+
+class _Task:
+    __slots__ = ("go", "done", "gen", "joiners")
+
+    def __init__(self):
+        self.go = threading.Event()
+        self.done = False
+        self.gen = 0  # descarta agendamentos antigos (timeout de join já vencido, etc.)
+        self.joiners = []
+
+
+class _TaskHandle:
+    """Equivalente a threading.Thread para quem chama join(timeout)."""
+
+    def __init__(self, runtime, task):
+        self._runtime = runtime
+        self._task = task
+
+    def join(self, timeout=None):
+        rt, task = self._runtime, self._task
+        if task.done:
+            return
+        me = rt._current
+        task.joiners.append(me)
+        if timeout is not None:
+            rt._schedule(me, rt.now() + timeout)
+        rt._switch()
+        if me in task.joiners:
+            task.joiners.remove(me)
+
+
+class VirtualRuntime:
+    """
+    Runtime cooperativo com relógio virtual (mesma interface do SystemRuntime).
+
+    Cada tarefa é uma thread real, mas só uma executa por vez: o controle só
+    troca de mãos em sleep(), join() e no fim de uma tarefa, sempre para a
+    próxima tarefa agendada (menor instante virtual, depois ordem de
+    agendamento). Isso torna a execução determinística. As estratégias nunca
+    dormem segurando seus locks, então não há bloqueio entre tarefas.
+    """
+
+    def __init__(self, seed: int = 0):
+        self._now = 0.0
+        self._heap = []
+        self._seq = 0
+        self._rng = random.Random(seed)
+        self._tasks = set()
+        self._stopping = False
+        self._main = _Task()
+        self._current = self._main
+        self.switches = 0
+
+    def now(self) -> float:
+        return self._now
+
+    def uniform(self, a: float, b: float) -> float:
+        return self._rng.uniform(a, b)
+
+    def sleep(self, seconds: float) -> None:
+        self._schedule(self._current, self._now + max(0.0, seconds))
+        self._switch()
+
+    def spawn(self, target, *args) -> _TaskHandle:
+        task = _Task()
+        self._tasks.add(task)
+
+        def run():
+            task.go.wait()
+            try:
+                if not self._stopping:
+                    target(*args)
+            except _Stop:
+                pass
+            except Exception:
+                logging.exception("[SIM] Tarefa falhou")
+            finally:
+                task.done = True
+                self._tasks.discard(task)
+                for joiner in task.joiners:
+                    self._schedule(joiner, self._now)
+                self._resume_next()
+
+        self._schedule(task, self._now)
+        threading.Thread(target=run, daemon=True).start()
+        return _TaskHandle(self, task)
+
+    def run_until(self, t: float) -> None:
+        """Executa a simulação (a partir da thread principal) até o instante t."""
+        self._schedule(self._main, t)
+        self._switch()
+
+    def shutdown(self) -> None:
+        """Encerra todas as tarefas pendentes, liberando suas threads."""
+        self._stopping = True
+        while self._tasks:
+            self._schedule(next(iter(self._tasks)), self._now)
+            self._schedule(self._main, self._now)
+            self._switch()
+
+    def _schedule(self, task: _Task, at: float) -> None:
+        self._seq += 1
+        heapq.heappush(self._heap, (at, self._seq, task.gen, task))
+
+    def _resume_next(self) -> None:
+        while True:
+            at, _, gen, task = heapq.heappop(self._heap)
+            if gen == task.gen and not task.done:
+                break
+        task.gen += 1
+        self._now = max(self._now, at)
+        self._current = task
+        self.switches += 1
+        task.go.set()
+
+    def _switch(self) -> None:
+        # Passa o controle à próxima tarefa e espera ser retomada
+        me = self._current
+        me.go.clear()
+        self._resume_next()
+        me.go.wait()
+        if self._stopping and me is not self._main:
+            raise _Stop()
+
+
+# ======================================================
+# Rede em memória
+# ======================================================
+
+class SimRpcError(grpc.RpcError):
+    def __init__(self, code: grpc.StatusCode):
+        super().__init__(code.name)
+        self._code = code
+
+    def code(self) -> grpc.StatusCode:
+        return self._code
+
+
+class SimTransport:
+    """Transporte de uma encarnação de um servidor (mesma interface do GrpcTransport)."""
+
+    def __init__(self, network, node, incarnation: int):
+        self._network = network
+        self._node = node
+        self._incarnation = incarnation
+
+    def call(self, peer_addr: str, method: str, request, timeout: float):
+        return self._network.deliver(self._node, self._incarnation, peer_addr, method, request, timeout)
+
+
+class SimNetwork:
+    """
+    Entrega as chamadas diretamente ao servidor de destino, em tempo virtual.
+
+    Servidor parado ou do outro lado de uma partição: a chamada falha com
+    UNAVAILABLE após a latência (conexão recusada) ou, com crash_timeout,
+    só depois do timeout inteiro (máquina que parou de responder).
+    """
+
+    def __init__(self, runtime: VirtualRuntime, latency: float = 0.001, jitter: float = 0.0005,
+                 crash_timeout: bool = False):
+        self.runtime = runtime
+        self.latency = latency
+        self.jitter = jitter
+        self.crash_timeout = crash_timeout
+        self.nodes = {}  # endereço -> SimNode
+        self.messages = Counter()  # por tipo, incluindo heartbeats do _heartbeat_loop
+        self._groups = None  # partição: endereço -> grupo
+
+    def _delay(self) -> float:
+        return self.latency + self.runtime.uniform(0.0, self.jitter)
+
+    def partition(self, groups: List[List[str]]) -> None:
+        self._groups = {addr: i for i, group in enumerate(groups) for addr in group}
+
+    def heal(self) -> None:
+        self._groups = None
+
+    def reachable(self, a: str, b: str) -> bool:
+        return self._groups is None or self._groups.get(a) == self._groups.get(b)
+
+    def in_majority(self, addr: str) -> bool:
+        """Se o servidor está no maior lado da partição (sempre True sem partição)."""
+        if self._groups is None:
+            return True
+        sizes = Counter(self._groups.values())
+        return self._groups.get(addr) == max(sizes, key=sizes.get)
+
+    def deliver(self, sender, incarnation: int, peer_addr: str, method: str, request, timeout: float):
+        if not sender.running(incarnation):
+            raise SimRpcError(grpc.StatusCode.CANCELLED)
+        self.messages[method.lower()] += 1
+        delay = self._delay()
+        self.runtime.sleep(delay)
+        dst = self.nodes.get(peer_addr)
+        if dst is None or not dst.alive or not self.reachable(sender.addr, peer_addr):
+            if self.crash_timeout:
+                self.runtime.sleep(max(0.0, timeout - delay))
+                raise SimRpcError(grpc.StatusCode.DEADLINE_EXCEEDED)
+            raise SimRpcError(grpc.StatusCode.UNAVAILABLE)
+        response = dst.handle(method, request)
+        self.runtime.sleep(self._delay())
+        if not sender.running(incarnation):
+            raise SimRpcError(grpc.StatusCode.CANCELLED)
+        return response
+
+
+# ======================================================
+# Servidor e cluster simulados
+# ======================================================
+
+class SimNode:
+    """Parte do ChatService relevante para a eleição, sobre o runtime virtual."""
+
+    def __init__(self, cluster, node_id: int, addr: str):
+        self.cluster = cluster
+        self.id = node_id
+        self.addr = addr
+        self.alive = False
+        self.incarnation = 0
+        self.election = None
+        self.clock = None
+
+    def running(self, incarnation: int) -> bool:
+        return self.alive and self.incarnation == incarnation
+
+    # (Re)inicia o servidor com estado novo, como um processo reiniciado
+    def start(self) -> None:
+        c = self.cluster
+        self.incarnation += 1
+        self.alive = True
+        self.clock = LamportClock()
+        self.election = make_election(
+            c.strategy,
+            server_id=self.id,
+            peers=[(n.id, n.addr) for n in c.nodes if n is not self],
+            lamport_clock=self.clock,
+            on_leader_change=lambda leader_id: c.leader_changed(),
+            sticky=c.sticky,
+            transport=SimTransport(c.network, self, self.incarnation),
+            runtime=c.runtime,
+        )
+        self.election.election_timeout = c.election_timeout
+        self.election.coordinator_timeout = c.coordinator_timeout
+        c.instances.append((self.id, self.election))
+        c.runtime.spawn(self._start_background_tasks, self.incarnation)
+
+    def crash(self) -> None:
+        self.alive = False
+
+    # Espelha ChatService.start_background_tasks: heartbeat e, ~1s depois, a entrada no cluster
+    # Os processos sobem defasados (start_skew), o que também defasa os heartbeats
+    def _start_background_tasks(self, incarnation: int) -> None:
+        rt = self.cluster.runtime
+        rt.sleep(rt.uniform(0.0, self.cluster.start_skew))
+        if not self.running(incarnation):
+            return
+        rt.spawn(self._heartbeat_loop, incarnation)
+        rt.sleep(1.0)
+        if self.running(incarnation):
+            self.election.join_cluster()
+
+    # Espelha ChatService._heartbeat_loop
+    def _heartbeat_loop(self, incarnation: int) -> None:
+        c = self.cluster
+        election = self.election
+        while self.running(incarnation):
+            c.runtime.sleep(c.heartbeat_interval)
+            leader_id = election.leader_id
+            if not self.running(incarnation) or leader_id is None or leader_id == self.id:
+                continue
+            try:
+                c.network.deliver(self, incarnation, c.addr_of(leader_id), "Heartbeat",
+                                  pb.HeartbeatRequest(server_id=self.id, lamport_timestamp=0), 2.0)
+            except grpc.RpcError:
+                if self.running(incarnation):
+                    election.on_leader_failure(leader_id)
+
+    # Espelha os handlers Heartbeat, Election e Coordinator do ChatService
+    def handle(self, method: str, request):
+        election = self.election
+        if method == "Heartbeat":
+            return pb.HeartbeatResponse(alive=True, leader_id=election.get_leader() or 0, lamport_timestamp=0)
+        if method == "Election":
+            ok, responder_id = election.handle_election(request)
+            return pb.ElectionResponse(ok=ok, responder_id=responder_id,
+                                       lamport_timestamp=self.clock.get_time(), term=election.term)
+        if method == "Coordinator":
+            election.handle_coordinator(request)
+            return pb.CoordinatorResponse(acknowledged=True, lamport_timestamp=self.clock.get_time())
+        raise SimRpcError(grpc.StatusCode.UNIMPLEMENTED)
+
+
+class SimCluster:
+    def __init__(self, strategy: str, size: int, seed: int = 0, sticky: bool = False,
+                 heartbeat_interval: float = 2.0, election_timeout: float = 3.0,
+                 coordinator_timeout: float = 5.0, start_skew: float = 2.0,
+                 latency: float = 0.001, crash_timeout: bool = False):
+        self.strategy = strategy
+        self.sticky = sticky
+        self.heartbeat_interval = heartbeat_interval
+        self.election_timeout = election_timeout
+        self.coordinator_timeout = coordinator_timeout
+        self.start_skew = start_skew
+        self.runtime = VirtualRuntime(seed)
+        self.network = SimNetwork(self.runtime, latency=latency, jitter=latency / 2,
+                                  crash_timeout=crash_timeout)
+        self.nodes = [SimNode(self, i, f"sim:{i}") for i in range(1, size + 1)]
+        for node in self.nodes:
+            self.network.nodes[node.addr] = node
+        self.instances = []  # (id, estratégia) de todas as encarnações
+        self.leader_changes = 0
+        self.agreed_since = None  # desde quando os vivos concordam num líder vivo
+
+    def addr_of(self, node_id: int) -> str:
+        return self.nodes[node_id - 1].addr
+
+    # Líder em que todos os servidores vivos (do lado majoritário, se houver partição) concordam
+    def current_leader(self):
+        leaders = {n.election.leader_id for n in self.nodes
+                   if n.alive and self.network.in_majority(n.addr)}
+        if len(leaders) != 1:
+            return None
+        leader_id = leaders.pop()
+        leader = self.nodes[leader_id - 1] if leader_id else None
+        if leader is None or not leader.alive or not self.network.in_majority(leader.addr):
+            return None
+        return leader_id
+
+    # Chamado com o lock da estratégia: lê os atributos sem lock
+    def leader_changed(self) -> None:
+        self.leader_changes += 1
+        self._check_agreement()
+
+    def _check_agreement(self) -> None:
+        if self.current_leader() is None:
+            self.agreed_since = None
+        elif self.agreed_since is None:
+            self.agreed_since = self.runtime.now()
+
+    def counters(self) -> Dict:
+        per_node = Counter()
+        threads = 0
+        for node_id, election in self.instances:
+            per_node[node_id] += election.stats.elections_started
+            threads += election.stats.threads_spawned
+        return {"messages": Counter(self.network.messages), "elections": per_node,
+                "threads": threads, "leader_changes": self.leader_changes}
+
+    # Aplica um evento de falha e observa o cluster por `duration` segundos virtuais
+    def window(self, label: str, action, duration: float) -> Dict:
+        before = self.counters()
+        t0 = self.runtime.now()
+        action()
+        self._check_agreement()
+        self.runtime.run_until(t0 + duration)
+        after = self.counters()
+
+        messages = after["messages"] - before["messages"]
+        elections = after["elections"] - before["elections"]
+        leader = self.current_leader()
+        return {
+            "event": label,
+            "converged": leader is not None,
+            "convergence_s": (self.agreed_since - t0) if leader is not None else None,
+            "leader": leader,
+            "messages": sum(v for k, v in messages.items() if k != "heartbeat"),
+            "heartbeats": messages["heartbeat"],
+            "by_type": dict(messages),
+            "threads": after["threads"] - before["threads"],
+            "elections_started": sum(elections.values()),
+            "initiators": len(elections),
+            "leader_changes": after["leader_changes"] - before["leader_changes"],
+        }
+
+
+# ======================================================
+# Padrões de falha
+# ======================================================
+
+def _crash_leader(cluster: SimCluster):
+    def action():
+        leader_id = cluster.current_leader()
+        if leader_id is not None:
+            cluster.nodes[leader_id - 1].crash()
+    return action
+
+
+def pattern_leader_crash(cluster: SimCluster, window: float) -> List[Dict]:
+    return [cluster.window("crash do líder", _crash_leader(cluster), window)]
+
+
+def pattern_cascade(cluster: SimCluster, window: float, failures: int = 3) -> List[Dict]:
+    return [cluster.window(f"crash do líder #{i + 1}", _crash_leader(cluster), window)
+            for i in range(failures)]
+
+
+def pattern_crash_restart(cluster: SimCluster, window: float) -> List[Dict]:
+    leader_id = cluster.current_leader()
+    rows = [cluster.window("crash do líder", _crash_leader(cluster), window)]
+    if leader_id is not None:
+        rows.append(cluster.window("líder antigo reinicia", cluster.nodes[leader_id - 1].start, window))
+    return rows
+
+
+def pattern_isolate_leader(cluster: SimCluster, window: float) -> List[Dict]:
+    leader_id = cluster.current_leader()
+    if leader_id is None:
+        return []
+    isolated = cluster.addr_of(leader_id)
+    others = [n.addr for n in cluster.nodes if n.addr != isolated]
+    return [
+        cluster.window("líder isolado", lambda: cluster.network.partition([[isolated], others]), window),
+        cluster.window("partição desfeita", cluster.network.heal, window),
+    ]
+
+
+FAILURE_PATTERNS = {
+    "leader_crash": pattern_leader_crash,
+    "cascade": pattern_cascade,
+    "crash_restart": pattern_crash_restart,
+    "isolate_leader": pattern_isolate_leader,
+}
+
+
+def simulate(strategy: str, size: int, pattern: str, seed: int = 0, warmup: float = 20.0,
+             window: float = 40.0, **cluster_opts) -> List[Dict]:
+    """Sobe o cluster (janela "partida"), aplica o padrão de falha e retorna uma linha por janela."""
+    wall0 = time.perf_counter()
+    cluster = SimCluster(strategy, size, seed=seed, **cluster_opts)
+
+    def start_all():
+        for node in cluster.nodes:
+            node.start()
+
+    rows = [cluster.window("partida", start_all, warmup)]
+    rows.extend(FAILURE_PATTERNS[pattern](cluster, window))
+    cluster.runtime.shutdown()
+    wall = time.perf_counter() - wall0
+    for row in rows:
+        row.update(strategy=strategy, size=size, pattern=pattern, seed=seed, wall_s=wall)
+    return rows
+
+
+# ======================================================
+# Main
+# ======================================================
+
+def print_table(rows: List[Dict]) -> None:
+    line = "-" * 110
+    fmt = "{:<7} {:>4} {:<15} {:<22} {:>10} {:>6} {:>9} {:>8} {:>9} {:>10} {:>7}"
+    print(line)
+    print(fmt.format("Eleição", "N", "Padrão", "Evento", "Converg(s)", "Líder",
+                     "Mensagens", "Threads", "Eleições", "Iniciadores", "Real(s)"))
+    print(line)
+    for r in rows:
+        conv = f"{r['convergence_s']:.3f}" if r["converged"] else "não"
+        print(fmt.format(r["strategy"], r["size"], r["pattern"], r["event"], conv,
+                         r["leader"] or "-", r["messages"], r["threads"],
+                         r["elections_started"], r["initiators"], f"{r['wall_s']:.2f}"))
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador determinístico de eleição de líder")
+    parser.add_argument("--strategy", choices=sorted(ELECTION_STRATEGIES), action="append",
+                        help="Estratégias simuladas (padrão: todas)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 20, 50],
+                        help="Tamanhos de cluster")
+    parser.add_argument("--pattern", choices=sorted(FAILURE_PATTERNS), action="append",
+                        help="Padrões de falha (padrão: todos)")
+    parser.add_argument("--seed", type=int, default=0, help="Semente da simulação")
+    parser.add_argument("--window", type=float, default=40.0,
+                        help="Tempo virtual (s) observado após cada evento de falha")
+    parser.add_argument("--heartbeat-interval", type=float, default=2.0)
+    parser.add_argument("--election-timeout", type=float, default=3.0)
+    parser.add_argument("--coordinator-timeout", type=float, default=5.0)
+    parser.add_argument("--latency", type=float, default=0.001, help="Latência de rede (s) por sentido")
+    parser.add_argument("--crash-timeout", action="store_true",
+                        help="Chamadas a servidores parados só falham após o timeout (em vez de recusa imediata)")
+    parser.add_argument("--sticky-leader", action="store_true")
+    parser.add_argument("--json", type=str, default=None,
+                        help="Arquivo JSONL onde os resultados são acrescentados")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="[%(asctime)s] %(levelname)s: %(message)s")
+
+    rows: List[Dict] = []
+    for strategy in args.strategy or sorted(ELECTION_STRATEGIES):
+        for size in args.sizes:
+            for pattern in args.pattern or list(FAILURE_PATTERNS):
+                print(f">>> {strategy} n={size} {pattern}")
+                rows.extend(simulate(
+                    strategy, size, pattern, seed=args.seed, window=args.window,
+                    sticky=args.sticky_leader,
+                    heartbeat_interval=args.heartbeat_interval,
+                    election_timeout=args.election_timeout,
+                    coordinator_timeout=args.coordinator_timeout,
+                    latency=args.latency,
+                    crash_timeout=args.crash_timeout,
+                ))
+
+    print_table(rows)
+
+    if args.json:
+        with open(args.json, "a") as f:
+            for r in rows:
+                f.write(json.dumps(r) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de failover do Chat gRPC Distribuído.
+
+O cenário failover_5c de performance_analysis.py derruba o líder uma vez e
+só percebe a indisponibilidade se algum envio falhar. Aqui o líder é
+derrubado (SIGKILL) repetidas vezes e cada rodada reconstrói a linha do
+tempo completa da recuperação, em segundos após a queda:
+
+- detecção:        primeiro seguidor a notar a falha do líder (heartbeat)
+- 1º ELECTION:     primeira mensagem ELECTION enviada
+- COORDINATOR:     primeiro anúncio do novo líder
+- líder conhecido: todos os sobreviventes adotaram o novo líder
+- 1º envio ok:     primeiro envio confirmado por um cliente após a queda
+- 1ª entrega:      primeira mensagem enviada após a queda que chega a outro cliente
+
+Os eventos dos servidores vêm do RPC GetElectionStats (linha do tempo da
+eleição, no relógio de parede); os dos clientes vêm de um escritor e um
+leitor contínuos (ChatClient reais). Cada rodada também mede a maior janela
+sem escrita confirmada e as mensagens confirmadas que o leitor nunca
+recebeu (perdas).
+
+A varredura combina intervalos de heartbeat (--heartbeat-interval do
+servidor) e timeouts de eleição (--election-timeout), para que cada ajuste
+de failover seja julgado pelos números.
+
+Uso (dentro de experiments/):
+    python failover_benchmark.py [--heartbeat-intervals 0.5 1 2]
+                                 [--election-timeouts 1 3] [--trials 5]
+                                 [--strategy bully] [--json saida.jsonl]
+"""
+
+import os
+import sys
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import json
+import re
+import statistics
+import threading
+import time
+from typing import Dict, List, Optional
+
+import grpc
+
+from proto import chat_server_pb2 as pb
+from proto import chat_server_pb2_grpc as pb_grpc
+from chat_client import ChatClient
+from election import ELECTION_STRATEGIES
+from performance_analysis import CLUSTER, exec_id, max_gap, start_cluster, start_server, stop_cluster
+import results_store
+
+PHASES = ["deteccao", "primeiro_election", "coordinator", "lider_conhecido",
+          "primeiro_envio_ok", "primeira_entrega"]
+
+
+# ======================================================
+# Consultas ao cluster
+# ======================================================
+
+def _rpc(addr: str, fn, timeout: float = 1.0):
+    """Executa fn(canal) contra addr; retorna None se o servidor não responder."""
+    try:
+        with grpc.insecure_channel(addr) as channel:
+            return fn(channel, timeout)
+    except grpc.RpcError:
+        return None
+
+
+def leader_of(addr: str) -> Optional[int]:
+    info = _rpc(addr, lambda ch, t: pb_grpc.ClientModuleStub(ch).GetLeader(pb.Empty(), timeout=t))
+    if info is None or not info.is_leader_known:
+        return None
+    return int(info.leader_id)
+
+
+def same_server(a: Optional[str], b: str) -> bool:
+    # O servidor se anuncia como localhost:porta e os peers como 127.0.0.1:porta
+    return a is not None and a.rsplit(":", 1)[-1] == b.rsplit(":", 1)[-1]
+
+
+def wait_stable_leader(servers: List[str], timeout: float) -> Optional[int]:
+    """Espera todos os servidores concordarem num mesmo líder."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        views = {leader_of(addr) for addr in servers}
+        if len(views) == 1 and None not in views:
+            return views.pop()
+        time.sleep(0.2)
+    return None
+
+
+def election_events(addrs: List[str], since: float) -> List[Dict]:
+    """Eventos de eleição (detect, election, coordinator, leader) após since."""
+    events = []
+    for addr in addrs:
+        stats = _rpc(addr, lambda ch, t: pb_grpc.ElectionModuleStub(ch).GetElectionStats(pb.Empty(), timeout=t))
+        if stats is None:
+            continue
+        for e in stats.events:
+            if e.wall_time >= since:
+                events.append({"server": addr, "kind": e.kind, "t": e.wall_time,
+                               "leader_id": e.leader_id})
+    return events
+
+
+# ======================================================
+# Escritor e leitor contínuos
+# ======================================================
+
+class Probe:
+    """Um ChatClient envia mensagens numeradas a cada interval segundos e
+    outro as recebe; os instantes de envio e recebimento ficam registrados."""
+
+    TAG_RE = re.compile(r"\[failover s=(\d+)\]")
+
+    def __init__(self, servers: List[str], interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self.sends = []  # (seq, início, fim, ok)
+        self.received: Dict[int, float] = {}  # seq -> primeiro recebimento
+        self.duplicated = set()
+        self._running = True
+        self.writer = ChatClient(servers, on_message=lambda msg: None)
+        self.reader = ChatClient(servers, on_message=self._on_message)
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+
+    def start(self, timeout: float = 10.0) -> bool:
+        # O leitor precisa estar inscrito no líder antes da primeira medição
+        deadline = time.time() + timeout
+        while self.reader._client_id is None or self.writer._client_id is None:
+            if time.time() > deadline:
+                return False
+            time.sleep(0.05)
+        self._thread.start()
+        return True
+
+    def close(self):
+        self._running = False
+        self._thread.join(timeout=10)
+        self.writer.close()
+        self.reader.close()
+
+    def _on_message(self, msg):
+        now = time.time()
+        m = self.TAG_RE.search(msg.content)
+        if m is None:
+            return
+        seq = int(m.group(1))
+        with self._lock:
+            if seq in self.received:
+                self.duplicated.add(seq)
+            else:
+                self.received[seq] = now
+
+    def _write_loop(self):
+        seq = 0
+        while self._running:
+            t0 = time.time()
+            try:
+                resp = self.writer.send(f"[failover s={seq}]")
+                ok = resp is not None and resp.success
+            except Exception:
+                ok = False
+            t1 = time.time()
+            with self._lock:
+                self.sends.append((seq, t0, t1, ok))
+            seq += 1
+            time.sleep(max(self.interval - (t1 - t0), 0.0))
+
+    def first_ok_after(self, t: float) -> Optional[float]:
+        with self._lock:
+            return min((done for _, start, done, ok in self.sends if ok and start >= t), default=None)
+
+    def first_delivery_after(self, t: float) -> Optional[float]:
+        with self._lock:
+            sent_after = {seq for seq, start, _, _ in self.sends if start >= t}
+            return min((r for seq, r in self.received.items() if seq in sent_after), default=None)
+
+    def window(self, t_from: float, t_to: float) -> Dict:
+        """Envios confirmados em [t_from, t_to]: maior janela sem escrita, perdas e duplicatas."""
+        with self._lock:
+            acked = [(seq, done) for seq, _, done, ok in self.sends if ok and t_from <= done <= t_to]
+            lost = sum(1 for seq, _ in acked if seq not in self.received)
+            dups = sum(1 for seq, _ in acked if seq in self.duplicated)
+        return {
+            "envios_ok": len(acked),
+            "janela_sem_escrita": max_gap([t_from] + [done for _, done in acked] + [t_to]),
+            "perdidas": lost,
+            "duplicadas": dups,
+        }
+
+
+# ======================================================
+# Rodada de failover
+# ======================================================
+
+def run_trial(procs, servers: List[str], probe: Probe, server_args: List[str], args,
+              restart: bool = True) -> Optional[Dict]:
+    # O líder precisa continuar o mesmo durante toda a espera; trocas nesse
+    # intervalo (ex.: eleição espúria após o reinício de um nó) são contadas
+    instabilities = 0
+    while True:
+        leader = wait_stable_leader(servers, timeout=30)
+        if leader is None:
+            print("    cluster sem líder estável; rodada descartada", file=sys.stderr)
+            return None
+        time.sleep(args.settle)
+        if all(leader_of(addr) == leader for addr in servers):
+            break
+        instabilities += 1
+        if instabilities > 5:
+            print("    líder não se estabiliza; rodada descartada", file=sys.stderr)
+            return None
+
+    idx = next(i for i, sp in enumerate(procs) if sp.server_id == leader)
+    leader_addr = servers[idx]
+    survivors = [addr for addr in servers if addr != leader_addr]
+
+    # Sem REDIRECT na perda de liderança, os clientes podem ter ficado num ex-líder
+    # (ex.: após o failback do Bully); nesse caso a queda não os atinge diretamente
+    clients_on_leader = (same_server(probe.writer._current_server, leader_addr)
+                         and same_server(probe.reader._current_server, leader_addr))
+
+    t_kill = time.time()
+    procs[idx].proc.kill()
+    procs[idx].proc.wait()
+
+    # Espera o cluster e os clientes se recuperarem (ou o prazo da rodada)
+    deadline = t_kill + args.trial_timeout
+    while time.time() < deadline:
+        new_leader = wait_stable_leader(survivors, timeout=0.5)
+        if (new_leader not in (None, leader) and probe.first_ok_after(t_kill)
+                and probe.first_delivery_after(t_kill)):
+            break
+        time.sleep(0.1)
+    time.sleep(args.hold)
+    t_end = time.time()
+    time.sleep(args.grace)  # entregas ainda em trânsito
+
+    events = election_events(survivors, t_kill)
+
+    def first(kind: str, **match) -> Optional[float]:
+        return min((e["t"] for e in events if e["kind"] == kind
+                    and all(e[k] == v for k, v in match.items())), default=None)
+
+    # Líder conhecido: o último sobrevivente a adotar um líder diferente do derrubado
+    adopted = []
+    for addr in survivors:
+        ts = [e["t"] for e in events if e["server"] == addr and e["kind"] == "leader"
+              and e["leader_id"] != leader]
+        adopted.append(min(ts) if ts else None)
+
+    instants = {
+        "deteccao": first("detect", leader_id=leader),
+        "primeiro_election": first("election"),
+        "coordinator": min((e["t"] for e in events if e["kind"] == "coordinator"
+                            and e["leader_id"] != leader), default=None),
+        "lider_conhecido": None if None in adopted else max(adopted),
+        "primeiro_envio_ok": probe.first_ok_after(t_kill),
+        "primeira_entrega": probe.first_delivery_after(t_kill),
+    }
+    row = {
+        "lider_derrubado": leader,
+        "novo_lider": leader_of(survivors[0]),
+        "clientes_no_lider": clients_on_leader,
+        **{k: (v - t_kill if v is not None else None) for k, v in instants.items()},
+        "eleicoes": sum(1 for e in events if e["kind"] == "election"),
+        "trocas_antes": instabilities,
+        **probe.window(t_kill - args.settle, t_end),
+    }
+
+    # Reinicia o nó derrubado para a próxima rodada
+    if restart:
+        procs[idx] = start_server(leader, server_args)
+    return row
+
+
+def run_config(heartbeat_interval: float, election_timeout: float, args) -> List[Dict]:
+    server_args = [
+        "--heartbeat-interval", str(heartbeat_interval),
+        "--election-timeout", str(election_timeout),
+        "--election", args.strategy,
+        *args.server_args.split(),
+    ]
+    procs, servers = start_cluster(server_args)
+    rows: List[Dict] = []
+    probe = None
+    try:
+        if wait_stable_leader(servers, timeout=30) is None:
+            print("    cluster não elegeu um líder", file=sys.stderr)
+            return rows
+        probe = Probe(servers, args.send_interval)
+        if not probe.start():
+            print("    clientes não conectaram", file=sys.stderr)
+            return rows
+        for trial in range(args.trials):
+            row = run_trial(procs, servers, probe, server_args, args,
+                            restart=trial < args.trials - 1)
+            if row is None:
+                continue
+            row.update({"estrategia": args.strategy, "heartbeat_interval": heartbeat_interval,
+                        "election_timeout": election_timeout, "rodada": trial,
+                        "cenario": f"{args.strategy} hb={heartbeat_interval:g} et={election_timeout:g}"})
+            rows.append(row)
+            print(f"    rodada {trial}: líder {row['lider_derrubado']} -> {row['novo_lider']}, "
+                  f"1ª entrega em {_fmt(row['primeira_entrega'])} s", file=sys.stderr)
+    finally:
+        if probe is not None:
+            probe.close()
+        stop_cluster(procs)
+    return rows
+
+
+# ======================================================
+# Main
+# ======================================================
+
+def _fmt(x: Optional[float]) -> str:
+    return f"{x:.2f}" if x is not None else "-"
+
+
+def aggregate(rows: List[Dict]) -> List[Dict]:
+    """Média de cada fase por configuração (rodadas sem o evento são ignoradas)."""
+    groups: Dict[tuple, List[Dict]] = {}
+    for r in rows:
+        groups.setdefault((r["heartbeat_interval"], r["election_timeout"]), []).append(r)
+    summary = []
+    for (hb, et), rs in sorted(groups.items()):
+        s = {"heartbeat_interval": hb, "election_timeout": et, "rodadas": len(rs)}
+        for phase in PHASES:
+            xs = [r[phase] for r in rs if r[phase] is not None]
+            s[phase] = statistics.mean(xs) if xs else None
+        s["janela_max"] = max(r["janela_sem_escrita"] for r in rs)
+        s["perdidas"] = sum(r["perdidas"] for r in rs)
+        s["duplicadas"] = sum(r["duplicadas"] for r in rs)
+        s["trocas_antes"] = sum(r["trocas_antes"] for r in rs)
+        s["clientes_no_lider"] = sum(1 for r in rs if r["clientes_no_lider"])
+        summary.append(s)
+    return summary
+
+
+def print_table(summary: List[Dict]) -> None:
+    line = "-" * 127
+    fmt = "{:>5} {:>5} {:>7} {:>7} {:>9} {:>10} {:>8} {:>8} {:>9} {:>9} {:>11} {:>7} {:>6} {:>6}"
+    print("\nTempos médios (s) após a queda do líder, por configuração.")
+    print(line)
+    print(fmt.format("HB", "ET", "Rodadas", "Cli.", "Detecção", "ELECTION", "COORD", "Líder",
+                     "Envio ok", "Entrega", "Sem escrita", "Perdas", "Dupl.", "Trocas"))
+    print(line)
+    for s in summary:
+        print(fmt.format(
+            f"{s['heartbeat_interval']:g}", f"{s['election_timeout']:g}", s["rodadas"],
+            f"{s['clientes_no_lider']}/{s['rodadas']}",
+            *(_fmt(s[p]) for p in PHASES),
+            f"{s['janela_max']:.2f}", s["perdidas"], s["duplicadas"], s["trocas_antes"],
+        ))
+    print(line)
+    print("HB: --heartbeat-interval; ET: --election-timeout; Sem escrita: maior janela entre envios confirmados;")
+    print("Cli.: rodadas em que os clientes estavam no líder derrubado; Trocas: mudanças de líder")
+    print("inesperadas com o cluster estável, antes das quedas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de failover com linha do tempo da recuperação")
+    parser.add_argument("--heartbeat-intervals", type=float, nargs="+", default=[0.5, 1.0, 2.0],
+                        help="Valores de --heartbeat-interval dos servidores")
+    parser.add_argument("--election-timeouts", type=float, nargs="+", default=[1.0, 3.0],
+                        help="Valores de --election-timeout dos servidores")
+    parser.add_argument("--strategy", choices=sorted(ELECTION_STRATEGIES), default="bully",
+                        help="Estratégia de eleição do cluster")
+    parser.add_argument("--trials", type=int, default=5,
+                        help="Quedas do líder por configuração")
+    parser.add_argument("--send-interval", type=float, default=0.05,
+                        help="Intervalo (s) entre envios do escritor")
+    parser.add_argument("--settle", type=float, default=6.0,
+                        help="Espera (s) com o cluster estável antes de cada queda (acima do "
+                             "coordinator_timeout de 5 s, para a eleição de entrada terminar)")
+    parser.add_argument("--trial-timeout", type=float, default=30.0,
+                        help="Prazo (s) para a recuperação de cada rodada")
+    parser.add_argument("--hold", type=float, default=1.0,
+                        help="Observação (s) após a recuperação, ainda contada na rodada")
+    parser.add_argument("--grace", type=float, default=1.0,
+                        help="Espera (s) pelas entregas em trânsito antes de contar perdas")
+    parser.add_argument("--server-args", type=str, default="",
+                        help='Argumentos extras repassados a todos os servidores '
+                             '(ex.: --server-args="--sticky-leader")')
+    parser.add_argument("--json", type=str, default=None,
+                        help="Arquivo JSONL onde as rodadas são acrescentadas")
+    parser.add_argument("--db", type=str, default=results_store.DEFAULT_DB,
+                        help="Banco JSONL onde cada rodada é acrescentada (ver results_store.py)")
+    parser.add_argument("--no-db", action="store_true",
+                        help="Não registra as rodadas no banco de resultados")
+    args = parser.parse_args()
+
+    rows: List[Dict] = []
+    for hb in args.heartbeat_intervals:
+        for et in args.election_timeouts:
+            print(f">>> heartbeat {hb:g}s, election timeout {et:g}s ({args.strategy}, "
+                  f"{len(CLUSTER)} nós)", file=sys.stderr)
+            rows.extend(run_config(hb, et, args))
+            time.sleep(1)
+
+    print_table(aggregate(rows))
+
+    if rows and not args.no_db:
+        eid = exec_id().replace("chat_perf_", "failover_")
+        results_store.append(rows, eid, "failover_benchmark", args.db)
+        print(f"Rodadas registradas em {args.db} (execução {eid})")
+
+    if args.json:
+        with open(args.json, "a") as f:
+            for r in rows:
+                f.write(json.dumps(r) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Proxy TCP local com injeção de falhas de rede para o Chat gRPC Distribuído.
+
+Sem root não há tc/netem nem iptables; aqui o efeito é obtido em espaço de
+usuário. Cada enlace direcionado origem -> destino (servidor -> servidor ou
+clientes -> servidor) ganha uma porta própria no proxy, e o nó de origem é
+configurado para falar com o destino por essa porta. Os bytes passam pelo
+proxy, que pode em cada sentido:
+
+- atrasar (delay) com variação uniforme (jitter), preservando a ordem;
+- limitar a banda (bandwidth, bytes/s): o enlace serializa os envios;
+- "perder" pacotes (loss): TCP não perde bytes, retransmite; cada trecho
+  perdido chega com um atraso extra de retransmissão (rto, 200ms como o
+  RTO mínimo do Linux) e segura os que vêm atrás;
+- particionar (blocked): o tráfego fica retido (buraco negro, como um cabo
+  desligado) até a partição acabar; conexões novas também ficam penduradas.
+
+O nó 0 (CLIENTS) representa todos os clientes. As portas são
+base + origem*10 + destino (IDs de 0 a 9).
+
+Uso como biblioteca (é o que performance_analysis.py faz):
+    proxy = FaultProxy({1: 50051, 2: 50052, 3: 50053})
+    proxy.start()
+    proxy.set(delay=0.02, jitter=0.005)   # todos os enlaces
+    proxy.isolate(leader_id)              # partição do líder
+    proxy.heal()
+
+Uso isolado (imprime os argumentos de cada servidor e roda um roteiro):
+    python fault_proxy.py --nodes 1:50051,2:50052,3:50053 --delay 0.02 \\
+                          [--script roteiro.json]
+O roteiro é uma lista JSON de passos com o instante relativo em segundos:
+    [{"at": 5, "action": "partition", "groups": [[0, 1], [2, 3]]},
+     {"at": 15, "action": "heal"}]
+"""
+
+import os
+import sys
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Nó lógico dos clientes
+CLIENTS = 0
+DEFAULT_BASE_PORT = 51000
+HOST = "127.0.0.1"
+# Tamanho máximo de cada leitura: é a unidade de atraso, perda e banda
+CHUNK = 16 * 1024
+
+
+@dataclass(frozen=True)
+class LinkConfig:
+    delay: float = 0.0       # atraso fixo (s)
+    jitter: float = 0.0      # variação uniforme em torno do atraso (s)
+    bandwidth: float = 0.0   # bytes/s; 0 = sem limite
+    loss: float = 0.0        # probabilidade de um trecho precisar de retransmissão
+    rto: float = 0.2         # atraso extra de uma retransmissão (s)
+    blocked: bool = False    # partição: tráfego retido
+
+
+class _Link:
+    """Estado de um enlace direcionado (mexido só dentro do event loop)."""
+
+    def __init__(self, config: LinkConfig):
+        self.config = config
+        self.open = asyncio.Event()
+        if not config.blocked:
+            self.open.set()
+        self.tx_free = 0.0      # instante em que o enlace termina de transmitir o que já aceitou
+        self.bytes = 0
+        self.chunks = 0
+        self.retransmits = 0
+        self.connections = 0
+
+    def apply(self, config: LinkConfig) -> None:
+        self.config = config
+        if config.blocked:
+            self.open.clear()
+        else:
+            self.open.set()
+
+
+class FaultProxy:
+    def __init__(self, nodes: Dict[int, int], base_port: int = DEFAULT_BASE_PORT,
+                 default: LinkConfig = LinkConfig(), seed: Optional[int] = None):
+        """nodes: ID do servidor -> porta real."""
+        for nid in nodes:
+            if not 1 <= nid <= 9:
+                raise ValueError(f"ID de nó fora de 1..9: {nid}")
+        self.nodes = dict(nodes)
+        self.base_port = base_port
+        self._default = default
+        self._rng = random.Random(seed)
+        self._links: Dict[Tuple[int, int], _Link] = {}
+        self._servers = []
+        self._conn_tasks = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ======================================================
+    # Endereços
+    # ======================================================
+
+    def link_port(self, src: int, dst: int) -> int:
+        return self.base_port + src * 10 + dst
+
+    def link_addr(self, src: int, dst: int) -> str:
+        return f"{HOST}:{self.link_port(src, dst)}"
+
+    def peers_for(self, src: int) -> str:
+        """Valor de --peers do servidor src, com cada peer atrás do proxy."""
+        return ",".join(f"{dst}:{self.link_addr(src, dst)}" for dst in sorted(self.nodes) if dst != src)
+
+    def advertise(self) -> str:
+        """Valor de --advertise: os clientes são mandados às portas de clientes do proxy."""
+        return ",".join(f"{dst}:{self.link_addr(CLIENTS, dst)}" for dst in sorted(self.nodes))
+
+    def client_addrs(self) -> List[str]:
+        return [self.link_addr(CLIENTS, dst) for dst in sorted(self.nodes)]
+
+    def _pairs(self):
+        for dst in sorted(self.nodes):
+            for src in [CLIENTS, *sorted(self.nodes)]:
+                if src != dst:
+                    yield src, dst
+
+    # ======================================================
+    # Ciclo de vida
+    # ======================================================
+
+    def start(self) -> "FaultProxy":
+        ready = threading.Event()
+        error = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self._start_servers())
+            except OSError as e:
+                error.append(e)
+                ready.set()
+                return
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._shutdown())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="fault-proxy", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if error:
+            raise error[0]
+        return self
+
+    def stop(self) -> None:
+        if self._loop is None or self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    async def _start_servers(self):
+        for src, dst in self._pairs():
+            # Os dois sentidos do enlace existem mesmo sem conexão, para valer a configuração
+            for key in ((src, dst), (dst, src)):
+                if key not in self._links:
+                    self._links[key] = _Link(self._default)
+            server = await asyncio.start_server(
+                lambda r, w, s=src, d=dst: self._track(self._handle(r, w, s, d)),
+                HOST, self.link_port(src, dst), reuse_address=True)
+            self._servers.append(server)
+
+    async def _shutdown(self):
+        for server in self._servers:
+            server.close()
+        for task in list(self._conn_tasks):
+            task.cancel()
+        await asyncio.gather(*self._conn_tasks, return_exceptions=True)
+        for server in self._servers:
+            await server.wait_closed()
+
+    def _track(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._conn_tasks.add(task)
+        task.add_done_callback(self._conn_tasks.discard)
+        return task
+
+    # ======================================================
+    # Encaminhamento
+    # ======================================================
+
+    async def _handle(self, client_reader, client_writer, src, dst):
+        forward = self._links[(src, dst)]
+        backward = self._links[(dst, src)]
+        forward.connections += 1
+        try:
+            # Durante a partição o SYN "não chega": a conexão fica pendurada
+            await forward.open.wait()
+            try:
+                up_reader, up_writer = await asyncio.open_connection(HOST, self.nodes[dst])
+            except OSError:
+                return  # destino fora do ar: o cliente vê a conexão fechada
+            await asyncio.gather(
+                self._pipe(client_reader, up_writer, forward),
+                self._pipe(up_reader, client_writer, backward),
+            )
+        except asyncio.CancelledError:
+            pass
+        finally:
+            client_writer.close()
+
+    def _schedule(self, link: _Link, size: int, prev_due: float) -> float:
+        """Instante de entrega de um trecho: banda, atraso, jitter e retransmissão."""
+        cfg = link.config
+        now = time.monotonic()
+        start = max(now, link.tx_free)
+        link.tx_free = start + (size / cfg.bandwidth if cfg.bandwidth > 0 else 0.0)
+        delay = cfg.delay
+        if cfg.jitter:
+            delay = max(0.0, delay + self._rng.uniform(-cfg.jitter, cfg.jitter))
+        if cfg.loss and self._rng.random() < cfg.loss:
+            delay += cfg.rto
+            link.retransmits += 1
+        # Um fluxo TCP entrega em ordem: nada passa na frente de um trecho atrasado
+        return max(prev_due, link.tx_free + delay)
+
+    async def _pipe(self, reader, writer, link: _Link):
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def read_side():
+            prev_due = 0.0
+            try:
+                while True:
+                    data = await reader.read(CHUNK)
+                    if not data:
+                        break
+                    prev_due = self._schedule(link, len(data), prev_due)
+                    await queue.put((prev_due, data))
+            except (ConnectionError, OSError):
+                pass
+            await queue.put(None)
+
+        reading = asyncio.ensure_future(read_side())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                due, data = item
+                await link.open.wait()
+                wait = due - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                # Uma partição que começou durante a espera também retém o trecho
+                await link.open.wait()
+                writer.write(data)
+                await writer.drain()
+                link.bytes += len(data)
+                link.chunks += 1
+            if writer.can_write_eof():
+                writer.write_eof()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            reading.cancel()
+            # Um lado caiu: derruba a conexão inteira, como um RST
+            writer.close()
+
+    # ======================================================
+    # Controle (chamado de qualquer thread)
+    # ======================================================
+
+    def _call(self, fn, *args):
+        """Executa fn no event loop e espera o resultado."""
+        async def run():
+            return fn(*args)
+        return asyncio.run_coroutine_threadsafe(run(), self._loop).result()
+
+    def _matching(self, src, dst) -> List[Tuple[int, int]]:
+        return [k for k in self._links
+                if (src == "*" or k[0] == src) and (dst == "*" or k[1] == dst)]
+
+    def set(self, src="*", dst="*", **changes) -> None:
+        """Altera os enlaces src -> dst ("*" = qualquer nó); ex.: set(delay=0.05)."""
+        def apply():
+            for key in self._matching(src, dst):
+                link = self._links[key]
+                link.apply(dataclasses.replace(link.config, **changes))
+        self._call(apply)
+
+    def _block(self, pairs) -> None:
+        def apply():
+            for key in pairs:
+                link = self._links.get(key)
+                if link is not None:
+                    link.apply(dataclasses.replace(link.config, blocked=True))
+        self._call(apply)
+
+    def partition(self, groups: List[List[int]]) -> None:
+        """Separa os grupos de nós (0 = clientes); nós fora dos grupos não são afetados."""
+        side = {n: i for i, g in enumerate(groups) for n in g}
+        self._block([k for k in self._links
+                     if k[0] in side and k[1] in side and side[k[0]] != side[k[1]]])
+
+    def isolate(self, node: int, include_clients: bool = True) -> None:
+        """Corta o nó de todos os outros (e dos clientes, se include_clients)."""
+        self._block([k for k in self._links if node in k
+                     and (include_clients or CLIENTS not in k)])
+
+    def heal(self) -> None:
+        """Desfaz todas as partições (atrasos e limites continuam)."""
+        self.set(blocked=False)
+
+    def stats(self) -> Dict[str, Dict]:
+        def collect():
+            return {f"{s}->{d}": {"bytes": l.bytes, "chunks": l.chunks,
+                                  "retransmits": l.retransmits, "connections": l.connections,
+                                  "blocked": l.config.blocked}
+                    for (s, d), l in sorted(self._links.items())}
+        return self._call(collect)
+
+    # ======================================================
+    # Roteiros
+    # ======================================================
+
+    def apply_step(self, step: Dict, resolve_leader: Optional[Callable[[], Optional[int]]] = None) -> str:
+        """Aplica um passo de roteiro; retorna uma descrição para o log."""
+        action = step["action"]
+        if action == "set":
+            opts = {k: v for k, v in step.items() if k in LinkConfig.__dataclass_fields__}
+            self.set(step.get("src", "*"), step.get("dst", "*"), **opts)
+            return f"set {step.get('src', '*')}->{step.get('dst', '*')} {opts}"
+        if action == "partition":
+            self.partition(step["groups"])
+            return f"partition {step['groups']}"
+        if action in ("isolate", "isolate_leader"):
+            node = step.get("node")
+            if action == "isolate_leader":
+                node = resolve_leader() if resolve_leader else None
+                if node is None:
+                    return "isolate_leader: líder desconhecido, passo ignorado"
+            self.isolate(node, step.get("include_clients", True))
+            return f"isolate {node}"
+        if action == "heal":
+            self.heal()
+            return "heal"
+        raise ValueError(f"ação desconhecida no roteiro: {action}")
+
+    def run_script(self, steps: List[Dict], resolve_leader=None,
+                   stop_event: Optional[threading.Event] = None, log=print) -> None:
+        """Executa os passos no instante relativo "at" (s) de cada um."""
+        t0 = time.monotonic()
+        for step in sorted(steps, key=lambda s: s.get("at", 0.0)):
+            wait = t0 + step.get("at", 0.0) - time.monotonic()
+            if stop_event is not None:
+                if wait > 0 and stop_event.wait(wait):
+                    return
+            elif wait > 0:
+                time.sleep(wait)
+            log(f"[fault-proxy] t={time.monotonic() - t0:.1f}s {self.apply_step(step, resolve_leader)}")
+
+
+# ======================================================
+# Relatórios
+# ======================================================
+
+def print_table(stats: Dict[str, Dict]) -> None:
+    line = "-" * 66
+    fmt = "{:<10} {:>14} {:>10} {:>12} {:>10} {:>6}"
+    print(line)
+    print(fmt.format("Enlace", "Bytes", "Trechos", "Retransm.", "Conexões", "Part."))
+    print(line)
+    for name, s in stats.items():
+        if not s["connections"]:
+            continue
+        print(fmt.format(name, s["bytes"], s["chunks"], s["retransmits"], s["connections"],
+                         "sim" if s["blocked"] else ""))
+    print(line)
+
+
+def parse_nodes(nodes_str: str) -> Dict[int, int]:
+    nodes = {}
+    for item in nodes_str.split(","):
+        nid, port = item.strip().split(":")
+        nodes[int(nid)] = int(port)
+    return nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Proxy TCP com injeção de falhas de rede")
+    parser.add_argument("--nodes", type=str, default="1:50051,2:50052,3:50053",
+                        help='Servidores reais (locais) "id:porta,..."')
+    parser.add_argument("--base-port", type=int, default=DEFAULT_BASE_PORT,
+                        help="Porta do enlace origem->destino = base + origem*10 + destino")
+    parser.add_argument("--delay", type=float, default=0.0, help="Atraso por sentido (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variação do atraso (s)")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="Banda por enlace (bytes/s, 0 = livre)")
+    parser.add_argument("--loss", type=float, default=0.0,
+                        help="Probabilidade de retransmissão de cada trecho")
+    parser.add_argument("--script", type=str, default=None,
+                        help="Roteiro JSON de falhas (lista de passos com \"at\" e \"action\")")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", type=str, default=None,
+                        help="Arquivo JSONL onde as estatísticas por enlace são acrescentadas no fim")
+    args = parser.parse_args()
+
+    default = LinkConfig(delay=args.delay, jitter=args.jitter,
+                         bandwidth=args.bandwidth, loss=args.loss)
+    proxy = FaultProxy(parse_nodes(args.nodes), args.base_port, default, args.seed).start()
+
+    print("Argumentos de cada servidor:")
+    for nid in sorted(proxy.nodes):
+        print(f"  --id {nid} --port {proxy.nodes[nid]} --peers {proxy.peers_for(nid)} "
+              f"--advertise {proxy.advertise()}")
+    print(f"Clientes: --servers {','.join(proxy.client_addrs())}")
+    print("Ctrl+C para encerrar")
+
+    try:
+        if args.script:
+            with open(args.script) as f:
+                proxy.run_script(json.load(f))
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    stats = proxy.stats()
+    proxy.stop()
+    print_table(stats)
+
+    if args.json:
+        with open(args.json, "a") as f:
+            for name, s in stats.items():
+                f.write(json.dumps({"enlace": name, **s}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
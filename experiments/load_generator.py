@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Gerador de carga em malha aberta (open-loop) do Chat gRPC Distribuído.
+
+Em performance_analysis.py cada ClientWorker envia em malha fechada: só
+manda a próxima mensagem depois que a anterior respondeu (e dormiu o
+intervalo). Se o líder fica lento, os clientes simplesmente enviam menos
+e a lentidão some das medidas (coordinated omission).
+
+Aqui as chegadas seguem um cronograma fixo, independente das respostas:
+- um despachante gera os instantes previstos de envio a uma taxa alvo,
+  com chegadas de Poisson (intervalos exponenciais) ou constantes;
+- um pool de threads remetentes, sobre alguns ChatClient reais, atende as
+  chegadas; se todas estiverem ocupadas, as chegadas esperam na fila;
+- a latência é medida a partir do instante PREVISTO (inclui a espera na
+  fila), e o tempo de serviço (a partir do envio efetivo) é reportado à
+  parte para mostrar a diferença.
+
+As latências vão para histogramas log-lineares (LatencyHistogram), um por
+thread, somados no final. Para cada taxa oferecida o relatório traz
+p50/p90/p99/p99.9, a vazão obtida e as falhas; a varredura de taxas
+localiza o joelho de saturação do líder (a partir de onde a vazão deixa de
+acompanhar a carga oferecida ou a cauda explode).
+
+Uso (dentro de experiments/):
+    python load_generator.py [--rates 100 200 400 800] [--arrival poisson]
+                             [--duration 10] [--json saida.jsonl]
+"""
+
+import os
+import sys
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import contextlib
+import json
+import queue
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+import grpc
+
+from chat_client import ChatClient, parse_servers
+from performance_analysis import start_cluster, stop_cluster
+
+
+# ======================================================
+# Histograma de latência
+# ======================================================
+
+class LatencyHistogram:
+    """Histograma log-linear de latências, com erro relativo limitado.
+
+    Valores são gravados em microssegundos: até 2**(SUB_BITS+1) us cada
+    valor tem seu próprio balde; acima disso cada potência de 2 é dividida
+    em 2**SUB_BITS baldes (erro relativo < 1/2**SUB_BITS, ~0,8%).
+    Dois histogramas são somados balde a balde (merge), então cada thread
+    grava no seu sem lock e o resultado é combinado no fim, inclusive entre
+    execuções diferentes (to_dict/from_dict)."""
+
+    SUB_BITS = 7
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}  # limite inferior do balde (us) -> contagem
+        self.total = 0
+        self.sum_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us = 0
+
+    @classmethod
+    def _bucket(cls, us: int) -> int:
+        shift = max(us.bit_length() - cls.SUB_BITS - 1, 0)
+        return (us >> shift) << shift
+
+    @classmethod
+    def _bucket_width(cls, lower: int) -> int:
+        return 1 << max(lower.bit_length() - cls.SUB_BITS - 1, 0)
+
+    def record(self, seconds: float) -> None:
+        us = max(int(seconds * 1e6), 0)
+        bucket = self._bucket(us)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        self.sum_us += us
+        if self.min_us is None or us < self.min_us:
+            self.min_us = us
+        if us > self.max_us:
+            self.max_us = us
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        for bucket, n in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + n
+        self.total += other.total
+        self.sum_us += other.sum_us
+        if other.min_us is not None and (self.min_us is None or other.min_us < self.min_us):
+            self.min_us = other.min_us
+        self.max_us = max(self.max_us, other.max_us)
+        return self
+
+    def percentile(self, p: float) -> float:
+        """Valor (s) abaixo do qual estão p% das amostras (ponto médio do balde)."""
+        if not self.total:
+            return 0.0
+        rank = max(int(round(p / 100.0 * self.total)), 1)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                mid = bucket + (self._bucket_width(bucket) - 1) / 2.0
+                return min(mid, self.max_us) / 1e6
+        return self.max_us / 1e6
+
+    def mean(self) -> float:
+        return self.sum_us / self.total / 1e6 if self.total else 0.0
+
+    def summary(self, prefix: str = "") -> Dict:
+        return {
+            f"{prefix}n": self.total,
+            f"{prefix}media": self.mean(),
+            f"{prefix}min": (self.min_us or 0) / 1e6,
+            f"{prefix}p50": self.percentile(50),
+            f"{prefix}p90": self.percentile(90),
+            f"{prefix}p99": self.percentile(99),
+            f"{prefix}p999": self.percentile(99.9),
+            f"{prefix}max": self.max_us / 1e6,
+        }
+
+    def to_dict(self) -> Dict:
+        return {"counts": {str(k): v for k, v in sorted(self.counts.items())},
+                "sum_us": self.sum_us, "min_us": self.min_us, "max_us": self.max_us}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LatencyHistogram":
+        h = cls()
+        h.counts = {int(k): v for k, v in data["counts"].items()}
+        h.total = sum(h.counts.values())
+        h.sum_us = data["sum_us"]
+        h.min_us = data["min_us"]
+        h.max_us = data["max_us"]
+        return h
+
+
+# ======================================================
+# Gerador open-loop
+# ======================================================
+
+def arrival_gaps(rate: float, arrival: str, rng: random.Random):
+    """Intervalos (s) entre chegadas sucessivas à taxa média rate."""
+    while True:
+        if arrival == "poisson":
+            yield rng.expovariate(rate)
+        else:
+            yield 1.0 / rate
+
+
+class _Sender(threading.Thread):
+    """Atende chegadas da fila usando um ChatClient compartilhado.
+    Cada remetente tem seus próprios histogramas e contadores (sem lock)."""
+
+    def __init__(self, sid: int, client: ChatClient, arrivals: queue.Queue, measure_from: float):
+        super().__init__(daemon=True)
+        self.sid = sid
+        self.client = client
+        self.arrivals = arrivals
+        self.measure_from = measure_from
+        self.latency = LatencyHistogram()  # desde o instante previsto
+        self.service = LatencyHistogram()  # desde o envio efetivo
+        self.ok = 0
+        self.failed = 0
+        self.rejected = 0
+        self.last_done = 0.0
+
+    def run(self):
+        while True:
+            item = self.arrivals.get()
+            if item is None:
+                return
+            seq, intended = item
+            started = time.perf_counter()
+            try:
+                resp = self.client.send(f"[carga] remetente {self.sid} msg {seq}")
+                success = resp is not None and resp.success
+                code = None
+            except grpc.RpcError as e:
+                success = False
+                code = e.code()
+            except Exception:
+                success = False
+                code = None
+            done = time.perf_counter()
+            self.last_done = done
+            if intended < self.measure_from:
+                continue  # aquecimento
+            if success:
+                self.ok += 1
+                self.latency.record(done - intended)
+                self.service.record(done - started)
+            elif code == grpc.StatusCode.RESOURCE_EXHAUSTED:
+                self.rejected += 1
+            else:
+                self.failed += 1
+
+
+def run_rate(clients: List[ChatClient], rate: float, arrival: str, duration: float,
+             warmup: float, concurrency: int, drain_timeout: float, seed: int) -> Dict:
+    """Oferece rate msg/s por duration segundos (mais o aquecimento) e mede o resultado."""
+    rng = random.Random(seed)
+    arrivals: queue.Queue = queue.Queue()
+    t_start = time.perf_counter()
+    measure_from = t_start + warmup
+    t_end = measure_from + duration
+
+    senders = [_Sender(i, clients[i % len(clients)], arrivals, measure_from)
+               for i in range(concurrency)]
+    for s in senders:
+        s.start()
+
+    # Despachante: enfileira cada chegada no instante previsto, esteja o sistema
+    # livre ou não (se estiver atrasado, enfileira de imediato)
+    offered = 0
+    seq = 0
+    intended = t_start
+    max_queue = 0
+    for gap in arrival_gaps(rate, arrival, rng):
+        intended += gap
+        if intended >= t_end:
+            break
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        arrivals.put((seq, intended))
+        seq += 1
+        if intended >= measure_from:
+            offered += 1
+        max_queue = max(max_queue, arrivals.qsize())
+
+    # Dá um prazo para a fila esvaziar; o que sobrar conta como não atendido
+    deadline = time.perf_counter() + drain_timeout
+    while arrivals.qsize() and time.perf_counter() < deadline:
+        time.sleep(0.05)
+    pending = 0
+    while True:
+        try:
+            item = arrivals.get_nowait()
+        except queue.Empty:
+            break
+        if item[1] >= measure_from:
+            pending += 1
+    for _ in senders:
+        arrivals.put(None)
+    for s in senders:
+        s.join(timeout=drain_timeout)
+
+    latency = LatencyHistogram()
+    service = LatencyHistogram()
+    for s in senders:
+        latency.merge(s.latency)
+        service.merge(s.service)
+    ok = sum(s.ok for s in senders)
+    last_done = max([s.last_done for s in senders] + [t_end])
+    return {
+        "taxa_oferecida": rate,
+        "chegadas": arrival,
+        "duracao": duration,
+        "concorrencia": concurrency,
+        "clientes": len(clients),
+        "oferecidas": offered,
+        "ok": ok,
+        "falhas": sum(s.failed for s in senders),
+        "rejeitadas": sum(s.rejected for s in senders),
+        "pendentes": pending,
+        "fila_max": max_queue,
+        "vazao": ok / max(last_done - measure_from, 1e-9),
+        **latency.summary("lat_"),
+        **service.summary("serv_"),
+        "histograma": latency.to_dict(),
+    }
+
+
+def is_saturated(row: Dict, baseline_p99: float, tail_factor: float) -> bool:
+    """Ponto saturado: a vazão não acompanha a carga, sobram chegadas ou a cauda explode."""
+    if row["pendentes"] or row["ok"] < 0.9 * row["oferecidas"]:
+        return True
+    return baseline_p99 > 0 and row["lat_p99"] > tail_factor * baseline_p99
+
+
+def sweep(servers: List[str], rates: List[float], args) -> List[Dict]:
+    rows: List[Dict] = []
+    # As threads de recebimento do ChatClient imprimem cada mensagem; durante a
+    # varredura essa saída vai para /dev/null (o progresso vai para stderr)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        clients = [ChatClient(servers) for _ in range(args.clients)]
+        try:
+            baseline_p99 = 0.0
+            saturated_in_a_row = 0
+            for i, rate in enumerate(rates):
+                print(f">>> {rate:g} msg/s ({args.arrival})", file=sys.stderr, flush=True)
+                row = run_rate(clients, rate, args.arrival, args.duration, args.warmup,
+                               args.concurrency, args.drain_timeout, args.seed + i)
+                if not baseline_p99:
+                    baseline_p99 = row["lat_p99"]
+                row["saturado"] = is_saturated(row, baseline_p99, args.tail_factor)
+                rows.append(row)
+                saturated_in_a_row = saturated_in_a_row + 1 if row["saturado"] else 0
+                if args.stop_after and saturated_in_a_row >= args.stop_after:
+                    break
+                time.sleep(args.pause)
+        finally:
+            for c in clients:
+                c.close()
+            time.sleep(0.5)  # deixa as threads de recebimento terminarem
+    return rows
+
+
+def find_knee(rows: List[Dict]) -> Optional[float]:
+    """Maior taxa oferecida antes do primeiro ponto saturado."""
+    knee = None
+    for r in rows:
+        if r["saturado"]:
+            return knee
+        knee = r["taxa_oferecida"]
+    return None
+
+
+# ======================================================
+# Main
+# ======================================================
+
+def print_table(rows: List[Dict]) -> None:
+    line = "-" * 104
+    fmt = "{:>9} {:>9} {:>7} {:>7} {:>9} {:>9} {:>9} {:>9} {:>9} {:>11} {:>5}"
+    print(line)
+    print(fmt.format("Oferecida", "Vazão", "Falhas", "Pend.", "p50 (ms)", "p90 (ms)",
+                     "p99 (ms)", "p99.9(ms)", "max (ms)", "serv p99", "Sat."))
+    print(line)
+    for r in rows:
+        print(fmt.format(
+            f"{r['taxa_oferecida']:g}", f"{r['vazao']:.1f}",
+            r["falhas"] + r["rejeitadas"], r["pendentes"],
+            f"{r['lat_p50']*1000:.2f}", f"{r['lat_p90']*1000:.2f}",
+            f"{r['lat_p99']*1000:.2f}", f"{r['lat_p999']*1000:.2f}",
+            f"{r['lat_max']*1000:.1f}", f"{r['serv_p99']*1000:.2f}",
+            "sim" if r["saturado"] else "não",
+        ))
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerador de carga open-loop com percentis de cauda")
+    parser.add_argument("--rates", type=float, nargs="+",
+                        default=[50, 100, 200, 400, 800, 1200, 1600, 2400, 3200],
+                        help="Taxas oferecidas (msg/s) da varredura, em ordem crescente")
+    parser.add_argument("--arrival", choices=["poisson", "constant"], default="poisson",
+                        help="Processo de chegadas")
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="Duração (s) medida de cada taxa")
+    parser.add_argument("--warmup", type=float, default=1.0,
+                        help="Aquecimento (s) descartado no início de cada taxa")
+    parser.add_argument("--clients", type=int, default=4,
+                        help="ChatClients conectados (cada um é também um assinante)")
+    parser.add_argument("--concurrency", type=int, default=64,
+                        help="Threads remetentes (máximo de envios simultâneos)")
+    parser.add_argument("--drain-timeout", type=float, default=5.0,
+                        help="Prazo (s) para atender a fila no fim de cada taxa")
+    parser.add_argument("--tail-factor", type=float, default=5.0,
+                        help="p99 acima deste múltiplo do p99 da menor taxa marca saturação")
+    parser.add_argument("--stop-after", type=int, default=2,
+                        help="Encerra a varredura após N pontos saturados seguidos (0 = nunca)")
+    parser.add_argument("--pause", type=float, default=1.0,
+                        help="Pausa (s) entre as taxas")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--servers", type=str, default=None,
+                        help="Usa um cluster já em execução em vez de subir um local")
+    parser.add_argument("--server-args", type=str, default="--rate-limit 0",
+                        help="Argumentos extras dos servidores do cluster local (padrão desliga "
+                             "o limite por cliente, para medir a capacidade do líder)")
+    parser.add_argument("--json", type=str, default=None,
+                        help="Arquivo JSONL onde os resultados são acrescentados")
+    args = parser.parse_args()
+
+    cluster = None
+    if args.servers:
+        servers = parse_servers(args.servers)
+    else:
+        cluster, servers = start_cluster(args.server_args.split())
+        time.sleep(2)
+    try:
+        rows = sweep(servers, sorted(args.rates), args)
+    finally:
+        if cluster:
+            stop_cluster(cluster)
+
+    print_table(rows)
+    knee = find_knee(rows)
+    if knee is None and rows and rows[0]["saturado"]:
+        print("Saturado já na menor taxa oferecida")
+    elif knee is None:
+        print("Nenhuma taxa saturou o líder; aumente --rates")
+    else:
+        print(f"Joelho de saturação: ~{knee:g} msg/s")
+
+    if args.json:
+        with open(args.json, "a") as f:
+            for r in rows:
+                f.write(json.dumps(r) + "\n")
+
+
+if __name__ == "__main__":
+    main()
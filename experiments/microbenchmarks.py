@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Microbenchmarks de componentes do Chat gRPC Distribuído.
+
+Diferente de performance_analysis.py, que sobe um cluster completo com
+subprocessos, aqui cada componente é medido isoladamente, em processo.
+
+Benchmarks disponíveis:
+- clock: LamportClock sob contenção de várias threads remetentes
+  (updateRelogio por mensagem vs. reservaRelogio por lote, get_time)
+- catchup: catch-up de um novo líder (SyncState paralelo nos peers + merge)
+  em função do tamanho do histórico, com peers gRPC reais em processo
+- bootstrap: servidor reentrando no cluster via snapshot em blocos + cauda
+  do log, comparado com um SyncState completo (padrão: 1M mensagens)
+- fanout: PushMessageToClients com 1 a 10k assinantes falsos (filas em memória)
+- store: SendMessageToServer (carimbo + histórico + broadcast) com e sem
+  retenção, e o append puro no MessageHistory
+- sync: custo do SyncState (busca + montagem da resposta) conforme o
+  histórico cresce, pedindo só a cauda ou o histórico inteiro
+- proto: codificação/decodificação de TextMessage por tamanho de conteúdo
+
+Cada linha de resultado leva o commit atual (campo "commit"), para comparar
+mudanças no caminho crítico entre commits.
+
+Uso:
+    python microbenchmarks.py [--only clock] [--json saida.jsonl]
+"""
+
+import os
+import sys
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import contextlib
+import json
+import queue
+import threading
+import time
+from concurrent import futures
+from typing import Callable, Dict, List
+
+import grpc
+
+from proto import chat_server_pb2 as pb
+from proto import chat_server_pb2_grpc as pb_grpc
+from common import LamportClock
+from chat_server import ChatService
+from results_store import git_commit
+
+
+# ======================================================
+# Utilidades
+# ======================================================
+
+def run_threads(n_threads: int, target: Callable[[], None]) -> float:
+    """Executa target em n_threads threads com largada sincronizada.
+    Retorna o tempo total (s) até todas terminarem."""
+    barrier = threading.Barrier(n_threads + 1)
+
+    def wrapper():
+        barrier.wait()
+        target()
+
+    threads = [threading.Thread(target=wrapper, daemon=True) for _ in range(n_threads)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - t0
+
+
+def result(bench: str, case: str, ops: int, elapsed: float, **params) -> Dict:
+    return {
+        "bench": bench,
+        "case": case,
+        "ops": ops,
+        "elapsed_s": elapsed,
+        "ops_per_s": ops / elapsed if elapsed > 0 else 0.0,
+        "ns_per_op": elapsed * 1e9 / ops if ops else 0.0,
+        **params,
+    }
+
+
+class FakeContext:
+    """Contexto gRPC mínimo para chamar os handlers do ChatService diretamente."""
+
+    def invocation_metadata(self):
+        return ()
+
+    def peer(self):
+        return "ipv4:127.0.0.1:0"
+
+    def set_trailing_metadata(self, metadata):
+        pass
+
+    def abort(self, code, details):
+        raise RuntimeError(f"{code}: {details}")
+
+
+def quiet():
+    """Descarta os prints do servidor (um por mensagem) durante a medição."""
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+
+def bench_service(**opts) -> ChatService:
+    """ChatService em processo, sem rede e sem limite de taxa."""
+    opts.setdefault("history_max_messages", None)
+    return ChatService(server_id=1, port=0, peers=[], rate_limit=0, **opts)
+
+
+
+# ======================================================
+# LamportClock
+# ======================================================
+
+def bench_clock(thread_counts=(1, 4, 16, 64), msgs_per_thread: int = 20000,
+                batch: int = 64) -> List[Dict]:
+    rows = []
+    for n in thread_counts:
+        total = n * msgs_per_thread
+
+        clock = LamportClock()
+
+        def per_message():
+            for i in range(msgs_per_thread):
+                clock.updateRelogio(i)
+
+        rows.append(result("clock", "updateRelogio", total,
+                           run_threads(n, per_message), threads=n))
+
+        clock = LamportClock()
+
+        def batched():
+            for i in range(0, msgs_per_thread, batch):
+                clock.reservaRelogio(min(batch, msgs_per_thread - i), i)
+
+        rows.append(result("clock", f"reservaRelogio(lote={batch})", total,
+                           run_threads(n, batched), threads=n))
+
+        def reads():
+            for _ in range(msgs_per_thread):
+                clock.get_time()
+
+        rows.append(result("clock", "get_time", total,
+                           run_threads(n, reads), threads=n))
+    return rows
+
+
+# ======================================================
+# Catch-up do novo líder
+# ======================================================
+
+def _start_peer(server_id: int, port: int, messages: int, skip_every: int):
+    """Sobe um ChatService em processo com um histórico sintético (com lacunas)."""
+    service = ChatService(server_id=server_id, port=port, peers=[], history_max_messages=None)
+    with service._lock:
+        for ts in range(1, messages + 1):
+            if ts % skip_every:
+                service._store(ts % 50 + 1, ts, f"mensagem de teste número {ts}")
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    pb_grpc.add_ElectionModuleServicer_to_server(service, server)
+    pb_grpc.add_ServerModuleServicer_to_server(service, server)
+    pb_grpc.add_ClientModuleServicer_to_server(service, server)
+    server.add_insecure_port(f"127.0.0.1:{port}")
+    server.start()
+    return service, server
+
+
+def bench_catchup(sizes=(1000, 10000, 100000), n_peers: int = 2,
+                  base_port: int = 50151) -> List[Dict]:
+    rows = []
+    for size in sizes:
+        peers = [_start_peer(i + 1, base_port + i, size, skip_every=i + 2)
+                 for i in range(n_peers)]
+        leader = ChatService(server_id=n_peers + 1, port=base_port + n_peers,
+                             peers=[(i + 1, f"127.0.0.1:{base_port + i}") for i in range(n_peers)],
+                             history_max_messages=None)
+        t0 = time.perf_counter()
+        loaded = leader._catch_up()
+        elapsed = time.perf_counter() - t0
+        rows.append(result("catchup", f"historico={size}", loaded, elapsed, peers=n_peers))
+
+        leader.stop()
+        for service, server in peers:
+            service.stop()
+            server.stop(0)
+    return rows
+
+
+# ======================================================
+# Bootstrap por snapshot
+# ======================================================
+
+def bench_bootstrap(sizes=(1000000,), tail: int = 1000, port: int = 50161) -> List[Dict]:
+    rows = []
+    for size in sizes:
+        peer, server = _start_peer(1, port, size, skip_every=size + 1)
+        t0 = time.perf_counter()
+        peer.take_snapshot()
+        rows.append(result("bootstrap", f"take_snapshot n={size}", size,
+                           time.perf_counter() - t0))
+        # Mensagens que chegam depois do snapshot (cauda do log)
+        with peer._lock:
+            for ts in range(size + 1, size + tail + 1):
+                peer._store(1, ts, f"mensagem de teste número {ts}")
+        addr = f"127.0.0.1:{port}"
+
+        joiner = ChatService(server_id=2, port=port + 1, peers=[(1, addr)], history_max_messages=None)
+        t0 = time.perf_counter()
+        loaded = joiner._bootstrap_from_peer(addr)
+        rows.append(result("bootstrap", f"snapshot+cauda n={size}", loaded,
+                           time.perf_counter() - t0))
+        joiner.stop()
+
+        joiner = ChatService(server_id=2, port=port + 1, peers=[(1, addr)], history_max_messages=None)
+        joiner._catch_up_timeout = 300.0  # resposta única e enorme
+        t0 = time.perf_counter()
+        loaded = joiner._load_history(joiner._fetch_history(1, addr, 0))
+        rows.append(result("bootstrap", f"SyncState completo n={size}", loaded,
+                           time.perf_counter() - t0))
+        joiner.stop()
+
+        peer.stop()
+        server.stop(0)
+    return rows
+
+
+# ======================================================
+# Fan-out para assinantes
+# ======================================================
+
+def bench_fanout(subscriber_counts=(1, 10, 100, 1000, 10000), deliveries: int = 200000,
+                 max_messages: int = 1000) -> List[Dict]:
+    rows = []
+    for n in subscriber_counts:
+        messages = max(1, min(max_messages, deliveries // n))
+        service = bench_service()
+        service._subscribers = {cid: queue.Queue() for cid in range(1, n + 1)}
+        # Remetente fora dos assinantes: todos recebem
+        msg = pb.TextMessage(client_id_from=n + 1, content="mensagem de teste", lamport_timestamp=0)
+        ctx = FakeContext()
+        with quiet():
+            t0 = time.perf_counter()
+            for ts in range(1, messages + 1):
+                msg.lamport_timestamp = ts
+                service.PushMessageToClients(msg, ctx)
+            elapsed = time.perf_counter() - t0
+        rows.append(result("fanout", f"PushMessageToClients subs={n}", messages, elapsed,
+                           subscribers=n, deliveries_per_s=messages * n / elapsed))
+        service.stop()
+    return rows
+
+
+# ======================================================
+# Escrita no líder: histórico (append e retenção)
+# ======================================================
+
+def bench_store(messages: int = 50000, content_size: int = 64) -> List[Dict]:
+    rows = []
+    content = "x" * content_size
+    cases = [
+        ("sem retenção", {"history_max_messages": None}),
+        ("max_messages=100", {"history_max_messages": 100}),
+        ("max_bytes=64KiB", {"history_max_bytes": 64 * 1024}),
+    ]
+    for label, opts in cases:
+        service = bench_service(**opts)
+        with service._lock:
+            t0 = time.perf_counter()
+            for ts in range(1, messages + 1):
+                service._store(1, ts, content)
+            elapsed = time.perf_counter() - t0
+        rows.append(result("store", f"_store {label}", messages, elapsed))
+        service.stop()
+
+        # Handler completo: admissão, carimbo, histórico, índice e broadcast (sem assinantes)
+        service = bench_service(**opts)
+        request = pb.TextMessage(client_id_from=1, content=content, lamport_timestamp=0)
+        ctx = FakeContext()
+        with quiet():
+            t0 = time.perf_counter()
+            for _ in range(messages):
+                service.SendMessageToServer(request, ctx)
+            elapsed = time.perf_counter() - t0
+        rows.append(result("store", f"SendMessageToServer {label}", messages, elapsed))
+        service.stop()
+    return rows
+
+
+# ======================================================
+# SyncState: custo da varredura vs. tamanho do histórico
+# ======================================================
+
+def bench_sync(sizes=(1000, 10000, 100000, 1000000), tail: int = 100,
+               calls: int = 200) -> List[Dict]:
+    rows = []
+    for size in sizes:
+        service = bench_service()
+        with service._lock:
+            for ts in range(1, size + 1):
+                service._store(ts % 50 + 1, ts, f"mensagem de teste número {ts}")
+        ctx = FakeContext()
+
+        request = pb.SyncRequest(server_id=2, last_timestamp=size - tail)
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            service.SyncState(request, ctx)
+        rows.append(result("sync", f"cauda={tail} n={size}", calls, time.perf_counter() - t0,
+                           history=size, returned=tail))
+
+        # Histórico inteiro: poucas chamadas, custo proporcional a n
+        full_calls = max(1, min(calls, 100000 // size))
+        request = pb.SyncRequest(server_id=2, last_timestamp=0)
+        t0 = time.perf_counter()
+        for _ in range(full_calls):
+            service.SyncState(request, ctx)
+        rows.append(result("sync", f"completo n={size}", full_calls, time.perf_counter() - t0,
+                           history=size, returned=size))
+        service.stop()
+    return rows
+
+
+# ======================================================
+# Protobuf: TextMessage
+# ======================================================
+
+def bench_proto(content_sizes=(16, 256, 4096), iterations: int = 100000) -> List[Dict]:
+    rows = []
+    for size in content_sizes:
+        msg = pb.TextMessage(client_id_from=42, content="x" * size, lamport_timestamp=1 << 40)
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            data = msg.SerializeToString()
+        rows.append(result("proto", f"encode conteúdo={size}B", iterations,
+                           time.perf_counter() - t0, wire_bytes=len(data)))
+
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            pb.TextMessage.FromString(data)
+        rows.append(result("proto", f"decode conteúdo={size}B", iterations,
+                           time.perf_counter() - t0, wire_bytes=len(data)))
+    return rows
+
+
+# ======================================================
+# Main
+# ======================================================
+
+BENCHMARKS = {
+    "clock": bench_clock,
+    "catchup": bench_catchup,
+    "bootstrap": bench_bootstrap,
+    "fanout": bench_fanout,
+    "store": bench_store,
+    "sync": bench_sync,
+    "proto": bench_proto,
+}
+
+
+def print_table(rows: List[Dict]) -> None:
+    line = "-" * 105
+    fmt = "{:<10} {:<44} {:>8} {:>14} {:>12} {:>10}"
+    print(line)
+    print(fmt.format("Bench", "Caso", "N", "ops/s", "ns/op", "total (s)"))
+    print(line)
+    for r in rows:
+        # N: threads, assinantes ou tamanho do histórico, conforme o benchmark
+        n = r.get("threads", r.get("subscribers", r.get("history", "-")))
+        print(fmt.format(r["bench"], r["case"], n,
+                         f"{r['ops_per_s']:.0f}", f"{r['ns_per_op']:.1f}",
+                         f"{r['elapsed_s']:.3f}"))
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks do chat distribuído")
+    parser.add_argument("--only", choices=sorted(BENCHMARKS), action="append",
+                        help="Executa apenas os benchmarks indicados")
+    parser.add_argument("--json", type=str, default=None,
+                        help="Arquivo JSONL onde os resultados são acrescentados")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    rows: List[Dict] = []
+    for name in args.only or BENCHMARKS:
+        print(f">>> {name}")
+        rows.extend(dict(r, commit=commit) for r in BENCHMARKS[name]())
+
+    print_table(rows)
+
+    if args.json:
+        with open(args.json, "a") as f:
+            for r in rows:
+                f.write(json.dumps(r) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,7 @@ Avaliação completa de:
 - Tolerância a falhas
 - Downtime percebido
 - Eleição Bully
+- Entrega ponta a ponta (do remetente a cada destinatário)
 
 O teste reutiliza o ChatClient real do projeto.
 """
@@ -32,13 +33,14 @@ if PROJECT_ROOT not in sys.path:
 
 import argparse
 import csv
+import re
 import signal
 import statistics
 import subprocess
 import time
 import threading
 import uuid
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import List, Optional, Dict
 
@@ -47,9 +49,14 @@ import grpc
 from proto import chat_server_pb2 as pb
 from proto import chat_server_pb2_grpc as pb_grpc
 from chat_client import ChatClient, parse_servers
+import results_store
+from fault_proxy import FaultProxy, LinkConfig
+from proc_stats import ProcSampler, cluster_usage
 
 SERVER_SCRIPT = "../chat_server.py"
 OUTPUT_DIR_ROOT = "results"
+# Espera (s), após o último envio, pelas entregas ainda em trânsito
+DELIVERY_GRACE_S = 2.0
 
 
 # ======================================================
@@ -65,8 +72,29 @@ SCENARIOS = [
      #"failover": False},
     {"name": "failover_5c", "clients": 5, "messages": 120, "interval": 0.05,
      "failover": True},
+    # Desligamento planejado do líder (Ctrl+C -> drenagem + handoff), como num rolling upgrade
+    {"name": "drain_5c", "clients": 5, "messages": 120, "interval": 0.05,
+     "failover": True, "graceful": True},
    # {"name": "failover_10c", "clients": 10, "messages": 100, "interval": 0.05,
     # "failover": True},
+    # Custo de latência de cada nível de confirmação de escrita (--ack-level)
+    {"name": "ack_leader", "clients": 5, "messages": 100, "interval": 0.05,
+     "failover": False, "ack_level": "leader"},
+    {"name": "ack_async", "clients": 5, "messages": 100, "interval": 0.05,
+     "failover": False, "ack_level": "async"},
+    {"name": "ack_majority", "clients": 5, "messages": 100, "interval": 0.05,
+     "failover": False, "ack_level": "majority"},
+    # Rede emulada pelo fault_proxy.py (atraso/jitter/perda por sentido de cada enlace)
+    {"name": "wan_5c", "clients": 5, "messages": 100, "interval": 0.05,
+     "failover": False, "network": {"delay": 0.025, "jitter": 0.005}},
+    {"name": "wan_majority", "clients": 5, "messages": 100, "interval": 0.05,
+     "failover": False, "ack_level": "majority", "network": {"delay": 0.025, "jitter": 0.005}},
+    {"name": "lossy_failover", "clients": 5, "messages": 120, "interval": 0.05,
+     "failover": True, "network": {"delay": 0.01, "jitter": 0.005, "loss": 0.01}},
+    # Partição: o líder fica isolado (dos peers e dos clientes) por 7s e depois volta
+    {"name": "partition_leader", "clients": 5, "messages": 200, "interval": 0.05,
+     "failover": False, "faults": [{"at": 3, "action": "isolate_leader"},
+                                   {"at": 10, "action": "heal"}]},
 ]
 
 # ======================================================
@@ -97,6 +125,21 @@ def safe_stdev(xs: List[float]) -> float:
     return statistics.stdev(xs) if len(xs) > 1 else 0.0
 
 
+def percentile(xs: List[float], p: float) -> float:
+    """Percentil p (0-100) pelo método do posto mais próximo."""
+    if not xs:
+        return 0.0
+    ys = sorted(xs)
+    k = max(int(round(p / 100.0 * len(ys))), 1)
+    return ys[k - 1]
+
+
+def max_gap(instants: List[float]) -> float:
+    """Maior intervalo entre dois instantes consecutivos (janela sem escritas)."""
+    xs = sorted(instants)
+    return max((b - a for a, b in zip(xs, xs[1:])), default=0.0)
+
+
 # ======================================================
 # Cluster
 # ======================================================
@@ -107,32 +150,61 @@ class ServerProc:
     proc: subprocess.Popen
 
 
-def start_cluster():
-    """Sobe um cluster fixo 3 nós (IDs 1..3) nas portas 50051..50053."""
-    cfg = [
-        (1, 50051, "2:127.0.0.1:50052,3:127.0.0.1:50053"),
-        (2, 50052, "1:127.0.0.1:50051,3:127.0.0.1:50053"),
-        (3, 50053, "1:127.0.0.1:50051,2:127.0.0.1:50052"),
-    ]
+# Cluster fixo de 3 nós: (ID, porta, peers)
+CLUSTER = [
+    (1, 50051, "2:127.0.0.1:50052,3:127.0.0.1:50053"),
+    (2, 50052, "1:127.0.0.1:50051,3:127.0.0.1:50053"),
+    (3, 50053, "1:127.0.0.1:50051,2:127.0.0.1:50052"),
+]
+
+
+def start_server(server_id: int, server_args: Optional[List[str]] = None,
+                 proxy: Optional[FaultProxy] = None) -> ServerProc:
+    """Sobe (ou reinicia) um nó do cluster fixo.
+    Com proxy, o nó fala com os peers pelas portas do proxy e anuncia aos
+    clientes as portas de clientes do proxy."""
+    _, port, peers = next(c for c in CLUSTER if c[0] == server_id)
+    if proxy is not None:
+        peers = proxy.peers_for(server_id)
+        server_args = [*(server_args or []), "--advertise", proxy.advertise()]
+    p = subprocess.Popen(
+        [
+            PYTHON_EXEC, SERVER_SCRIPT,
+            "--id", str(server_id),
+            "--port", str(port),
+            "--peers", peers,
+            *(server_args or []),
+        ],
+        stdout=None,
+        stderr=None
+    )
+    return ServerProc(server_id, p)
+
+
+def start_cluster(server_args: Optional[List[str]] = None, proxy: Optional[FaultProxy] = None,
+                  sampler: Optional[ProcSampler] = None):
+    """Sobe um cluster fixo 3 nós (IDs 1..3) nas portas 50051..50053.
+    server_args: argumentos extras repassados a todos os servidores.
+    proxy: FaultProxy já iniciado; todo o tráfego (entre nós e dos clientes)
+    passa por ele e os endereços retornados são os do proxy.
+    sampler: ProcSampler que passa a amostrar cada servidor em /proc."""
     procs: List[ServerProc] = []
     servers = []
-    for sid, port, peers in cfg:
-        p = subprocess.Popen(
-            [
-                PYTHON_EXEC, SERVER_SCRIPT,
-                "--id", str(sid),
-                "--port", str(port),
-                "--peers", peers
-            ],
-            stdout=None,
-            stderr=None
-        )
-        procs.append(ServerProc(sid, p))
-        servers.append(f"127.0.0.1:{port}")
+    for sid, port, _ in CLUSTER:
+        procs.append(start_server(sid, server_args, proxy))
+        if sampler is not None:
+            sampler.add(sid, procs[-1].proc.pid)
+        servers.append(proxy.link_addr(0, sid) if proxy else f"127.0.0.1:{port}")
         time.sleep(0.5)
     return procs, servers
 
 
+def cluster_proxy(network: Optional[Dict] = None, seed: Optional[int] = None) -> FaultProxy:
+    """FaultProxy na frente do cluster fixo; network: campos de LinkConfig."""
+    return FaultProxy({sid: port for sid, port, _ in CLUSTER},
+                      default=LinkConfig(**(network or {})), seed=seed).start()
+
+
 def stop_cluster(procs: List[ServerProc]):
     for sp in procs:
         if sp.proc.poll() is None:
@@ -157,11 +229,82 @@ def stop_cluster(procs: List[ServerProc]):
 class ScenarioMetrics:
     """Container de métricas com acesso protegido por lock externo."""
     latencias: List[float]
+    sucessos: List[float] = field(default_factory=list)  # instantes de envios bem-sucedidos
     falhas_send: int = 0
     downtime_inicio: Optional[float] = None
     downtime_fim: Optional[float] = None
 
 
+class DeliveryTracker:
+    """Entrega ponta a ponta: do envio até cada outro cliente receber a mensagem.
+
+    Cada mensagem leva no conteúdo uma marca com o cliente remetente, um
+    número de sequência e o instante de envio (tag). Os ChatClients dos
+    workers repassam o que recebem (on_message) e aqui se calculam:
+    - latência por destinatário: recebimento - envio
+    - espalhamento do fan-out: último - primeiro destinatário a receber
+    - duplicatas: mesma mensagem recebida mais de uma vez pelo mesmo cliente
+    - perdas: envio confirmado que algum cliente conectado nunca recebeu
+    """
+
+    TAG_RE = re.compile(r"\[e2e c=(\d+) s=(\d+) t=([\d.]+)\]")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.receivers = set()  # workers inscritos (recebem as mensagens dos outros)
+        self.sent: Dict[tuple, float] = {}  # (cid, seq) -> envio, só envios confirmados
+        self.received: Dict[tuple, Dict[int, float]] = {}  # (cid, seq) -> {receptor: recebimento}
+        self.duplicates = 0
+
+    @staticmethod
+    def tag(cid: int, seq: int) -> str:
+        return f"[e2e c={cid} s={seq} t={time.time():.6f}]"
+
+    def register(self, cid: int) -> None:
+        with self._lock:
+            self.receivers.add(cid)
+
+    def on_sent(self, cid: int, seq: int, content: str) -> None:
+        m = self.TAG_RE.search(content)
+        with self._lock:
+            self.sent[(cid, seq)] = float(m.group(3))
+
+    def on_message(self, receiver: int, msg) -> None:
+        now = time.time()
+        m = self.TAG_RE.search(msg.content)
+        if m is None:
+            return
+        key = (int(m.group(1)), int(m.group(2)))
+        if key[0] == receiver:
+            return  # eco da própria mensagem
+        with self._lock:
+            per_receiver = self.received.setdefault(key, {})
+            if receiver in per_receiver:
+                self.duplicates += 1
+                return
+            per_receiver[receiver] = now - float(m.group(3))
+
+    def summary(self) -> Dict:
+        with self._lock:
+            latencies = [lat for rec in self.received.values() for lat in rec.values()]
+            skews = [max(rec.values()) - min(rec.values())
+                     for rec in self.received.values() if len(rec) > 1]
+            lost = 0
+            for (cid, seq) in self.sent:
+                expected = self.receivers - {cid}
+                lost += len(expected - set(self.received.get((cid, seq), {})))
+            return {
+                "entregas": len(latencies),
+                "e2e_p50": percentile(latencies, 50),
+                "e2e_p99": percentile(latencies, 99),
+                "e2e_max": safe_max(latencies),
+                "fanout_skew_p50": percentile(skews, 50),
+                "fanout_skew_p99": percentile(skews, 99),
+                "duplicadas": self.duplicates,
+                "perdidas": lost,
+            }
+
+
 # ======================================================
 # Cliente worker
 # ======================================================
@@ -177,6 +320,8 @@ class ClientWorker(threading.Thread):
         metrics: ScenarioMetrics,
         metrics_lock: threading.Lock,
         stop_event: threading.Event,
+        tracker: DeliveryTracker,
+        close_event: threading.Event,
         connect_timeout_s: float = 5.0,
     ):
         super().__init__(daemon=True)
@@ -188,13 +333,23 @@ class ClientWorker(threading.Thread):
         self.metrics = metrics
         self.metrics_lock = metrics_lock
         self.stop_event = stop_event
+        self.tracker = tracker
+        self.close_event = close_event  # fecha o cliente só quando todos terminaram de enviar
+        self.sent_all = threading.Event()
         self.connect_timeout_s = connect_timeout_s
 
     def run(self):
-        client = ChatClient(self.servers)
+        try:
+            self._run()
+        finally:
+            self.sent_all.set()
+
+    def _run(self):
+        client = ChatClient(self.servers, on_message=lambda msg: self.tracker.on_message(self.cid, msg))
 
+        # Espera o ID ser atribuído: só então a assinatura está registrada no líder
         start = time.time()
-        while not getattr(client, "_connected", False):
+        while not getattr(client, "_connected", False) or client._client_id is None:
             if self.stop_event.is_set():
                 client.close()
                 return
@@ -209,17 +364,26 @@ class ClientWorker(threading.Thread):
         except threading.BrokenBarrierError:
             client.close()
             return
+        self.tracker.register(self.cid)
 
         for i in range(self.msgs):
             if self.stop_event.is_set():
                 break
 
             try:
+                content = f"[teste] cliente {self.cid} msg {i} {DeliveryTracker.tag(self.cid, i)}"
                 t0 = time.time()
-                client.send(f"[teste] cliente {self.cid} msg {i}")
+                resp = client.send(content)
                 t1 = time.time()
                 with self.metrics_lock:
                     self.metrics.latencias.append(t1 - t0)
+                    # Ex.: timeout aguardando a maioria no nível de confirmação "majority"
+                    if resp is not None and not resp.success:
+                        self.metrics.falhas_send += 1
+                    elif resp is not None:
+                        self.metrics.sucessos.append(t1)
+                if resp is not None and resp.success:
+                    self.tracker.on_sent(self.cid, i, content)
             except Exception:
                 now = time.time()
                 with self.metrics_lock:
@@ -231,6 +395,9 @@ class ClientWorker(threading.Thread):
 
             time.sleep(self.intervalo)
 
+        # Continua recebendo as mensagens dos outros até o fim do cenário
+        self.sent_all.set()
+        self.close_event.wait(timeout=120)
         client.close()
 
 
@@ -265,7 +432,11 @@ def kill_leader_after(
     metrics: ScenarioMetrics,
     metrics_lock: threading.Lock,
     stop_event: threading.Event,
+    graceful: bool = False,
 ) -> None:
+    """Derruba o líder após delay_s segundos.
+    graceful=False simula uma falha (SIGKILL); graceful=True simula um
+    desligamento planejado (SIGINT), em que o líder drena e transfere a liderança."""
     if cluster is None:
         return
 
@@ -281,7 +452,10 @@ def kill_leader_after(
     for sp in cluster:
         if sp.server_id == leader_id and sp.proc.poll() is None:
             try:
-                sp.proc.send_signal(signal.SIGINT)
+                if graceful:
+                    sp.proc.send_signal(signal.SIGINT)
+                else:
+                    sp.proc.kill()
             except Exception:
                 pass
             break
@@ -302,13 +476,19 @@ def kill_leader_after(
 # ======================================================
 
 def run_scenario(execute_id: str, clientes: int, msgs: int, intervalo: float,
-                 failover: bool):
-    cluster, servers = start_cluster()
+                 failover: bool, ack_level: str = "leader", graceful: bool = False,
+                 network: Optional[Dict] = None, faults: Optional[List[Dict]] = None):
+    # Rede emulada (atraso, perda, banda) e/ou roteiro de partições: cluster atrás do proxy
+    proxy = cluster_proxy(network) if (network or faults) else None
+    sampler = ProcSampler().start()
+    cluster, servers = start_cluster(["--ack-level", ack_level], proxy, sampler)
     time.sleep(2)
 
     metrics = ScenarioMetrics(latencias=[])
     metrics_lock = threading.Lock()
     stop_event = threading.Event()
+    tracker = DeliveryTracker()
+    close_event = threading.Event()
 
     barrier = threading.Barrier(parties=clientes)
 
@@ -322,6 +502,8 @@ def run_scenario(execute_id: str, clientes: int, msgs: int, intervalo: float,
             metrics=metrics,
             metrics_lock=metrics_lock,
             stop_event=stop_event,
+            tracker=tracker,
+            close_event=close_event,
         )
         for i in range(clientes)
     ]
@@ -330,33 +512,58 @@ def run_scenario(execute_id: str, clientes: int, msgs: int, intervalo: float,
     if failover:
         failover_thread = threading.Thread(
             target=kill_leader_after,
-            args=(3, servers, cluster, metrics, metrics_lock, stop_event),
+            args=(3, servers, cluster, metrics, metrics_lock, stop_event, graceful),
             daemon=True,
         )
         failover_thread.start()
 
+    faults_thread = None
+    if faults:
+        faults_thread = threading.Thread(
+            target=proxy.run_script,
+            args=(faults, lambda: _get_leader_id(servers, timeout_s=1.0), stop_event),
+            daemon=True,
+        )
+        faults_thread.start()
+
+    # Início da janela de recursos: antes dos clientes se inscreverem
+    t_recursos = time.time()
+    sampler.sample_now()
     t0 = time.time()
     for w in workers:
         w.start()
     for w in workers:
-        w.join(timeout=60)
+        w.sent_all.wait(timeout=60)
 
     stop_event.set()
-    for w in workers:
-        if w.is_alive():
-            w.join(timeout=2)
-
     if failover_thread:
         failover_thread.join(timeout=10)
+    if faults_thread:
+        faults_thread.join(timeout=10)
+        # Cura o que o roteiro deixou particionado para as entregas pendentes chegarem
+        proxy.heal()
 
     t1 = time.time()
 
+    # Entregas ainda em trânsito chegam durante a espera; depois os clientes fecham
+    time.sleep(DELIVERY_GRACE_S)
+    close_event.set()
+    for w in workers:
+        w.join(timeout=5)
+    entrega = tracker.summary()
+    sampler.sample_now()
+    sampler.stop()
+    por_servidor = sampler.summary(t_recursos, time.time())
+
     with metrics_lock:
         lat = list(metrics.latencias)
+        sucessos = list(metrics.sucessos)
         falhas = int(metrics.falhas_send)
         dt_ini = metrics.downtime_inicio
         dt_fim = metrics.downtime_fim
 
+    recursos = cluster_usage(por_servidor, messages=len(sucessos), subscribers=clientes)
+
     downtime = 0.0
     if dt_ini is not None and dt_fim is not None and dt_fim >= dt_ini:
         downtime = dt_fim - dt_ini
@@ -366,20 +573,29 @@ def run_scenario(execute_id: str, clientes: int, msgs: int, intervalo: float,
 
     if cluster:
         stop_cluster(cluster)
+    if proxy is not None:
+        proxy.stop()
 
     return {
         "execute_id": execute_id,
         "clientes": clientes,
         "mensagens": msgs,
         "intervalo": intervalo,
+        "ack_level": ack_level,
         "tempo_total": tempo_total,
         "total_msgs": total_msgs,
         "vazao": total_msgs / tempo_total,
         "lat_media": safe_mean(lat),
+        "lat_p50": percentile(lat, 50),
+        "lat_p90": percentile(lat, 90),
+        "lat_p99": percentile(lat, 99),
         "lat_min": safe_min(lat),
         "lat_max": safe_max(lat),
         "lat_desvio": safe_stdev(lat),
-        "falhas_send": falhas
+        "falhas_send": falhas,
+        "janela_sem_escrita": max_gap(sucessos),
+        **entrega,
+        **recursos,
     }
 
 def print_summary_table(rows):
@@ -388,11 +604,12 @@ def print_summary_table(rows):
         "Lat. média (ms)",
         "Desvio (ms)",
         "Vazão (msgs/s)",
-        "Falhas (envio)"
+        "Falhas (envio)",
+        "Sem escrita (s)",
     ]
 
-    line = "-" * 78
-    fmt = "{:<20} {:>15} {:>12} {:>15} {:>12}"
+    line = "-" * 94
+    fmt = "{:<20} {:>15} {:>12} {:>15} {:>12} {:>15}"
 
     print("\nTabela 1. Métricas de desempenho consolidadas por cenário.")
     print(line)
@@ -405,18 +622,141 @@ def print_summary_table(rows):
             f"{r['lat_media']*1000:.2f}",
             f"{r['lat_desvio']*1000:.2f}",
             f"{r['vazao']:.2f}",
-            f"{r['falhas_send']}"
+            f"{r['falhas_send']}",
+            f"{r['janela_sem_escrita']:.2f}",
         ))
 
     print(line)
 
 
+def print_delivery_table(rows):
+    headers = [
+        "Cenário",
+        "Entregas",
+        "E2E p50 (ms)",
+        "E2E p99 (ms)",
+        "E2E max (ms)",
+        "Skew p99 (ms)",
+        "Dupl.",
+        "Perdas",
+    ]
+
+    line = "-" * 104
+    fmt = "{:<20} {:>9} {:>13} {:>13} {:>13} {:>14} {:>7} {:>8}"
+
+    print("\nTabela 2. Entrega ponta a ponta (envio -> recebimento em cada outro cliente).")
+    print(line)
+    print(fmt.format(*headers))
+    print(line)
+
+    for r in rows:
+        print(fmt.format(
+            r["cenario"],
+            r["entregas"],
+            f"{r['e2e_p50']*1000:.2f}",
+            f"{r['e2e_p99']*1000:.2f}",
+            f"{r['e2e_max']*1000:.2f}",
+            f"{r['fanout_skew_p99']*1000:.2f}",
+            r["duplicadas"],
+            r["perdidas"],
+        ))
+
+    print(line)
+
+
+def print_resource_table(rows):
+    """Eficiência dos servidores (amostrados em /proc) ao lado da vazão."""
+    headers = [
+        "Cenário",
+        "Vazão (msgs/s)",
+        "CPU/msg (ms)",
+        "CPU máx (%)",
+        "Pico (%)",
+        "RSS máx (MiB)",
+        "Bytes/assin.",
+        "Threads",
+        "CS invol.",
+    ]
+
+    line = "-" * 116
+    fmt = "{:<20} {:>15} {:>13} {:>12} {:>9} {:>14} {:>13} {:>8} {:>10}"
+
+    print("\nTabela 4. Recursos dos servidores (/proc): CPU de todos os nós por mensagem confirmada,")
+    print("maior uso médio e pico de CPU de um nó (100% = um núcleo), crescimento de RSS por assinante.")
+    print(line)
+    print(fmt.format(*headers))
+    print(line)
+
+    for r in rows:
+        print(fmt.format(
+            r["cenario"],
+            f"{r['vazao']:.2f}",
+            f"{r['cpu_por_msg_ms']:.3f}",
+            f"{r['cpu_max_pct']:.1f}",
+            f"{r['cpu_pico_pct']:.1f}",
+            f"{r['rss_max_mb']:.1f}",
+            f"{r['bytes_por_assinante']:.0f}",
+            int(r["threads_max"]),
+            int(r["cs_involuntarias"]),
+        ))
+
+    print(line)
+
+
+def print_ci_table(rows):
+    """Média e IC 95% das principais métricas quando há várias rodadas por cenário."""
+    headers = [
+        "Cenário",
+        "Rodadas",
+        "Vazão (msgs/s)",
+        "Lat. p50 (ms)",
+        "Lat. p99 (ms)",
+        "Sem escrita (s)",
+    ]
+
+    line = "-" * 110
+    fmt = "{:<20} {:>8} {:>19} {:>19} {:>19} {:>19}"
+
+    print("\nTabela 3. Média ± IC 95% entre rodadas (t de Student).")
+    print(line)
+    print(fmt.format(*headers))
+    print(line)
+
+    groups: Dict[str, List[Dict]] = {}
+    for r in rows:
+        groups.setdefault(r["cenario"], []).append(r)
+    for cenario, rs in groups.items():
+        cells = []
+        for key, scale in (("vazao", 1.0), ("lat_p50", 1000.0), ("lat_p99", 1000.0),
+                           ("janela_sem_escrita", 1.0)):
+            mean, half = results_store.mean_ci([r[key] * scale for r in rs])
+            cells.append(f"{mean:.2f} ± {half:.2f}")
+        print(fmt.format(cenario, len(rs), *cells))
+
+    print(line)
+
 
 # ======================================================
 # Main
 # ======================================================
 
 def main():
+    parser = argparse.ArgumentParser(description="Avaliação de desempenho do chat distribuído")
+    parser.add_argument("--scenarios", nargs="+", choices=[s["name"] for s in SCENARIOS],
+                        help="Executa apenas os cenários indicados")
+    parser.add_argument("--trials", type=int, default=1,
+                        help="Rodadas medidas por cenário (para média e intervalo de confiança)")
+    parser.add_argument("--warmup-trials", type=int, default=0,
+                        help="Rodadas de aquecimento por cenário, descartadas")
+    parser.add_argument("--db", type=str, default=results_store.DEFAULT_DB,
+                        help="Banco JSONL onde cada rodada é acrescentada (ver results_store.py)")
+    parser.add_argument("--no-db", action="store_true",
+                        help="Não registra as rodadas no banco de resultados")
+    args = parser.parse_args()
+    if args.trials < 1:
+        parser.error("--trials deve ser pelo menos 1")
+    if args.warmup_trials < 0:
+        parser.error("--warmup-trials não pode ser negativo")
 
     eid = exec_id()
     out_dir = os.path.join(OUTPUT_DIR_ROOT, eid)
@@ -427,27 +767,46 @@ def main():
     print("=" * 50)
 
     for s in SCENARIOS:
+        if args.scenarios and s["name"] not in args.scenarios:
+            continue
         print(f"\n>>> Cenário: {s['name']}")
 
-        result = run_scenario(
-            execute_id=eid,
-            clientes=s["clients"],
-            msgs=s["messages"],
-            intervalo=s["interval"],
-            failover=s["failover"]
-        )
+        trials: List[Dict] = []
+        for trial in range(args.warmup_trials + args.trials):
+            warmup = trial < args.warmup_trials
+            if args.warmup_trials or args.trials > 1:
+                label = "aquecimento" if warmup else f"rodada {trial - args.warmup_trials}"
+                print(f"\n--- {label}")
+
+            result = run_scenario(
+                execute_id=eid,
+                clientes=s["clients"],
+                msgs=s["messages"],
+                intervalo=s["interval"],
+                failover=s["failover"],
+                ack_level=s.get("ack_level", "leader"),
+                graceful=s.get("graceful", False),
+                network=s.get("network"),
+                faults=s.get("faults"),
+            )
+            time.sleep(2)
+            if warmup:
+                continue
 
-        result["cenario"] = s["name"]
-        consolidated.append(result)
+            result["cenario"] = s["name"]
+            result["rodada"] = trial - args.warmup_trials
+            trials.append(result)
+
+        consolidated.extend(trials)
+        if not args.no_db:
+            results_store.append(trials, eid, "performance_analysis", args.db)
         scenario_dir = os.path.join(out_dir, s["name"])
         mkdir(scenario_dir)
         with open(os.path.join(scenario_dir, "resultados.csv"), "w",
                   newline="") as f:
-            w = csv.DictWriter(f, fieldnames=result.keys())
+            w = csv.DictWriter(f, fieldnames=trials[0].keys())
             w.writeheader()
-            w.writerow(result)
-
-        time.sleep(2)
+            w.writerows(trials)
 
     # CSV consolidado
     consolidated_csv = os.path.join(out_dir, "resultados_consolidados.csv")
@@ -459,6 +818,13 @@ def main():
     print("\nExecução finalizada.")
     print(f"Resultados em: {out_dir}")
     print_summary_table(consolidated)
+    print_delivery_table(consolidated)
+    if args.trials > 1:
+        print_ci_table(consolidated)
+    print_resource_table(consolidated)
+    if not args.no_db:
+        print(f"\nRodadas registradas em {args.db} (execução {eid}); compare com:")
+        print(f"    python results_store.py compare <base> {eid}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Amostragem de recursos dos processos servidores via /proc (só Linux).
+
+Vazão e latência não dizem por que o líder parou de escalar. Aqui cada
+servidor é lido periodicamente em /proc/<pid>:
+
+- tempo de CPU (usuário + sistema, todas as threads): perto de 100% de um
+  núcleo, o código Python está no limite do GIL;
+- RSS (memória residente);
+- número de threads (o pool do gRPC tem --max-workers; cada assinante
+  ocupa uma);
+- trocas de contexto voluntárias (esperas: locks, filas, rede) e
+  involuntárias (preempção: CPU disputada), somadas por thread em
+  /proc/<pid>/task.
+
+performance_analysis.py registra os servidores de start_cluster e reporta,
+ao lado da vazão, a CPU por mensagem e o crescimento de RSS por assinante.
+
+Uso isolado (servidores iniciados à mão):
+    python proc_stats.py --pids 1234 1235 1236 [--duration 30] [--interval 0.25]
+"""
+
+import os
+import sys
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+# Colunas de cluster_usage (acrescentadas a cada rodada de performance_analysis.py)
+USAGE_KEYS = ("cpu_total_s", "cpu_por_msg_ms", "cpu_max_pct", "cpu_pico_pct", "rss_max_mb",
+              "bytes_por_assinante", "threads_max", "cs_voluntarias", "cs_involuntarias")
+
+
+@dataclass
+class ProcSample:
+    t: float           # time.time() da leitura
+    cpu: float         # segundos de CPU acumulados (usuário + sistema)
+    rss: int           # bytes
+    threads: int
+    ctx_vol: int       # trocas de contexto voluntárias (threads vivas)
+    ctx_invol: int     # trocas de contexto involuntárias (threads vivas)
+
+
+def _status_fields(path: str) -> Dict[str, str]:
+    fields = {}
+    with open(path) as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            fields[key] = value.strip()
+    return fields
+
+
+def read_proc(pid: int) -> Optional[ProcSample]:
+    """Lê o processo em /proc; None se ele não existe mais (ou virou zumbi)."""
+    now = time.time()
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+        # O nome do executável (campo 2) pode ter espaços: o resto vem depois do ")"
+        rest = stat[stat.rindex(")") + 2:].split()
+        if rest[0] == "Z":
+            return None
+        cpu = (int(rest[11]) + int(rest[12])) / CLK_TCK  # utime, stime (campos 14 e 15)
+        status = _status_fields(f"/proc/{pid}/status")
+        ctx_vol = ctx_invol = 0
+        # Em /proc/<pid>/status as trocas de contexto são só da thread principal
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            try:
+                task = _status_fields(f"/proc/{pid}/task/{tid}/status")
+            except OSError:
+                continue  # a thread terminou durante a leitura
+            ctx_vol += int(task.get("voluntary_ctxt_switches", 0))
+            ctx_invol += int(task.get("nonvoluntary_ctxt_switches", 0))
+    except (OSError, ValueError, IndexError):
+        return None
+    return ProcSample(
+        t=now,
+        cpu=cpu,
+        rss=int(status.get("VmRSS", "0 kB").split()[0]) * 1024,
+        threads=int(status.get("Threads", 0)),
+        ctx_vol=ctx_vol,
+        ctx_invol=ctx_invol,
+    )
+
+
+class ProcSampler:
+    """Amostra periodicamente um conjunto de processos numa thread própria."""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._procs: Dict[int, str] = {}                 # pid -> rótulo (ex.: ID do servidor)
+        self._samples: Dict[int, List[ProcSample]] = {}  # pid -> amostras em ordem
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, label, pid: int) -> None:
+        with self._lock:
+            self._procs[pid] = str(label)
+            self._samples.setdefault(pid, [])
+        self._sample(pid)
+
+    def start(self) -> "ProcSampler":
+        self._thread = threading.Thread(target=self._loop, name="proc-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample_now()
+
+    def _sample(self, pid: int) -> None:
+        s = read_proc(pid)
+        if s is not None:
+            with self._lock:
+                self._samples[pid].append(s)
+
+    def sample_now(self) -> None:
+        """Lê todos os processos agora (ex.: nas bordas da janela medida)."""
+        with self._lock:
+            pids = list(self._procs)
+        for pid in pids:
+            self._sample(pid)
+
+    def summary(self, since: float, until: float) -> Dict[str, Dict]:
+        """Uso de cada processo entre since e until (time.time()), pela 1ª e última amostra."""
+        out = {}
+        with self._lock:
+            items = [(pid, label, list(self._samples[pid])) for pid, label in self._procs.items()]
+        for pid, label, samples in items:
+            window = [s for s in samples if since <= s.t <= until]
+            if len(window) < 2:
+                continue
+            first, last = window[0], window[-1]
+            elapsed = max(last.t - first.t, 1e-9)
+            # Pico entre amostras separadas de pelo menos um intervalo: a CPU é contada em
+            # ticks (10ms com CLK_TCK=100) e intervalos curtos dariam picos espúrios
+            spaced = [first]
+            for s in window[1:]:
+                if s.t - spaced[-1].t >= self.interval:
+                    spaced.append(s)
+            if len(spaced) < 2:
+                spaced = [first, last]
+            peak = max((b.cpu - a.cpu) / max(b.t - a.t, 1e-9) for a, b in zip(spaced, spaced[1:]))
+            key = label if label not in out else f"{label} (pid {pid})"
+            out[key] = {
+                "pid": pid,
+                "duracao": elapsed,
+                "cpu_s": last.cpu - first.cpu,
+                "cpu_pct": 100.0 * (last.cpu - first.cpu) / elapsed,
+                "cpu_pico_pct": 100.0 * peak,
+                "rss_inicio": first.rss,
+                "rss_max": max(s.rss for s in window),
+                "threads_max": max(s.threads for s in window),
+                # Threads que terminaram levam as suas contagens: o delta pode subestimar
+                "cs_voluntarias": max(last.ctx_vol - first.ctx_vol, 0),
+                "cs_involuntarias": max(last.ctx_invol - first.ctx_invol, 0),
+            }
+        return out
+
+
+def cluster_usage(per_proc: Dict[str, Dict], messages: int, subscribers: int) -> Dict:
+    """Eficiência do cluster numa janela: CPU por mensagem e bytes por assinante.
+
+    bytes_por_assinante vem do servidor que mais cresceu em RSS (o líder, que
+    guarda uma fila e uma thread por assinante); inclui também o histórico
+    acumulado na janela, então é um teto.
+    """
+    if not per_proc:
+        # Sem /proc (fora do Linux): mesmas colunas, zeradas
+        return dict.fromkeys(USAGE_KEYS, 0.0)
+    cpu_total = sum(p["cpu_s"] for p in per_proc.values())
+    growth = max(p["rss_max"] - p["rss_inicio"] for p in per_proc.values())
+    return {
+        "cpu_total_s": cpu_total,
+        "cpu_por_msg_ms": 1000.0 * cpu_total / messages if messages else 0.0,
+        "cpu_max_pct": max(p["cpu_pct"] for p in per_proc.values()),
+        "cpu_pico_pct": max(p["cpu_pico_pct"] for p in per_proc.values()),
+        "rss_max_mb": max(p["rss_max"] for p in per_proc.values()) / 2 ** 20,
+        "bytes_por_assinante": max(growth, 0) / subscribers if subscribers else 0.0,
+        "threads_max": max(p["threads_max"] for p in per_proc.values()),
+        "cs_voluntarias": sum(p["cs_voluntarias"] for p in per_proc.values()),
+        "cs_involuntarias": sum(p["cs_involuntarias"] for p in per_proc.values()),
+    }
+
+
+# ======================================================
+# Relatório
+# ======================================================
+
+def print_table(per_proc: Dict[str, Dict]) -> None:
+    line = "-" * 100
+    fmt = "{:<14} {:>8} {:>9} {:>8} {:>9} {:>11} {:>8} {:>12} {:>12}"
+    print(line)
+    print(fmt.format("Processo", "PID", "CPU (s)", "CPU %", "Pico %", "RSS máx MiB",
+                     "Threads", "CS volunt.", "CS involunt."))
+    print(line)
+    for label, p in per_proc.items():
+        print(fmt.format(label[:14], p["pid"], f"{p['cpu_s']:.2f}", f"{p['cpu_pct']:.1f}",
+                         f"{p['cpu_pico_pct']:.1f}", f"{p['rss_max'] / 2 ** 20:.1f}",
+                         p["threads_max"], p["cs_voluntarias"], p["cs_involuntarias"]))
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uso de CPU, memória, threads e trocas de contexto via /proc")
+    parser.add_argument("--pids", type=int, nargs="+", required=True, help="Processos a amostrar")
+    parser.add_argument("--interval", type=float, default=0.25, help="Intervalo entre amostras (s)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Duração da amostragem (s)")
+    parser.add_argument("--json", type=str, default=None,
+                        help="Arquivo JSONL onde o resumo por processo é acrescentado")
+    args = parser.parse_args()
+
+    sampler = ProcSampler(args.interval)
+    for pid in args.pids:
+        sampler.add(pid, pid)
+    t0 = time.time()
+    sampler.start()
+    try:
+        time.sleep(args.duration)
+    except KeyboardInterrupt:
+        pass
+    sampler.stop()
+    sampler.sample_now()
+    per_proc = sampler.summary(t0 - 1.0, time.time())
+    print_table(per_proc)
+
+    if args.json:
+        with open(args.json, "a") as f:
+            for p in per_proc.values():
+                f.write(json.dumps(p) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Banco de resultados dos experimentos e comparação entre execuções.
+
+performance_analysis.py e failover_benchmark.py acrescentam cada rodada a
+um banco local em JSONL (results/resultados.jsonl), com a execução, o
+commit do git, o script, o cenário e o número da rodada. Com várias
+rodadas por cenário dá para estimar a variância:
+
+- summary: média e intervalo de confiança de 95% (t de Student) de cada
+  métrica, por cenário;
+- compare: compara duas execuções (ou dois commits: todas as execuções do
+  commit são somadas) cenário a cenário. Cada métrica passa por um teste de
+  permutação da diferença das médias; uma regressão é sinalizada quando a
+  diferença é significativa (p < --alpha) E piora mais que --threshold. O
+  código de saída é 1 se houver regressão (útil em CI).
+
+Com poucas rodadas o teste não tem poder: com 3 contra 3 o menor p
+possível é 0.1. Use pelo menos 5 rodadas de cada lado.
+
+Uso (dentro de experiments/):
+    python results_store.py list
+    python results_store.py summary <execucao|commit>
+    python results_store.py compare <base> <nova> [--alpha 0.05] [--threshold 0.05]
+"""
+
+import os
+import sys
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import itertools
+import json
+import math
+import random
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+DEFAULT_DB = os.path.join("results", "resultados.jsonl")
+
+# Métricas comparadas: +1 = maior é melhor, -1 = menor é melhor
+METRICS = {
+    # performance_analysis.py
+    "vazao": +1,
+    "lat_media": -1,
+    "lat_p50": -1,
+    "lat_p90": -1,
+    "lat_p99": -1,
+    "lat_max": -1,
+    "falhas_send": -1,
+    "janela_sem_escrita": -1,
+    "e2e_p50": -1,
+    "e2e_p99": -1,
+    "fanout_skew_p99": -1,
+    "perdidas": -1,
+    "cpu_por_msg_ms": -1,
+    "cpu_max_pct": -1,
+    "bytes_por_assinante": -1,
+    # failover_benchmark.py (segundos após a queda do líder)
+    "deteccao": -1,
+    "primeiro_election": -1,
+    "coordinator": -1,
+    "lider_conhecido": -1,
+    "primeiro_envio_ok": -1,
+    "primeira_entrega": -1,
+}
+
+# Valores críticos da t de Student bicaudal a 95%, por graus de liberdade
+_T95 = [(1, 12.706), (2, 4.303), (3, 3.182), (4, 2.776), (5, 2.571), (6, 2.447), (7, 2.365),
+        (8, 2.306), (9, 2.262), (10, 2.228), (12, 2.179), (15, 2.131), (20, 2.086),
+        (25, 2.060), (30, 2.042), (60, 2.000), (120, 1.980)]
+
+
+# ======================================================
+# Banco (JSONL)
+# ======================================================
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def append(rows: List[Dict], execucao: str, script: str, path: str = DEFAULT_DB) -> None:
+    """Acrescenta as rodadas ao banco, marcadas com execução, commit, script e data."""
+    meta = {"execucao": execucao, "commit": git_commit(), "script": script,
+            "data": datetime.now().isoformat(timespec="seconds")}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        for r in rows:
+            f.write(json.dumps({**meta, **r}) + "\n")
+
+
+def load(path: str = DEFAULT_DB) -> List[Dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def select(records: List[Dict], ref: str) -> List[Dict]:
+    """Rodadas de uma execução (ID exato) ou de um commit (prefixo do hash)."""
+    rows = [r for r in records if r.get("execucao") == ref]
+    if not rows:
+        rows = [r for r in records if r.get("commit") and r["commit"].startswith(ref)]
+    return rows
+
+
+def group(rows: List[Dict]) -> Dict[Tuple[str, str], List[Dict]]:
+    groups: Dict[Tuple[str, str], List[Dict]] = {}
+    for r in rows:
+        groups.setdefault((r.get("script", ""), str(r.get("cenario", ""))), []).append(r)
+    return groups
+
+
+def values(rows: List[Dict], metric: str) -> List[float]:
+    return [float(r[metric]) for r in rows if isinstance(r.get(metric), (int, float))]
+
+
+# ======================================================
+# Estatística
+# ======================================================
+
+def t_critical(df: int) -> float:
+    if df >= 1000:
+        return 1.960
+    for d, t in reversed(_T95):
+        if df >= d:
+            return t
+    return _T95[0][1]
+
+
+def mean_ci(xs: List[float]) -> Tuple[float, float]:
+    """Média e meia largura do intervalo de confiança de 95%."""
+    if not xs:
+        return 0.0, 0.0
+    if len(xs) < 2:
+        return xs[0], float("inf")
+    return statistics.mean(xs), t_critical(len(xs) - 1) * statistics.stdev(xs) / math.sqrt(len(xs))
+
+
+def permutation_test(a: List[float], b: List[float], iterations: int = 10000, seed: int = 0) -> float:
+    """p-valor bicaudal da diferença das médias (exato se houver poucas permutações)."""
+    if not a or not b:
+        return 1.0
+    pooled = a + b
+    n = len(a)
+    observed = abs(statistics.mean(b) - statistics.mean(a))
+    total = sum(pooled)
+
+    def diff(idx_a) -> float:
+        sa = sum(pooled[i] for i in idx_a)
+        return abs((total - sa) / len(b) - sa / n)
+
+    eps = 1e-12 * max(1.0, observed)
+    if math.comb(len(pooled), n) <= iterations:
+        splits = list(itertools.combinations(range(len(pooled)), n))
+        return sum(1 for idx in splits if diff(idx) >= observed - eps) / len(splits)
+    rng = random.Random(seed)
+    indices = list(range(len(pooled)))
+    hits = sum(1 for _ in range(iterations) if diff(rng.sample(indices, n)) >= observed - eps)
+    return (hits + 1) / (iterations + 1)
+
+
+def compare(base: List[Dict], new: List[Dict], alpha: float, threshold: float) -> List[Dict]:
+    base_groups = group(base)
+    new_groups = group(new)
+    out = []
+    for key in sorted(set(base_groups) & set(new_groups)):
+        for metric, direction in METRICS.items():
+            a = values(base_groups[key], metric)
+            b = values(new_groups[key], metric)
+            if not a or not b:
+                continue
+            ma, mb = statistics.mean(a), statistics.mean(b)
+            if ma:
+                change = (mb - ma) / abs(ma)
+            else:
+                change = 0.0 if mb == ma else math.copysign(float("inf"), mb - ma)
+            p = permutation_test(a, b)
+            worse = change * direction < -threshold
+            better = change * direction > threshold
+            out.append({
+                "script": key[0],
+                "cenario": key[1],
+                "metrica": metric,
+                "n_base": len(a),
+                "n_nova": len(b),
+                "base": ma,
+                "nova": mb,
+                "variacao": change,
+                "p": p,
+                "regressao": worse and p < alpha,
+                "melhora": better and p < alpha,
+            })
+    return out
+
+
+# ======================================================
+# Relatórios
+# ======================================================
+
+def print_executions(records: List[Dict]) -> None:
+    execs: Dict[str, Dict] = {}
+    for r in records:
+        e = execs.setdefault(r.get("execucao", "?"), {"commit": r.get("commit", ""),
+                                                     "script": r.get("script", ""),
+                                                     "data": r.get("data", ""),
+                                                     "rodadas": 0, "cenarios": set()})
+        e["rodadas"] += 1
+        e["cenarios"].add(str(r.get("cenario", "")))
+    line = "-" * 112
+    fmt = "{:<42} {:<9} {:<22} {:<20} {:>8} {:>8}"
+    print(line)
+    print(fmt.format("Execução", "Commit", "Script", "Data", "Cenários", "Rodadas"))
+    print(line)
+    for eid, e in execs.items():
+        print(fmt.format(eid, e["commit"], e["script"], e["data"], len(e["cenarios"]), e["rodadas"]))
+    print(line)
+
+
+def print_summary(rows: List[Dict]) -> None:
+    line = "-" * 88
+    fmt = "{:<24} {:<20} {:>8} {:>14} {:>14} {:>5}"
+    print(line)
+    print(fmt.format("Cenário", "Métrica", "Rodadas", "Média", "IC 95% (±)", "±%"))
+    print(line)
+    for (script, cenario), rs in sorted(group(rows).items()):
+        for metric in METRICS:
+            xs = values(rs, metric)
+            if not xs:
+                continue
+            mean, half = mean_ci(xs)
+            rel = f"{100 * half / abs(mean):.0f}" if mean and math.isfinite(half) else "-"
+            print(fmt.format(cenario[:24], metric, len(xs), f"{mean:.4g}",
+                             f"{half:.3g}" if math.isfinite(half) else "-", rel))
+    print(line)
+
+
+def print_comparison(results: List[Dict], show_all: bool = False) -> None:
+    line = "-" * 104
+    fmt = "{:<24} {:<20} {:>9} {:>12} {:>12} {:>9} {:>7}  {}"
+    print(line)
+    print(fmt.format("Cenário", "Métrica", "Rodadas", "Base", "Nova", "Variação", "p", "Resultado"))
+    print(line)
+    for r in results:
+        verdict = "REGRESSÃO" if r["regressao"] else ("melhora" if r["melhora"] else "")
+        if not verdict and not show_all:
+            continue
+        print(fmt.format(r["cenario"][:24], r["metrica"], f"{r['n_base']}/{r['n_nova']}",
+                         f"{r['base']:.4g}", f"{r['nova']:.4g}", f"{r['variacao'] * 100:+.1f}%",
+                         f"{r['p']:.3f}", verdict))
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banco de resultados e comparação entre execuções")
+    parser.add_argument("--db", type=str, default=DEFAULT_DB, help="Arquivo JSONL do banco")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Lista as execuções registradas")
+    p_summary = sub.add_parser("summary", help="Média e IC 95%% por cenário de uma execução ou commit")
+    p_summary.add_argument("ref", help="ID da execução ou prefixo do commit")
+    p_compare = sub.add_parser("compare", help="Compara duas execuções ou commits")
+    p_compare.add_argument("base", help="Execução ou commit de referência")
+    p_compare.add_argument("new", help="Execução ou commit a avaliar")
+    p_compare.add_argument("--alpha", type=float, default=0.05,
+                           help="Nível de significância do teste de permutação")
+    p_compare.add_argument("--threshold", type=float, default=0.05,
+                           help="Piora relativa mínima para sinalizar regressão (0.05 = 5%%)")
+    p_compare.add_argument("--all", action="store_true",
+                           help="Mostra todas as métricas, não só as mudanças significativas")
+    p_compare.add_argument("--json", type=str, default=None,
+                           help="Arquivo JSONL onde a comparação é acrescentada")
+    args = parser.parse_args()
+
+    records = load(args.db)
+    if args.command == "list":
+        print_executions(records)
+        return
+
+    if args.command == "summary":
+        rows = select(records, args.ref)
+        if not rows:
+            raise SystemExit(f"Nada encontrado para {args.ref} em {args.db}")
+        print_summary(rows)
+        return
+
+    base = select(records, args.base)
+    new = select(records, args.new)
+    for ref, rows in ((args.base, base), (args.new, new)):
+        if not rows:
+            raise SystemExit(f"Nada encontrado para {ref} em {args.db}")
+    results = compare(base, new, args.alpha, args.threshold)
+    if not results:
+        raise SystemExit("Nenhum cenário em comum entre as duas execuções")
+    print_comparison(results, args.all)
+    regressions = [r for r in results if r["regressao"]]
+    print(f"{len(regressions)} regressão(ões) significativa(s) em {len(results)} comparações "
+          f"(alpha={args.alpha:g}, limiar={args.threshold * 100:g}%)")
+
+    if args.json:
+        with open(args.json, "a") as f:
+            for r in results:
+                f.write(json.dumps({"base": args.base, "nova": args.new, **r}) + "\n")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
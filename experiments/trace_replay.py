@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Replay de tráfego capturado para benchmarks de regressão do Chat gRPC Distribuído.
+
+As mensagens sintéticas dos outros scripts ("[teste] cliente X msg i" em
+intervalos fixos) não se parecem com o tráfego real. Um servidor iniciado
+com --capture-trace grava cada envio recebido (instante, remetente
+anonimizado, tamanho e sala, sem o conteúdo) num arquivo binário compacto
+(common/traffic_trace.py). Este script reproduz esse padrão de chegadas
+contra um cluster:
+
+- cada registro é enviado no seu instante relativo, dividido por --speed
+  (1 = tempo real, 10 = dez vezes mais rápido), em malha aberta: o envio
+  sai na hora, responda o líder ou não;
+- o remetente e o tamanho do conteúdo são preservados (o conteúdo é
+  preenchimento), e a sala vai no metadado "room";
+- opcionalmente, --subscribers clientes virtuais assinam o líder para
+  medir entregas e latência de entrega.
+
+Com --inspect o trace só é resumido (taxa média, picos, rajadas, tamanhos).
+
+Uso (dentro de experiments/):
+    python trace_replay.py envios.trace [--speed 1] [--subscribers 100]
+    python trace_replay.py envios.trace --inspect
+"""
+
+import os
+import sys
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import asyncio
+import collections
+import json
+import time
+from typing import Dict, List
+
+import grpc
+
+from proto import chat_server_pb2 as pb
+from proto import chat_server_pb2_grpc as pb_grpc
+from chat_client import parse_servers
+from common import read_trace
+from performance_analysis import percentile, start_cluster, stop_cluster
+from virtual_clients import CHANNEL_OPTIONS, TAG_PREFIX, Stats, VirtualClient, find_leader, subscribe
+
+
+# ======================================================
+# Inspeção do trace
+# ======================================================
+
+def inspect_trace(path: str, speed: float = 1.0) -> Dict:
+    """Resumo do padrão de chegadas (no ritmo do replay, se speed != 1)."""
+    per_second = collections.Counter()
+    per_100ms = collections.Counter()
+    senders = set()
+    rooms = set()
+    sizes = []
+    last = 0.0
+    for rec in read_trace(path):
+        t = rec.t / speed
+        per_second[int(t)] += 1
+        per_100ms[int(t * 10)] += 1
+        senders.add(rec.sender)
+        rooms.add(rec.room)
+        sizes.append(rec.size)
+        last = t
+    n = len(sizes)
+    return {
+        "trace": os.path.basename(path),
+        "velocidade": speed,
+        "registros": n,
+        "remetentes": len(senders),
+        "salas": len(rooms),
+        "duracao_trace": last,
+        "taxa_media": n / last if last > 0 else 0.0,
+        "pico_1s": max(per_second.values(), default=0),
+        "pico_100ms": max(per_100ms.values(), default=0) * 10,
+        "tamanho_p50": percentile(sizes, 50),
+        "tamanho_p99": percentile(sizes, 99),
+        "tamanho_max": max(sizes, default=0),
+    }
+
+
+# ======================================================
+# Replay
+# ======================================================
+
+def payload(intended: float, sender: int, size: int) -> str:
+    """Conteúdo com a marca de tempo do replay, completado até o tamanho original."""
+    tag = f"{TAG_PREFIX}{intended:.6f} c={sender}] "
+    return tag + "x" * max(size - len(tag), 0)
+
+
+async def replay_one(stub, sender_id: int, room: int, content: str, intended: float,
+                     stats: Stats, timeout: float) -> None:
+    stats.offered += 1
+    stats.inflight += 1
+    stats.max_inflight = max(stats.max_inflight, stats.inflight)
+    metadata = (("room", str(room)),) if room else None
+    code = None
+    try:
+        resp = await stub.SendMessageToServer(
+            pb.TextMessage(client_id_from=sender_id, content=content, lamport_timestamp=0),
+            metadata=metadata, timeout=timeout)
+        success = resp.success
+    except grpc.aio.AioRpcError as e:
+        success = False
+        code = e.code()
+    stats.inflight -= 1
+    if success:
+        stats.ok += 1
+        stats.send.record(time.perf_counter() - intended)
+    elif code == grpc.StatusCode.RESOURCE_EXHAUSTED:
+        stats.rejected += 1
+    else:
+        stats.failed += 1
+
+
+async def replay(leader: str, args) -> Dict:
+    stats = Stats()
+    channels = [grpc.aio.insecure_channel(leader, options=CHANNEL_OPTIONS) for _ in range(args.channels)]
+    stubs = [pb_grpc.ClientModuleStub(c) for c in channels]
+
+    # Assinantes virtuais (opcional) para medir as entregas
+    receivers = [VirtualClient(i, stubs[i % len(stubs)]) for i in range(args.subscribers)]
+    streams = [asyncio.create_task(subscribe(vc, stats)) for vc in receivers]
+    if receivers:
+        try:
+            await asyncio.wait_for(asyncio.gather(*(vc.ready.wait() for vc in receivers)),
+                                   timeout=args.connect_timeout)
+        except asyncio.TimeoutError:
+            pass
+    connected = sum(1 for vc in receivers if vc.client_id is not None)
+
+    # Despachante: cada registro sai no instante do trace (relativo a --start) / speed
+    tasks: set = set()
+    lateness: List[float] = []
+    t0 = time.perf_counter() + 0.1
+    # Todo envio do replay conta (a marca de tempo no conteúdo é arredondada em 1us)
+    stats.measure_from = t0 - 1.0
+    cpu0 = time.process_time()
+    for rec in read_trace(args.trace):
+        if rec.t < args.start:
+            continue
+        offset = (rec.t - args.start) / args.speed
+        if args.max_duration and offset > args.max_duration:
+            break
+        intended = t0 + offset
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        lateness.append(max(time.perf_counter() - intended, 0.0))
+        # IDs dos remetentes fora da faixa dos assinantes: todos recebem todas as mensagens
+        sender_id = args.sender_base + rec.sender
+        task = asyncio.create_task(replay_one(
+            stubs[rec.sender % len(stubs)], sender_id, rec.room,
+            payload(intended, sender_id, rec.size), intended, stats, args.rpc_timeout))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    t_end = time.perf_counter()
+
+    if tasks:
+        await asyncio.wait(set(tasks), timeout=args.drain_timeout)
+    pending = sum(1 for t in tasks if not t.done())
+    if receivers:
+        await asyncio.sleep(args.grace)
+    cpu = (time.process_time() - cpu0) / max(time.perf_counter() - t0, 1e-9)
+    delivered = stats.delivered
+
+    for task in tasks:
+        task.cancel()
+    for vc in receivers:
+        if vc.call is not None:
+            vc.call.cancel()
+    await asyncio.gather(*streams, *tasks, return_exceptions=True)
+    for c in channels:
+        await c.close()
+
+    duration = max(t_end - t0, 1e-9)
+    expected = stats.ok * connected
+    return {
+        "trace": os.path.basename(args.trace),
+        "velocidade": args.speed,
+        "oferecidas": stats.offered,
+        "duracao_replay": duration,
+        "taxa_oferecida": stats.offered / duration,
+        "ok": stats.ok,
+        "falhas": stats.failed,
+        "rejeitadas": stats.rejected,
+        "pendentes": pending,
+        "em_voo_max": stats.max_inflight,
+        "atraso_agenda_p99": percentile(lateness, 99),
+        "atraso_agenda_max": max(lateness, default=0.0),
+        **stats.send.summary("envio_"),
+        "assinantes": connected,
+        "entregas": delivered,
+        "entregas_esperadas": expected,
+        "taxa_entrega": delivered / expected if expected else 0.0,
+        **stats.delivery.summary("entrega_"),
+        "cpu_gerador": cpu,
+        "histograma_envio": stats.send.to_dict(),
+    }
+
+
+async def run(servers: List[str], args) -> Dict:
+    leader = await find_leader(servers)
+    if leader is None:
+        raise SystemExit("Nenhum líder encontrado")
+    print(f">>> replay de {args.trace} a {args.speed:g}x -> {leader}", file=sys.stderr, flush=True)
+    return await replay(leader, args)
+
+
+# ======================================================
+# Main
+# ======================================================
+
+def print_inspect(info: Dict) -> None:
+    print(f"Trace {info['trace']} (ritmo {info['velocidade']:g}x)")
+    print(f"  registros:     {info['registros']} de {info['remetentes']} remetente(s) "
+          f"em {info['salas']} sala(s)")
+    print(f"  duração:       {info['duracao_trace']:.1f}s, taxa média {info['taxa_media']:.1f} msg/s")
+    print(f"  picos:         {info['pico_1s']} msg em 1s, {info['pico_100ms']:g} msg/s em 100ms")
+    print(f"  tamanho (B):   p50 {info['tamanho_p50']:.0f}, p99 {info['tamanho_p99']:.0f}, "
+          f"max {info['tamanho_max']}")
+
+
+def print_table(rows: List[Dict]) -> None:
+    line = "-" * 118
+    fmt = "{:>6} {:>8} {:>9} {:>8} {:>7} {:>9} {:>9} {:>9} {:>10} {:>8} {:>9} {:>9}"
+    print(line)
+    print(fmt.format("Veloc.", "Envios", "Oferecida", "Vazão", "Falhas", "Env. p50", "Env. p99",
+                     "Env. max", "Atraso ag.", "Entrega", "Ent. p50", "Ent. p99"))
+    print(fmt.format("", "", "(msg/s)", "(msg/s)", "", "(ms)", "(ms)", "(ms)", "p99 (ms)", "(%)",
+                     "(ms)", "(ms)"))
+    print(line)
+    for r in rows:
+        print(fmt.format(
+            f"{r['velocidade']:g}x", r["oferecidas"], f"{r['taxa_oferecida']:.1f}",
+            f"{r['ok'] / r['duracao_replay']:.1f}",
+            r["falhas"] + r["rejeitadas"] + r["pendentes"],
+            f"{r['envio_p50']*1000:.2f}", f"{r['envio_p99']*1000:.2f}", f"{r['envio_max']*1000:.1f}",
+            f"{r['atraso_agenda_p99']*1000:.2f}",
+            f"{r['taxa_entrega']*100:.1f}" if r["assinantes"] else "-",
+            f"{r['entrega_p50']*1000:.2f}" if r["assinantes"] else "-",
+            f"{r['entrega_p99']*1000:.2f}" if r["assinantes"] else "-",
+        ))
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay de um trace de envios capturado com --capture-trace")
+    parser.add_argument("trace", help="Arquivo gravado por chat_server.py --capture-trace")
+    parser.add_argument("--speed", type=float, nargs="+", default=[1.0],
+                        help="Fatores de aceleração (1 = tempo real); um replay por valor")
+    parser.add_argument("--inspect", action="store_true",
+                        help="Só resume o trace (taxas, picos, tamanhos), sem enviar")
+    parser.add_argument("--start", type=float, default=0.0,
+                        help="Começa neste instante (s) do trace")
+    parser.add_argument("--max-duration", type=float, default=0.0,
+                        help="Duração máxima (s) do replay (0 = trace inteiro)")
+    parser.add_argument("--subscribers", type=int, default=0,
+                        help="Clientes virtuais assinando o líder para medir as entregas")
+    parser.add_argument("--channels", type=int, default=4,
+                        help="Canais gRPC (conexões TCP) usados pelo replay")
+    parser.add_argument("--sender-base", type=int, default=1000000,
+                        help="Soma aos remetentes do trace (IDs fora da faixa dos assinantes)")
+    parser.add_argument("--connect-timeout", type=float, default=30.0)
+    parser.add_argument("--rpc-timeout", type=float, default=10.0, help="Prazo (s) de cada envio")
+    parser.add_argument("--drain-timeout", type=float, default=10.0,
+                        help="Prazo (s) para os envios em voo terminarem")
+    parser.add_argument("--grace", type=float, default=2.0,
+                        help="Espera (s) pelas entregas ainda a caminho")
+    parser.add_argument("--pause", type=float, default=2.0, help="Pausa (s) entre os replays")
+    parser.add_argument("--servers", type=str, default=None,
+                        help="Usa um cluster já em execução em vez de subir um local")
+    parser.add_argument("--server-args", type=str, default="--rate-limit 0",
+                        help="Argumentos extras dos servidores do cluster local")
+    parser.add_argument("--json", type=str, default=None,
+                        help="Arquivo JSONL onde os resultados são acrescentados")
+    args = parser.parse_args()
+
+    if args.inspect:
+        for speed in args.speed:
+            print_inspect(inspect_trace(args.trace, speed))
+        return
+
+    cluster = None
+    if args.servers:
+        servers = parse_servers(args.servers)
+    else:
+        server_args = args.server_args.split() + ["--max-workers", str(args.subscribers + 100)]
+        cluster, servers = start_cluster(server_args)
+        time.sleep(3)
+    rows: List[Dict] = []
+    speeds = args.speed
+    try:
+        for speed in speeds:
+            args.speed = speed
+            rows.append(asyncio.run(run(servers, args)))
+            time.sleep(args.pause)
+    finally:
+        if cluster:
+            stop_cluster(cluster)
+
+    print_table(rows)
+
+    if args.json:
+        with open(args.json, "a") as f:
+            for r in rows:
+                f.write(json.dumps(r) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Clientes virtuais em massa (asyncio) para o Chat gRPC Distribuído.
+
+Em performance_analysis.py e load_generator.py cada cliente é um ChatClient
+completo: canal próprio, thread de recebimento e, às vezes, thread de
+reconexão. O processo de teste fica sem threads muito antes de o líder
+saturar, e os cenários param em 5-10 clientes.
+
+Aqui milhares de clientes virtuais rodam num único event loop (grpc.aio),
+multiplexados em poucos canais HTTP/2 (--channels):
+- cada cliente virtual abre um SubscribeToServerEvents no líder e recebe
+  seu ID, como um ChatClient;
+- uma fração deles (--active-fraction) também envia, cada um à taxa
+  --active-rate em malha aberta (chegadas de Poisson); os demais ficam
+  ociosos, só recebendo - a mistura típica de uma sala de chat;
+- as conexões sobem em rampa (--connect-rate) para não virar uma rajada.
+
+São medidos: tempo de conexão (até o ID Atribuido), latência de envio (a
+partir do instante previsto), entregas recebidas vs. esperadas e latência
+de entrega. A CPU usada pelo próprio gerador é reportada: perto de 100% de
+um núcleo, o gargalo é o gerador e não o líder.
+
+Uso (dentro de experiments/):
+    python virtual_clients.py [--subscribers 100 1000 5000] [--channels 4]
+                              [--active-fraction 0.05] [--active-rate 1]
+                              [--json saida.jsonl]
+"""
+
+import os
+import sys
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Optional
+
+import grpc
+
+from proto import chat_server_pb2 as pb
+from proto import chat_server_pb2_grpc as pb_grpc
+from chat_client import parse_servers
+from load_generator import LatencyHistogram, arrival_gaps
+from performance_analysis import start_cluster, stop_cluster
+
+# Cada canal com o próprio pool de subcanais: uma conexão TCP por canal
+# (com o pool global, canais para o mesmo endereço dividiriam uma só)
+CHANNEL_OPTIONS = [("grpc.use_local_subchannel_pool", 1)]
+
+# Prefixo das mensagens do teste: "[vc t=<instante previsto> c=<cliente>]"
+TAG_PREFIX = "[vc t="
+
+
+# ======================================================
+# Clientes virtuais
+# ======================================================
+
+class VirtualClient:
+    __slots__ = ("vid", "stub", "call", "client_id", "ready")
+
+    def __init__(self, vid: int, stub):
+        self.vid = vid
+        self.stub = stub
+        self.call = None
+        self.client_id = None
+        self.ready = asyncio.Event()
+
+
+class Stats:
+    """Contadores de uma rodada (um só event loop: sem locks)."""
+
+    def __init__(self):
+        self.connect = LatencyHistogram()
+        self.send = LatencyHistogram()     # desde o instante previsto
+        self.delivery = LatencyHistogram()  # do instante previsto do envio até o recebimento
+        self.measure_from = float("inf")
+        self.offered = 0
+        self.ok = 0
+        self.failed = 0
+        self.rejected = 0
+        self.delivered = 0
+        self.redirects = 0
+        self.stream_errors = 0
+        self.inflight = 0
+        self.max_inflight = 0
+
+
+async def find_leader(servers: List[str], timeout: float = 2.0) -> Optional[str]:
+    for addr in servers:
+        try:
+            async with grpc.aio.insecure_channel(addr) as channel:
+                info = await pb_grpc.ClientModuleStub(channel).GetLeader(pb.Empty(), timeout=timeout)
+            if info.is_leader_known and info.leader_address:
+                return info.leader_address
+        except grpc.aio.AioRpcError:
+            continue
+    return None
+
+
+async def subscribe(vc: VirtualClient, stats: Stats) -> None:
+    t0 = time.perf_counter()
+    vc.call = vc.stub.SubscribeToServerEvents(pb.Empty())
+    try:
+        async for msg in vc.call:
+            content = msg.content
+            if msg.client_id_from == 0:
+                if content.startswith("ID Atribuido:"):
+                    vc.client_id = int(content.split(":", 1)[1])
+                    stats.connect.record(time.perf_counter() - t0)
+                    vc.ready.set()
+                elif content.startswith("REDIRECT:"):
+                    stats.redirects += 1
+                    return
+                continue
+            if content.startswith(TAG_PREFIX):
+                intended = float(content[len(TAG_PREFIX):content.index(" ", len(TAG_PREFIX))])
+                if intended >= stats.measure_from:
+                    stats.delivered += 1
+                    stats.delivery.record(time.perf_counter() - intended)
+    except grpc.aio.AioRpcError as e:
+        if e.code() != grpc.StatusCode.CANCELLED:
+            stats.stream_errors += 1
+    except asyncio.CancelledError:
+        pass
+    finally:
+        vc.ready.set()  # não deixa a espera da rampa presa numa conexão que falhou
+
+
+async def send_one(vc: VirtualClient, intended: float, stats: Stats, timeout: float) -> None:
+    measured = intended >= stats.measure_from
+    if measured:
+        stats.offered += 1
+    stats.inflight += 1
+    stats.max_inflight = max(stats.max_inflight, stats.inflight)
+    request = pb.TextMessage(client_id_from=vc.client_id, lamport_timestamp=0,
+                             content=f"{TAG_PREFIX}{intended:.6f} c={vc.vid}] mensagem virtual")
+    code = None
+    try:
+        resp = await vc.stub.SendMessageToServer(request, timeout=timeout)
+        success = resp.success
+    except grpc.aio.AioRpcError as e:
+        success = False
+        code = e.code()
+    stats.inflight -= 1
+    if not measured:
+        return
+    if success:
+        stats.ok += 1
+        stats.send.record(time.perf_counter() - intended)
+    elif code == grpc.StatusCode.RESOURCE_EXHAUSTED:
+        stats.rejected += 1
+    else:
+        stats.failed += 1
+
+
+async def sender_loop(vc: VirtualClient, rate: float, arrival: str, t_start: float, t_end: float,
+                      stats: Stats, timeout: float, tasks: set, seed: int) -> None:
+    """Envios em malha aberta: cada chegada vira uma task, responda o líder ou não."""
+    rng = random.Random(seed)
+    intended = t_start + rng.uniform(0, 1.0 / rate)  # dessincroniza os remetentes
+    for gap in arrival_gaps(rate, arrival, rng):
+        intended += gap
+        if intended >= t_end:
+            return
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(send_one(vc, intended, stats, timeout))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+
+def os_threads() -> Optional[int]:
+    """Threads do processo (inclui as do core do gRPC); só no Linux."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+# ======================================================
+# Rodada: uma população de clientes virtuais
+# ======================================================
+
+async def run_population(leader: str, subscribers: int, args, seed: int) -> Dict:
+    stats = Stats()
+    rng = random.Random(seed)
+    channels = [grpc.aio.insecure_channel(leader, options=CHANNEL_OPTIONS) for _ in range(args.channels)]
+    stubs = [pb_grpc.ClientModuleStub(c) for c in channels]
+    clients = [VirtualClient(i, stubs[i % len(stubs)]) for i in range(subscribers)]
+
+    # Rampa de conexões
+    t0 = time.perf_counter()
+    streams = []
+    for i, vc in enumerate(clients):
+        delay = t0 + i / args.connect_rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        streams.append(asyncio.create_task(subscribe(vc, stats)))
+    try:
+        await asyncio.wait_for(asyncio.gather(*(vc.ready.wait() for vc in clients)),
+                               timeout=args.connect_timeout)
+    except asyncio.TimeoutError:
+        pass
+    connect_time = time.perf_counter() - t0
+    connected = [vc for vc in clients if vc.client_id is not None]
+    print(f"    {len(connected)}/{subscribers} conectados em {connect_time:.1f}s", file=sys.stderr, flush=True)
+
+    # Mistura ociosos/ativos
+    n_active = min(len(connected), max(1, round(args.active_fraction * len(connected)))) if connected else 0
+    active = rng.sample(connected, n_active)
+
+    t_start = time.perf_counter()
+    stats.measure_from = t_start + args.warmup
+    t_end = stats.measure_from + args.duration
+    tasks: set = set()
+    senders = [asyncio.create_task(sender_loop(vc, args.active_rate, args.arrival, t_start, t_end,
+                                               stats, args.rpc_timeout, tasks, seed * 100003 + vc.vid))
+               for vc in active]
+    await asyncio.sleep(max(stats.measure_from - time.perf_counter(), 0))
+    cpu0 = time.process_time()
+    threads = os_threads()
+    await asyncio.gather(*senders)
+    if tasks:
+        await asyncio.wait(set(tasks), timeout=args.drain_timeout)
+    pending = sum(1 for t in tasks if not t.done())
+    await asyncio.sleep(args.grace)  # entregas ainda a caminho
+    cpu = (time.process_time() - cpu0) / max(time.perf_counter() - stats.measure_from, 1e-9)
+    delivered = stats.delivered
+
+    for task in tasks:
+        task.cancel()
+    for vc in clients:
+        if vc.call is not None:
+            vc.call.cancel()
+    await asyncio.gather(*streams, *tasks, return_exceptions=True)
+    for c in channels:
+        await c.close()
+
+    # Cada envio confirmado deveria chegar a todos os conectados, menos o remetente
+    expected = stats.ok * max(len(connected) - 1, 0)
+    return {
+        "assinantes": subscribers,
+        "canais": args.channels,
+        "conectados": len(connected),
+        "conexao_s": connect_time,
+        **stats.connect.summary("conexao_"),
+        "ativos": n_active,
+        "taxa_por_ativo": args.active_rate,
+        "taxa_oferecida": n_active * args.active_rate,
+        "duracao": args.duration,
+        "oferecidas": stats.offered,
+        "ok": stats.ok,
+        "falhas": stats.failed,
+        "rejeitadas": stats.rejected,
+        "pendentes": pending,
+        "em_voo_max": stats.max_inflight,
+        "vazao": stats.ok / args.duration,
+        **stats.send.summary("envio_"),
+        "entregas": delivered,
+        "entregas_esperadas": expected,
+        "taxa_entrega": delivered / expected if expected else 0.0,
+        "entregas_por_s": delivered / args.duration,
+        **stats.delivery.summary("entrega_"),
+        "redirects": stats.redirects,
+        "erros_stream": stats.stream_errors,
+        "cpu_gerador": cpu,
+        "threads_gerador": threads,
+        "histograma_envio": stats.send.to_dict(),
+        "histograma_entrega": stats.delivery.to_dict(),
+    }
+
+
+async def sweep(servers: List[str], args) -> List[Dict]:
+    rows: List[Dict] = []
+    for i, n in enumerate(args.subscribers):
+        leader = await find_leader(servers)
+        if leader is None:
+            print("Nenhum líder encontrado", file=sys.stderr)
+            break
+        print(f">>> {n} clientes virtuais em {args.channels} canal(is) -> {leader}",
+              file=sys.stderr, flush=True)
+        rows.append(await run_population(leader, n, args, args.seed + i))
+        await asyncio.sleep(args.pause)  # o líder libera as threads dos streams encerrados
+    return rows
+
+
+# ======================================================
+# Main
+# ======================================================
+
+def print_table(rows: List[Dict]) -> None:
+    line = "-" * 124
+    fmt = "{:>7} {:>7} {:>9} {:>6} {:>9} {:>8} {:>7} {:>9} {:>9} {:>8} {:>10} {:>10} {:>7}"
+    print(line)
+    print(fmt.format("Assin.", "Conect.", "Con. p99", "Ativos", "Oferecida", "Vazão", "Falhas",
+                     "Env. p50", "Env. p99", "Entrega", "Ent. p50", "Ent. p99", "CPU"))
+    print(fmt.format("", "", "(ms)", "", "(msg/s)", "(msg/s)", "", "(ms)", "(ms)", "(%)",
+                     "(ms)", "(ms)", "ger."))
+    print(line)
+    for r in rows:
+        print(fmt.format(
+            r["assinantes"], r["conectados"], f"{r['conexao_p99']*1000:.1f}", r["ativos"],
+            f"{r['taxa_oferecida']:g}", f"{r['vazao']:.1f}",
+            r["falhas"] + r["rejeitadas"] + r["pendentes"],
+            f"{r['envio_p50']*1000:.2f}", f"{r['envio_p99']*1000:.2f}",
+            f"{r['taxa_entrega']*100:.1f}",
+            f"{r['entrega_p50']*1000:.2f}", f"{r['entrega_p99']*1000:.2f}",
+            f"{r['cpu_gerador']*100:.0f}%",
+        ))
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Milhares de clientes virtuais (asyncio) sobre poucos canais")
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[100, 1000, 5000],
+                        help="Populações de clientes virtuais (uma rodada por valor)")
+    parser.add_argument("--channels", type=int, default=4,
+                        help="Canais gRPC (conexões TCP) compartilhados pelos clientes virtuais")
+    parser.add_argument("--active-fraction", type=float, default=0.05,
+                        help="Fração dos clientes que também envia (os demais só recebem)")
+    parser.add_argument("--active-rate", type=float, default=0.2,
+                        help="Mensagens/s de cada cliente ativo")
+    parser.add_argument("--arrival", choices=["poisson", "constant"], default="poisson",
+                        help="Processo de chegadas de cada cliente ativo")
+    parser.add_argument("--connect-rate", type=float, default=500.0,
+                        help="Conexões novas por segundo na rampa")
+    parser.add_argument("--connect-timeout", type=float, default=60.0,
+                        help="Prazo (s) para todos receberem o ID")
+    parser.add_argument("--duration", type=float, default=10.0, help="Duração (s) medida")
+    parser.add_argument("--warmup", type=float, default=1.0,
+                        help="Aquecimento (s) descartado após a rampa")
+    parser.add_argument("--rpc-timeout", type=float, default=10.0, help="Prazo (s) de cada envio")
+    parser.add_argument("--drain-timeout", type=float, default=5.0,
+                        help="Prazo (s) para os envios em voo terminarem")
+    parser.add_argument("--grace", type=float, default=2.0,
+                        help="Espera (s) pelas entregas ainda a caminho")
+    parser.add_argument("--pause", type=float, default=3.0, help="Pausa (s) entre as rodadas")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--servers", type=str, default=None,
+                        help="Usa um cluster já em execução em vez de subir um local "
+                             "(os servidores precisam de --max-workers acima do número de assinantes)")
+    parser.add_argument("--server-args", type=str, default="--rate-limit 0",
+                        help="Argumentos extras dos servidores do cluster local; --max-workers é "
+                             "acrescentado conforme a maior população")
+    parser.add_argument("--json", type=str, default=None,
+                        help="Arquivo JSONL onde os resultados são acrescentados")
+    args = parser.parse_args()
+
+    cluster = None
+    if args.servers:
+        servers = parse_servers(args.servers)
+    else:
+        # Cada stream de assinante ocupa uma thread do servidor enquanto está aberto
+        server_args = args.server_args.split() + ["--max-workers", str(max(args.subscribers) + 100)]
+        cluster, servers = start_cluster(server_args)
+        time.sleep(3)
+    try:
+        rows = asyncio.run(sweep(servers, args))
+    finally:
+        if cluster:
+            stop_cluster(cluster)
+
+    print_table(rows)
+
+    if args.json:
+        with open(args.json, "a") as f:
+            for r in rows:
+                f.write(json.dumps(r) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Pertinência dinâmica ao cluster com gossip no estilo SWIM
+
+Em vez de uma lista fixa de peers (--peers) e de cada servidor enviar
+heartbeat direto ao líder, cada membro:
+1. A cada período de protocolo sonda (Ping) um membro escolhido em rodízio
+   aleatório
+2. Se o alvo não responde, pede a k outros membros que o sondem (PingReq)
+3. Se ninguém obtém resposta, o alvo passa a SUSPECT; sem refutação dentro
+   do timeout de suspeita, passa a DEAD
+4. Toda mudança de estado é propagada pegando carona (piggyback) nos Pings
+   e respostas, λ·log(N) vezes cada: a informação alcança o cluster em
+   O(log N) períodos, sem mensagens extras
+5. Um membro suspeito refuta a suspeita anunciando uma encarnação maior
+
+Um servidor novo só precisa do endereço de um seed (Join), que devolve a
+lista de membros e anuncia o recém-chegado via gossip. Na saída planejada
+o servidor anuncia LEFT para alguns membros, que propagam a saída.
+
+A lista de peers (id, address) compartilhada com a eleição e a replicação
+é a pertinência conhecida: inclui membros suspeitos e mortos e só perde um
+membro quando ele próprio anuncia a saída (LEFT). É dela que saem o quorum
+das escritas e a maioria do Raft; se as falhas a encolhessem, o lado
+minoritário de uma partição, depois de marcar os outros como DEAD, formaria
+"maioria" sozinho.
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+from concurrent import futures
+
+import grpc
+
+from proto import chat_server_pb2 as pb
+from proto import chat_server_pb2_grpc as pb_grpc
+
+_ACTIVE = (pb.ALIVE, pb.SUSPECT)
+
+
+class Member:
+    __slots__ = ('id', 'address', 'state', 'incarnation', 'suspect_since')
+
+    def __init__(self, member_id, address, state=pb.ALIVE, incarnation=0):
+        self.id = member_id
+        self.address = address
+        self.state = state
+        self.incarnation = incarnation
+        self.suspect_since = None
+
+    def to_update(self):
+        return pb.MemberUpdate(server_id=self.id, address=self.address,
+                               state=self.state, incarnation=self.incarnation)
+
+
+class SwimMembership:
+    """
+    Detector de falhas e disseminação de pertinência (SWIM).
+
+    on_join(id, address) e on_leave(id) são chamados (fora do lock) quando
+    um membro entra no conjunto ativo (ALIVE/SUSPECT) ou sai dele (DEAD/LEFT).
+    """
+
+    # Máximo de atualizações por mensagem
+    MAX_PIGGYBACK = 8
+
+    def __init__(self, server_id: int, address: str, peers: list, protocol_period: float = 0.5,
+                 ping_timeout: float = None, indirect_probes: int = 3, suspicion_mult: int = 3,
+                 retransmit_mult: int = 3, on_join=None, on_leave=None):
+        self.server_id = server_id
+        self.address = address
+        self.peers = peers  # lista compartilhada de (id, address): pertinência conhecida
+        self.protocol_period = protocol_period
+        self.ping_timeout = ping_timeout or protocol_period / 2
+        self.indirect_probes = indirect_probes
+        self.suspicion_mult = suspicion_mult
+        self.retransmit_mult = retransmit_mult
+        self._on_join = on_join
+        self._on_leave = on_leave
+
+        self.incarnation = 0
+        self._members = {pid: Member(pid, addr) for pid, addr in peers}
+        self._updates = {}  # server_id -> [MemberUpdate, transmissões restantes]
+        self._probe_order = []
+        self._lock = threading.Lock()
+        self._channels = {}
+        self._channels_lock = threading.Lock()  # _call roda no protocolo, no pool e nos RPCs
+        self._pool = futures.ThreadPoolExecutor(max_workers=indirect_probes)
+        self._running = False
+        self._thread = threading.Thread(target=self._protocol_loop, daemon=True)
+
+    # ---------------------- estado ----------------------
+
+    def _active(self):
+        return [m for m in self._members.values() if m.state in _ACTIVE]
+
+    def _log_n(self):
+        return max(1, math.ceil(math.log2(len(self._active()) + 2)))
+
+    def _suspicion_timeout(self):
+        return self.suspicion_mult * self._log_n() * self.protocol_period
+
+    def _my_update(self, state=pb.ALIVE):
+        return pb.MemberUpdate(server_id=self.server_id, address=self.address,
+                               state=state, incarnation=self.incarnation)
+
+    # Deve ser chamado com self._lock
+    def _enqueue(self, update):
+        self._updates[update.server_id] = [update, self.retransmit_mult * self._log_n()]
+
+    def _piggyback(self):
+        with self._lock:
+            chosen = sorted(self._updates.values(), key=lambda e: -e[1])[:self.MAX_PIGGYBACK]
+            for entry in chosen:
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    del self._updates[entry[0].server_id]
+            return [entry[0] for entry in chosen]
+
+    # Deve ser chamado com self._lock
+    # A lista compartilhada só é reescrita quando muda (outras threads a percorrem)
+    def _sync_peers(self):
+        known = sorted((m.id, m.address) for m in self._members.values() if m.state != pb.LEFT)
+        if known != self.peers:
+            self.peers[:] = known
+
+    # ---------------------- merge ----------------------
+
+    @staticmethod
+    def _overrides(update, member):
+        # Precedência do SWIM: encarnação maior vence; na mesma encarnação
+        # SUSPECT vence ALIVE, e DEAD/LEFT vencem os dois
+        if member.state not in _ACTIVE:
+            return update.incarnation > member.incarnation
+        if update.state == pb.ALIVE:
+            return update.incarnation > member.incarnation
+        if update.state == pb.SUSPECT:
+            return update.incarnation > member.incarnation or (
+                update.incarnation == member.incarnation and member.state == pb.ALIVE)
+        return update.incarnation >= member.incarnation
+
+    # Aplica uma atualização; retorna 'join', 'leave' ou None
+    # Deve ser chamado com self._lock
+    def _apply(self, update):
+        if update.server_id == self.server_id:
+            if update.state in (pb.SUSPECT, pb.DEAD) and update.incarnation >= self.incarnation:
+                # Refuta a suspeita com uma encarnação maior
+                self.incarnation = update.incarnation + 1
+                self._enqueue(self._my_update())
+                logging.info(f"[GOSSIP] Servidor {self.server_id}: refutando {pb.MemberState.Name(update.state)} "
+                             f"(encarnação {self.incarnation})")
+            elif update.state == pb.ALIVE and update.incarnation > self.incarnation:
+                self.incarnation = update.incarnation
+            return None
+
+        member = self._members.get(update.server_id)
+        if member is None:
+            member = self._members[update.server_id] = Member(
+                update.server_id, update.address, update.state, update.incarnation)
+            self._enqueue(update)
+            return 'join' if update.state in _ACTIVE else None
+        if not self._overrides(update, member):
+            return None
+
+        was_active = member.state in _ACTIVE
+        member.state = update.state
+        member.incarnation = update.incarnation
+        if update.address:
+            member.address = update.address
+        member.suspect_since = time.monotonic() if update.state == pb.SUSPECT else None
+        self._enqueue(update)
+        if was_active != (update.state in _ACTIVE):
+            return 'join' if not was_active else 'leave'
+        return None
+
+    def merge(self, updates):
+        """Incorpora atualizações recebidas e dispara on_join/on_leave."""
+        events = []
+        with self._lock:
+            for update in updates:
+                event = self._apply(update)
+                if event:
+                    events.append((event, self._members[update.server_id]))
+            # Também há mudança sem evento (ex.: membro desconhecido chegando já DEAD)
+            self._sync_peers()
+        self._notify(events)
+
+    def _notify(self, events):
+        for event, member in events:
+            if event == 'join':
+                logging.info(f"[GOSSIP] Servidor {self.server_id}: membro {member.id} ({member.address}) entrou")
+                if self._on_join:
+                    self._on_join(member.id, member.address)
+            else:
+                logging.warning(f"[GOSSIP] Servidor {self.server_id}: membro {member.id} saiu "
+                                f"({pb.MemberState.Name(member.state)})")
+                if self._on_leave:
+                    self._on_leave(member.id)
+
+    # ---------------------- RPCs ----------------------
+
+    def _call(self, address, method, request, timeout):
+        with self._channels_lock:
+            channel = self._channels.get(address)
+            if channel is None:
+                channel = self._channels[address] = grpc.insecure_channel(address)
+        return getattr(pb_grpc.MembershipModuleStub(channel), method)(request, timeout=timeout)
+
+    def handle_ping(self, request):
+        self.merge(request.updates)
+        return pb.GossipMessage(sender_id=self.server_id, updates=self._piggyback(), ack=True)
+
+    def handle_ping_req(self, request):
+        self.merge(request.updates)
+        try:
+            ack = self._call(request.target_address, 'Ping',
+                             pb.GossipMessage(sender_id=self.server_id, updates=self._piggyback()),
+                             self.ping_timeout)
+            self.merge(ack.updates)
+            reached = True
+        except grpc.RpcError:
+            reached = False
+        return pb.GossipMessage(sender_id=self.server_id, updates=self._piggyback(), ack=reached)
+
+    def handle_join(self, request):
+        joining = request.member
+        with self._lock:
+            current = self._members.get(joining.server_id)
+            # A entrada supera qualquer estado anterior do mesmo ID (reinício)
+            incarnation = max(joining.incarnation, current.incarnation + 1 if current else 0)
+        self.merge([pb.MemberUpdate(server_id=joining.server_id, address=joining.address,
+                                    state=pb.ALIVE, incarnation=incarnation)])
+        with self._lock:
+            members = [self._my_update()] + [m.to_update() for m in self._members.values()]
+        return pb.JoinResponse(members=members)
+
+    # ---------------------- protocolo ----------------------
+
+    def join(self, seeds, attempts: int = 5) -> bool:
+        """Entra no cluster pelo primeiro seed que responder."""
+        for attempt in range(attempts):
+            for seed in seeds:
+                try:
+                    response = self._call(seed, 'Join', pb.JoinRequest(member=self._my_update()), 2.0)
+                except grpc.RpcError as e:
+                    logging.warning(f"[GOSSIP] Seed {seed} não respondeu: {e.code()}")
+                    continue
+                self.merge(response.members)
+                with self._lock:
+                    self._enqueue(self._my_update())
+                    active = len(self._active())
+                logging.info(f"[GOSSIP] Servidor {self.server_id}: entrou no cluster via {seed} "
+                             f"({active} membros ativos)")
+                return True
+            time.sleep(1.0)
+        return False
+
+    def start(self):
+        self._running = True
+        self._thread.start()
+
+    def leave(self):
+        """Anuncia a saída voluntária para alguns membros, que a propagam por gossip."""
+        with self._lock:
+            self._running = False
+            self.incarnation += 1
+            update = self._my_update(pb.LEFT)
+            active = self._active()
+            targets = random.sample(active, min(len(active), self._log_n() + 1))
+        for member in targets:
+            try:
+                self._call(member.address, 'Ping',
+                           pb.GossipMessage(sender_id=self.server_id, updates=[update]), self.ping_timeout)
+            except grpc.RpcError:
+                pass
+        self._pool.shutdown(wait=False)
+        with self._channels_lock:
+            channels, self._channels = list(self._channels.values()), {}
+        for channel in channels:
+            channel.close()
+
+    def _protocol_loop(self):
+        while self._running:
+            time.sleep(self.protocol_period)
+            if not self._running:
+                break
+            self._expire_suspects()
+            target = self._next_target()
+            if target is not None:
+                self._probe(target)
+
+    # Rodízio aleatório: cada membro é sondado uma vez a cada N períodos
+    def _next_target(self):
+        with self._lock:
+            while self._probe_order:
+                member = self._members.get(self._probe_order.pop())
+                if member is not None and member.state in _ACTIVE:
+                    return member
+            self._probe_order = [m.id for m in self._active()]
+            random.shuffle(self._probe_order)
+            return self._members[self._probe_order.pop()] if self._probe_order else None
+
+    def _probe(self, member):
+        try:
+            ack = self._call(member.address, 'Ping',
+                             pb.GossipMessage(sender_id=self.server_id, updates=self._piggyback()),
+                             self.ping_timeout)
+            self.merge(ack.updates)
+            return
+        except grpc.RpcError:
+            pass
+
+        # Sonda indireta por k outros membros (o problema pode ser só o caminho até o alvo)
+        with self._lock:
+            helpers = [m for m in self._active() if m.id != member.id]
+            helpers = random.sample(helpers, min(len(helpers), self.indirect_probes))
+        request = pb.PingReqRequest(sender_id=self.server_id, target_id=member.id,
+                                    target_address=member.address, updates=self._piggyback())
+        pending = [self._pool.submit(self._call, h.address, 'PingReq', request, self.protocol_period)
+                   for h in helpers]
+        try:
+            for future in futures.as_completed(pending, timeout=self.protocol_period + 0.1):
+                try:
+                    response = future.result()
+                except grpc.RpcError:
+                    continue
+                self.merge(response.updates)
+                if response.ack:
+                    return
+        except futures.TimeoutError:
+            pass
+        self._suspect(member)
+
+    def _suspect(self, member):
+        with self._lock:
+            if member.state != pb.ALIVE:
+                return
+            member.state = pb.SUSPECT
+            member.suspect_since = time.monotonic()
+            self._enqueue(member.to_update())
+        logging.warning(f"[GOSSIP] Servidor {self.server_id}: membro {member.id} suspeito")
+
+    def _expire_suspects(self):
+        events = []
+        with self._lock:
+            now = time.monotonic()
+            timeout = self._suspicion_timeout()
+            for member in self._members.values():
+                if member.state == pb.SUSPECT and now - member.suspect_since > timeout:
+                    member.state = pb.DEAD
+                    member.suspect_since = None
+                    self._enqueue(member.to_update())
+                    events.append(('leave', member))
+            if events:
+                self._sync_peers()
+        self._notify(events)
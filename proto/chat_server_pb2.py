@@ -25,13 +25,17 @@ _sym_db = _symbol_database.Default()
 from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11\x63hat_server.proto\x12\x0b\x63hat_server\x1a\x1bgoogle/protobuf/empty.proto\"\x07\n\x05\x45mpty\"E\n\x0eStatusResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x11\n\tclient_id\x18\x02 \x01(\x05\x12\x0f\n\x07message\x18\x03 \x01(\t\"Q\n\x0bTextMessage\x12\x16\n\x0e\x63lient_id_from\x18\x01 \x01(\x05\x12\x0f\n\x07\x63ontent\x18\x02 \x01(\t\x12\x19\n\x11lamport_timestamp\x18\x03 \x01(\x03\"@\n\x10HeartbeatRequest\x12\x11\n\tserver_id\x18\x01 \x01(\x05\x12\x19\n\x11lamport_timestamp\x18\x02 \x01(\x03\"P\n\x11HeartbeatResponse\x12\r\n\x05\x61live\x18\x01 \x01(\x08\x12\x11\n\tleader_id\x18\x02 \x01(\x05\x12\x19\n\x11lamport_timestamp\x18\x03 \x01(\x03\"B\n\x0f\x45lectionRequest\x12\x14\n\x0c\x63\x61ndidate_id\x18\x01 \x01(\x05\x12\x19\n\x11lamport_timestamp\x18\x02 \x01(\x03\"O\n\x10\x45lectionResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x14\n\x0cresponder_id\x18\x02 \x01(\x05\x12\x19\n\x11lamport_timestamp\x18\x03 \x01(\x03\"B\n\x12\x43oordinatorRequest\x12\x11\n\tleader_id\x18\x01 \x01(\x05\x12\x19\n\x11lamport_timestamp\x18\x02 \x01(\x03\"F\n\x13\x43oordinatorResponse\x12\x14\n\x0c\x61\x63knowledged\x18\x01 \x01(\x08\x12\x19\n\x11lamport_timestamp\x18\x02 \x01(\x03\"P\n\nLeaderInfo\x12\x11\n\tleader_id\x18\x01 \x01(\x05\x12\x16\n\x0eleader_address\x18\x02 \x01(\t\x12\x17\n\x0fis_leader_known\x18\x03 \x01(\x08\"8\n\x0bSyncRequest\x12\x11\n\tserver_id\x18\x01 \x01(\x05\x12\x16\n\x0elast_timestamp\x18\x02 \x01(\x03\"U\n\x0cSyncResponse\x12*\n\x08messages\x18\x01 \x03(\x0b\x32\x18.chat_server.TextMessage\x12\x19\n\x11lamport_timestamp\x18\x02 \x01(\x03\x32\xe1\x01\n\x0c\x43lientModule\x12L\n\x13SendMessageToServer\x12\x18.chat_server.TextMessage\x1a\x1b.chat_server.StatusResponse\x12I\n\x17SubscribeToServerEvents\x12\x12.chat_server.Empty\x1a\x18.chat_server.TextMessage0\x01\x12\x38\n\tGetLeader\x12\x12.chat_server.Empty\x1a\x17.chat_server.LeaderInfo2]\n\x0cServerModule\x12M\n\x14PushMessageToClients\x12\x18.chat_server.TextMessage\x1a\x1b.chat_server.StatusResponse2\xb9\x02\n\x0e\x45lectionModule\x12J\n\tHeartbeat\x12\x1d.chat_server.HeartbeatRequest\x1a\x1e.chat_server.HeartbeatResponse\x12G\n\x08\x45lection\x12\x1c.chat_server.ElectionRequest\x1a\x1d.chat_server.ElectionResponse\x12P\n\x0b\x43oordinator\x12\x1f.chat_server.CoordinatorRequest\x1a .chat_server.CoordinatorResponse\x12@\n\tSyncState\x12\x18.chat_server.SyncRequest\x1a\x19.chat_server.SyncResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11\x63hat_server.proto\x12\x0b\x63hat_server\x1a\x1bgoogle/protobuf/empty.proto\"\x07\n\x05\x45mpty\"E\n\x0eStatusResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x11\n\tclient_id\x18\x02 \x01(\x05\x12\x0f\n\x07message\x18\x03 \x01(\t\"Q\n\x0bTextMessage\x12\x16\n\x0e\x63lient_id_from\x18\x01 \x01(\x05\x12\x0f\n\x07\x63ontent\x18\x02 \x01(\t\x12\x19\n\x11lamport_timestamp\x18\x03 \x01(\x03\"@\n\x10HeartbeatRequest\x12\x11\n\tserver_id\x18\x01 \x01(\x05\x12\x19\n\x11lamport_timestamp\x18\x02 \x01(\x03\"P\n\x11HeartbeatResponse\x12\r\n\x05\x61live\x18\x01 \x01(\x08\x12\x11\n\tleader_id\x18\x02 \x01(\x05\x12\x19\n\x11lamport_timestamp\x18\x03 \x01(\x03\"f\n\x0f\x45lectionRequest\x12\x14\n\x0c\x63\x61ndidate_id\x18\x01 \x01(\x05\x12\x19\n\x11lamport_timestamp\x18\x02 \x01(\x03\x12\x0c\n\x04term\x18\x03 \x01(\x03\x12\x14\n\x0cparticipants\x18\x04 \x03(\x05\"]\n\x10\x45lectionResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x14\n\x0cresponder_id\x18\x02 \x01(\x05\x12\x19\n\x11lamport_timestamp\x18\x03 \x01(\x03\x12\x0c\n\x04term\x18\x04 \x01(\x03\"P\n\x12\x43oordinatorRequest\x12\x11\n\tleader_id\x18\x01 \x01(\x05\x12\x19\n\x11lamport_timestamp\x18\x02 \x01(\x03\x12\x0c\n\x04term\x18\x03 \x01(\x03\"F\n\x13\x43oordinatorResponse\x12\x14\n\x0c\x61\x63knowledged\x18\x01 \x01(\x08\x12\x19\n\x11lamport_timestamp\x18\x02 \x01(\x03\"P\n\nLeaderInfo\x12\x11\n\tleader_id\x18\x01 \x01(\x05\x12\x16\n\x0eleader_address\x18\x02 \x01(\t\x12\x17\n\x0fis_leader_known\x18\x03 \x01(\x08\"8\n\x0bSyncRequest\x12\x11\n\tserver_id\x18\x01 \x01(\x05\x12\x16\n\x0elast_timestamp\x18\x02 \x01(\x03\"U\n\x0cSyncResponse\x12*\n\x08messages\x18\x01 \x03(\x0b\x32\x18.chat_server.TextMessage\x12\x19\n\x11lamport_timestamp\x18\x02 \x01(\x03\"}\n\x0cHistoryQuery\x12\x15\n\rstart_time_ms\x18\x01 \x01(\x03\x12\x13\n\x0b\x65nd_time_ms\x18\x02 \x01(\x03\x12\r\n\x05limit\x18\x03 \x01(\x05\x12\x0e\n\x06\x63ursor\x18\x04 \x01(\x03\x12\x11\n\tsender_id\x18\x05 \x01(\x05\x12\x0f\n\x07reverse\x18\x06 \x01(\x08\"{\n\x0bHistoryPage\x12*\n\x08messages\x18\x01 \x03(\x0b\x32\x18.chat_server.TextMessage\x12\x19\n\x11lamport_timestamp\x18\x02 \x01(\x03\x12\x13\n\x0bnext_cursor\x18\x03 \x01(\x03\x12\x10\n\x08has_more\x18\x04 \x01(\x08\"D\n\rSearchRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\x12\x15\n\rorder_by_time\x18\x03 \x01(\x08\"W\n\x0eSearchResponse\x12*\n\x08messages\x18\x01 \x03(\x0b\x32\x18.chat_server.TextMessage\x12\x19\n\x11lamport_timestamp\x18\x02 \x01(\x03\"n\n\x12ReplicationRequest\x12\x11\n\tleader_id\x18\x01 \x01(\x05\x12*\n\x08messages\x18\x02 \x03(\x0b\x32\x18.chat_server.TextMessage\x12\x19\n\x11lamport_timestamp\x18\x03 \x01(\x03\"Y\n\x13ReplicationResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x16\n\x0elast_timestamp\x18\x02 \x01(\x03\x12\x19\n\x11lamport_timestamp\x18\x03 \x01(\x03\"$\n\x0fSnapshotRequest\x12\x11\n\tserver_id\x18\x01 \x01(\x05\"h\n\rSnapshotChunk\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\x12\x1a\n\x12snapshot_timestamp\x18\x02 \x01(\x03\x12\x19\n\x11lamport_timestamp\x18\x03 \x01(\x03\x12\x12\n\ntotal_size\x18\x04 \x01(\x03\"?\n\x0fTransferRequest\x12\x11\n\ttarget_id\x18\x01 \x01(\x05\x12\x19\n\x11lamport_timestamp\x18\x02 \x01(\x03\"?\n\x10TransferResponse\x12\x10\n\x08\x61\x63\x63\x65pted\x18\x01 \x01(\x08\x12\x19\n\x11lamport_timestamp\x18\x02 \x01(\x03\"\xf8\x02\n\rElectionStats\x12\x10\n\x08strategy\x18\x01 \x01(\t\x12\x15\n\rmessages_sent\x18\x02 \x01(\x03\x12H\n\x10messages_by_type\x18\x03 \x03(\x0b\x32..chat_server.ElectionStats.MessagesByTypeEntry\x12\x17\n\x0fthreads_spawned\x18\x04 \x01(\x03\x12\x19\n\x11\x65lections_started\x18\x05 \x01(\x03\x12\x1a\n\x12last_convergence_s\x18\x06 \x01(\x01\x12\x1a\n\x12mean_convergence_s\x18\x07 \x01(\x01\x12\x0c\n\x04term\x18\x08 \x01(\x03\x12*\n\x06\x65vents\x18\t \x03(\x0b\x32\x1a.chat_server.ElectionEvent\x12\x17\n\x0fheartbeats_sent\x18\n \x01(\x03\x1a\x35\n\x13MessagesByTypeEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x03:\x02\x38\x01\"C\n\rElectionEvent\x12\x0c\n\x04kind\x18\x01 \x01(\t\x12\x11\n\twall_time\x18\x02 \x01(\x01\x12\x11\n\tleader_id\x18\x03 \x01(\x05\"p\n\x0cMemberUpdate\x12\x11\n\tserver_id\x18\x01 \x01(\x05\x12\x0f\n\x07\x61\x64\x64ress\x18\x02 \x01(\t\x12\'\n\x05state\x18\x03 \x01(\x0e\x32\x18.chat_server.MemberState\x12\x13\n\x0bincarnation\x18\x04 \x01(\x03\"[\n\rGossipMessage\x12\x11\n\tsender_id\x18\x01 \x01(\x05\x12*\n\x07updates\x18\x02 \x03(\x0b\x32\x19.chat_server.MemberUpdate\x12\x0b\n\x03\x61\x63k\x18\x03 \x01(\x08\"z\n\x0ePingReqRequest\x12\x11\n\tsender_id\x18\x01 \x01(\x05\x12\x11\n\ttarget_id\x18\x02 \x01(\x05\x12\x16\n\x0etarget_address\x18\x03 \x01(\t\x12*\n\x07updates\x18\x04 \x03(\x0b\x32\x19.chat_server.MemberUpdate\"8\n\x0bJoinRequest\x12)\n\x06member\x18\x01 \x01(\x0b\x32\x19.chat_server.MemberUpdate\":\n\x0cJoinResponse\x12*\n\x07members\x18\x01 \x03(\x0b\x32\x19.chat_server.MemberUpdate\".\n\x0eProfileRequest\x12\x0e\n\x06\x61\x63tion\x18\x01 \x01(\t\x12\x0c\n\x04mode\x18\x02 \x01(\t\"B\n\x0fProfileResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\r\n\x05\x66iles\x18\x03 \x03(\t*9\n\x0bMemberState\x12\t\n\x05\x41LIVE\x10\x00\x12\x0b\n\x07SUSPECT\x10\x01\x12\x08\n\x04\x44\x45\x41\x44\x10\x02\x12\x08\n\x04LEFT\x10\x03\x32\xf1\x02\n\x0c\x43lientModule\x12L\n\x13SendMessageToServer\x12\x18.chat_server.TextMessage\x1a\x1b.chat_server.StatusResponse\x12I\n\x17SubscribeToServerEvents\x12\x12.chat_server.Empty\x1a\x18.chat_server.TextMessage0\x01\x12\x38\n\tGetLeader\x12\x12.chat_server.Empty\x1a\x17.chat_server.LeaderInfo\x12\x43\n\x0cQueryHistory\x12\x19.chat_server.HistoryQuery\x1a\x18.chat_server.HistoryPage\x12I\n\x0eSearchMessages\x12\x1a.chat_server.SearchRequest\x1a\x1b.chat_server.SearchResponse2\x82\x02\n\x0cServerModule\x12M\n\x14PushMessageToClients\x12\x18.chat_server.TextMessage\x1a\x1b.chat_server.StatusResponse\x12V\n\x11ReplicateMessages\x12\x1f.chat_server.ReplicationRequest\x1a .chat_server.ReplicationResponse\x12K\n\rFetchSnapshot\x12\x1c.chat_server.SnapshotRequest\x1a\x1a.chat_server.SnapshotChunk0\x01\x32\xd0\x03\n\x0e\x45lectionModule\x12J\n\tHeartbeat\x12\x1d.chat_server.HeartbeatRequest\x1a\x1e.chat_server.HeartbeatResponse\x12G\n\x08\x45lection\x12\x1c.chat_server.ElectionRequest\x1a\x1d.chat_server.ElectionResponse\x12P\n\x0b\x43oordinator\x12\x1f.chat_server.CoordinatorRequest\x1a .chat_server.CoordinatorResponse\x12@\n\tSyncState\x12\x18.chat_server.SyncRequest\x1a\x19.chat_server.SyncResponse\x12Q\n\x12TransferLeadership\x12\x1c.chat_server.TransferRequest\x1a\x1d.chat_server.TransferResponse\x12\x42\n\x10GetElectionStats\x12\x12.chat_server.Empty\x1a\x1a.chat_server.ElectionStats2\xd3\x01\n\x10MembershipModule\x12>\n\x04Ping\x12\x1a.chat_server.GossipMessage\x1a\x1a.chat_server.GossipMessage\x12\x42\n\x07PingReq\x12\x1b.chat_server.PingReqRequest\x1a\x1a.chat_server.GossipMessage\x12;\n\x04Join\x12\x18.chat_server.JoinRequest\x1a\x19.chat_server.JoinResponse2S\n\x0b\x41\x64minModule\x12\x44\n\x07Profile\x12\x1b.chat_server.ProfileRequest\x1a\x1c.chat_server.ProfileResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'chat_server_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
+  _globals['_ELECTIONSTATS_MESSAGESBYTYPEENTRY']._loaded_options = None
+  _globals['_ELECTIONSTATS_MESSAGESBYTYPEENTRY']._serialized_options = b'8\001'
+  _globals['_MEMBERSTATE']._serialized_start=2855
+  _globals['_MEMBERSTATE']._serialized_end=2912
   _globals['_EMPTY']._serialized_start=63
   _globals['_EMPTY']._serialized_end=70
   _globals['_STATUSRESPONSE']._serialized_start=72
@@ -43,23 +47,67 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_HEARTBEATRESPONSE']._serialized_start=292
   _globals['_HEARTBEATRESPONSE']._serialized_end=372
   _globals['_ELECTIONREQUEST']._serialized_start=374
-  _globals['_ELECTIONREQUEST']._serialized_end=440
-  _globals['_ELECTIONRESPONSE']._serialized_start=442
-  _globals['_ELECTIONRESPONSE']._serialized_end=521
-  _globals['_COORDINATORREQUEST']._serialized_start=523
-  _globals['_COORDINATORREQUEST']._serialized_end=589
-  _globals['_COORDINATORRESPONSE']._serialized_start=591
-  _globals['_COORDINATORRESPONSE']._serialized_end=661
-  _globals['_LEADERINFO']._serialized_start=663
-  _globals['_LEADERINFO']._serialized_end=743
-  _globals['_SYNCREQUEST']._serialized_start=745
-  _globals['_SYNCREQUEST']._serialized_end=801
-  _globals['_SYNCRESPONSE']._serialized_start=803
-  _globals['_SYNCRESPONSE']._serialized_end=888
-  _globals['_CLIENTMODULE']._serialized_start=891
-  _globals['_CLIENTMODULE']._serialized_end=1116
-  _globals['_SERVERMODULE']._serialized_start=1118
-  _globals['_SERVERMODULE']._serialized_end=1211
-  _globals['_ELECTIONMODULE']._serialized_start=1214
-  _globals['_ELECTIONMODULE']._serialized_end=1527
+  _globals['_ELECTIONREQUEST']._serialized_end=476
+  _globals['_ELECTIONRESPONSE']._serialized_start=478
+  _globals['_ELECTIONRESPONSE']._serialized_end=571
+  _globals['_COORDINATORREQUEST']._serialized_start=573
+  _globals['_COORDINATORREQUEST']._serialized_end=653
+  _globals['_COORDINATORRESPONSE']._serialized_start=655
+  _globals['_COORDINATORRESPONSE']._serialized_end=725
+  _globals['_LEADERINFO']._serialized_start=727
+  _globals['_LEADERINFO']._serialized_end=807
+  _globals['_SYNCREQUEST']._serialized_start=809
+  _globals['_SYNCREQUEST']._serialized_end=865
+  _globals['_SYNCRESPONSE']._serialized_start=867
+  _globals['_SYNCRESPONSE']._serialized_end=952
+  _globals['_HISTORYQUERY']._serialized_start=954
+  _globals['_HISTORYQUERY']._serialized_end=1079
+  _globals['_HISTORYPAGE']._serialized_start=1081
+  _globals['_HISTORYPAGE']._serialized_end=1204
+  _globals['_SEARCHREQUEST']._serialized_start=1206
+  _globals['_SEARCHREQUEST']._serialized_end=1274
+  _globals['_SEARCHRESPONSE']._serialized_start=1276
+  _globals['_SEARCHRESPONSE']._serialized_end=1363
+  _globals['_REPLICATIONREQUEST']._serialized_start=1365
+  _globals['_REPLICATIONREQUEST']._serialized_end=1475
+  _globals['_REPLICATIONRESPONSE']._serialized_start=1477
+  _globals['_REPLICATIONRESPONSE']._serialized_end=1566
+  _globals['_SNAPSHOTREQUEST']._serialized_start=1568
+  _globals['_SNAPSHOTREQUEST']._serialized_end=1604
+  _globals['_SNAPSHOTCHUNK']._serialized_start=1606
+  _globals['_SNAPSHOTCHUNK']._serialized_end=1710
+  _globals['_TRANSFERREQUEST']._serialized_start=1712
+  _globals['_TRANSFERREQUEST']._serialized_end=1775
+  _globals['_TRANSFERRESPONSE']._serialized_start=1777
+  _globals['_TRANSFERRESPONSE']._serialized_end=1840
+  _globals['_ELECTIONSTATS']._serialized_start=1843
+  _globals['_ELECTIONSTATS']._serialized_end=2219
+  _globals['_ELECTIONSTATS_MESSAGESBYTYPEENTRY']._serialized_start=2166
+  _globals['_ELECTIONSTATS_MESSAGESBYTYPEENTRY']._serialized_end=2219
+  _globals['_ELECTIONEVENT']._serialized_start=2221
+  _globals['_ELECTIONEVENT']._serialized_end=2288
+  _globals['_MEMBERUPDATE']._serialized_start=2290
+  _globals['_MEMBERUPDATE']._serialized_end=2402
+  _globals['_GOSSIPMESSAGE']._serialized_start=2404
+  _globals['_GOSSIPMESSAGE']._serialized_end=2495
+  _globals['_PINGREQREQUEST']._serialized_start=2497
+  _globals['_PINGREQREQUEST']._serialized_end=2619
+  _globals['_JOINREQUEST']._serialized_start=2621
+  _globals['_JOINREQUEST']._serialized_end=2677
+  _globals['_JOINRESPONSE']._serialized_start=2679
+  _globals['_JOINRESPONSE']._serialized_end=2737
+  _globals['_PROFILEREQUEST']._serialized_start=2739
+  _globals['_PROFILEREQUEST']._serialized_end=2785
+  _globals['_PROFILERESPONSE']._serialized_start=2787
+  _globals['_PROFILERESPONSE']._serialized_end=2853
+  _globals['_CLIENTMODULE']._serialized_start=2915
+  _globals['_CLIENTMODULE']._serialized_end=3284
+  _globals['_SERVERMODULE']._serialized_start=3287
+  _globals['_SERVERMODULE']._serialized_end=3545
+  _globals['_ELECTIONMODULE']._serialized_start=3548
+  _globals['_ELECTIONMODULE']._serialized_end=4012
+  _globals['_MEMBERSHIPMODULE']._serialized_start=4015
+  _globals['_MEMBERSHIPMODULE']._serialized_end=4226
+  _globals['_ADMINMODULE']._serialized_start=4228
+  _globals['_ADMINMODULE']._serialized_end=4311
 # @@protoc_insertion_point(module_scope)
@@ -50,6 +50,16 @@ class ClientModuleStub(object):
                 request_serializer=chat__server__pb2.Empty.SerializeToString,
                 response_deserializer=chat__server__pb2.LeaderInfo.FromString,
                 _registered_method=True)
+        self.QueryHistory = channel.unary_unary(
+                '/chat_server.ClientModule/QueryHistory',
+                request_serializer=chat__server__pb2.HistoryQuery.SerializeToString,
+                response_deserializer=chat__server__pb2.HistoryPage.FromString,
+                _registered_method=True)
+        self.SearchMessages = channel.unary_unary(
+                '/chat_server.ClientModule/SearchMessages',
+                request_serializer=chat__server__pb2.SearchRequest.SerializeToString,
+                response_deserializer=chat__server__pb2.SearchResponse.FromString,
+                _registered_method=True)
 
 
 class ClientModuleServicer(object):
@@ -75,6 +85,20 @@ class ClientModuleServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def QueryHistory(self, request, context):
+        """Consulta paginada do histórico (intervalo de tempo, cursor, remetente)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SearchMessages(self, request, context):
+        """Busca textual no histórico (termos e prefixos com '*')
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ClientModuleServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -93,6 +117,16 @@ def add_ClientModuleServicer_to_server(servicer, server):
                     request_deserializer=chat__server__pb2.Empty.FromString,
                     response_serializer=chat__server__pb2.LeaderInfo.SerializeToString,
             ),
+            'QueryHistory': grpc.unary_unary_rpc_method_handler(
+                    servicer.QueryHistory,
+                    request_deserializer=chat__server__pb2.HistoryQuery.FromString,
+                    response_serializer=chat__server__pb2.HistoryPage.SerializeToString,
+            ),
+            'SearchMessages': grpc.unary_unary_rpc_method_handler(
+                    servicer.SearchMessages,
+                    request_deserializer=chat__server__pb2.SearchRequest.FromString,
+                    response_serializer=chat__server__pb2.SearchResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'chat_server.ClientModule', rpc_method_handlers)
@@ -186,6 +220,60 @@ class ClientModule(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def QueryHistory(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat_server.ClientModule/QueryHistory',
+            chat__server__pb2.HistoryQuery.SerializeToString,
+            chat__server__pb2.HistoryPage.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SearchMessages(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat_server.ClientModule/SearchMessages',
+            chat__server__pb2.SearchRequest.SerializeToString,
+            chat__server__pb2.SearchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
 
 class ServerModuleStub(object):
     """Serviço para broadcast de mensagens
@@ -202,6 +290,16 @@ class ServerModuleStub(object):
                 request_serializer=chat__server__pb2.TextMessage.SerializeToString,
                 response_deserializer=chat__server__pb2.StatusResponse.FromString,
                 _registered_method=True)
+        self.ReplicateMessages = channel.unary_unary(
+                '/chat_server.ServerModule/ReplicateMessages',
+                request_serializer=chat__server__pb2.ReplicationRequest.SerializeToString,
+                response_deserializer=chat__server__pb2.ReplicationResponse.FromString,
+                _registered_method=True)
+        self.FetchSnapshot = channel.unary_stream(
+                '/chat_server.ServerModule/FetchSnapshot',
+                request_serializer=chat__server__pb2.SnapshotRequest.SerializeToString,
+                response_deserializer=chat__server__pb2.SnapshotChunk.FromString,
+                _registered_method=True)
 
 
 class ServerModuleServicer(object):
@@ -214,6 +312,20 @@ class ServerModuleServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ReplicateMessages(self, request, context):
+        """Líder replica um lote de mensagens para um peer
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def FetchSnapshot(self, request, context):
+        """Servidor que está (re)entrando no cluster baixa o último snapshot em blocos
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ServerModuleServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -222,6 +334,16 @@ def add_ServerModuleServicer_to_server(servicer, server):
                     request_deserializer=chat__server__pb2.TextMessage.FromString,
                     response_serializer=chat__server__pb2.StatusResponse.SerializeToString,
             ),
+            'ReplicateMessages': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReplicateMessages,
+                    request_deserializer=chat__server__pb2.ReplicationRequest.FromString,
+                    response_serializer=chat__server__pb2.ReplicationResponse.SerializeToString,
+            ),
+            'FetchSnapshot': grpc.unary_stream_rpc_method_handler(
+                    servicer.FetchSnapshot,
+                    request_deserializer=chat__server__pb2.SnapshotRequest.FromString,
+                    response_serializer=chat__server__pb2.SnapshotChunk.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'chat_server.ServerModule', rpc_method_handlers)
@@ -261,9 +383,63 @@ class ServerModule(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def ReplicateMessages(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat_server.ServerModule/ReplicateMessages',
+            chat__server__pb2.ReplicationRequest.SerializeToString,
+            chat__server__pb2.ReplicationResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def FetchSnapshot(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/chat_server.ServerModule/FetchSnapshot',
+            chat__server__pb2.SnapshotRequest.SerializeToString,
+            chat__server__pb2.SnapshotChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
 
 class ElectionModuleStub(object):
-    """Serviço para Algoritmo de Eleição (Bully Algorithm)
+    """Serviço para Algoritmo de Eleição (Bully, Raft ou anel)
     """
 
     def __init__(self, channel):
@@ -292,10 +468,20 @@ class ElectionModuleStub(object):
                 request_serializer=chat__server__pb2.SyncRequest.SerializeToString,
                 response_deserializer=chat__server__pb2.SyncResponse.FromString,
                 _registered_method=True)
+        self.TransferLeadership = channel.unary_unary(
+                '/chat_server.ElectionModule/TransferLeadership',
+                request_serializer=chat__server__pb2.TransferRequest.SerializeToString,
+                response_deserializer=chat__server__pb2.TransferResponse.FromString,
+                _registered_method=True)
+        self.GetElectionStats = channel.unary_unary(
+                '/chat_server.ElectionModule/GetElectionStats',
+                request_serializer=chat__server__pb2.Empty.SerializeToString,
+                response_deserializer=chat__server__pb2.ElectionStats.FromString,
+                _registered_method=True)
 
 
 class ElectionModuleServicer(object):
-    """Serviço para Algoritmo de Eleição (Bully Algorithm)
+    """Serviço para Algoritmo de Eleição (Bully, Raft ou anel)
     """
 
     def Heartbeat(self, request, context):
@@ -326,6 +512,20 @@ class ElectionModuleServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def TransferLeadership(self, request, context):
+        """Transferência explícita de liderança para target_id (handoff)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetElectionStats(self, request, context):
+        """Contadores da estratégia de eleição (mensagens, threads, convergência)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ElectionModuleServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -349,6 +549,16 @@ def add_ElectionModuleServicer_to_server(servicer, server):
                     request_deserializer=chat__server__pb2.SyncRequest.FromString,
                     response_serializer=chat__server__pb2.SyncResponse.SerializeToString,
             ),
+            'TransferLeadership': grpc.unary_unary_rpc_method_handler(
+                    servicer.TransferLeadership,
+                    request_deserializer=chat__server__pb2.TransferRequest.FromString,
+                    response_serializer=chat__server__pb2.TransferResponse.SerializeToString,
+            ),
+            'GetElectionStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetElectionStats,
+                    request_deserializer=chat__server__pb2.Empty.FromString,
+                    response_serializer=chat__server__pb2.ElectionStats.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'chat_server.ElectionModule', rpc_method_handlers)
@@ -358,7 +568,7 @@ def add_ElectionModuleServicer_to_server(servicer, server):
 
  # This class is part of an EXPERIMENTAL API.
 class ElectionModule(object):
-    """Serviço para Algoritmo de Eleição (Bully Algorithm)
+    """Serviço para Algoritmo de Eleição (Bully, Raft ou anel)
     """
 
     @staticmethod
@@ -468,3 +678,297 @@ class ElectionModule(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def TransferLeadership(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat_server.ElectionModule/TransferLeadership',
+            chat__server__pb2.TransferRequest.SerializeToString,
+            chat__server__pb2.TransferResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetElectionStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat_server.ElectionModule/GetElectionStats',
+            chat__server__pb2.Empty.SerializeToString,
+            chat__server__pb2.ElectionStats.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+
+class MembershipModuleStub(object):
+    """Pertinência dinâmica ao cluster (gossip no estilo SWIM)
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.Ping = channel.unary_unary(
+                '/chat_server.MembershipModule/Ping',
+                request_serializer=chat__server__pb2.GossipMessage.SerializeToString,
+                response_deserializer=chat__server__pb2.GossipMessage.FromString,
+                _registered_method=True)
+        self.PingReq = channel.unary_unary(
+                '/chat_server.MembershipModule/PingReq',
+                request_serializer=chat__server__pb2.PingReqRequest.SerializeToString,
+                response_deserializer=chat__server__pb2.GossipMessage.FromString,
+                _registered_method=True)
+        self.Join = channel.unary_unary(
+                '/chat_server.MembershipModule/Join',
+                request_serializer=chat__server__pb2.JoinRequest.SerializeToString,
+                response_deserializer=chat__server__pb2.JoinResponse.FromString,
+                _registered_method=True)
+
+
+class MembershipModuleServicer(object):
+    """Pertinência dinâmica ao cluster (gossip no estilo SWIM)
+    """
+
+    def Ping(self, request, context):
+        """Sonda direta; a resposta (ack) também carrega atualizações de pertinência
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def PingReq(self, request, context):
+        """Sonda indireta: pede a outro membro que sonde target_id
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Join(self, request, context):
+        """Novo servidor entra no cluster por um seed e recebe a lista de membros
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_MembershipModuleServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'Ping': grpc.unary_unary_rpc_method_handler(
+                    servicer.Ping,
+                    request_deserializer=chat__server__pb2.GossipMessage.FromString,
+                    response_serializer=chat__server__pb2.GossipMessage.SerializeToString,
+            ),
+            'PingReq': grpc.unary_unary_rpc_method_handler(
+                    servicer.PingReq,
+                    request_deserializer=chat__server__pb2.PingReqRequest.FromString,
+                    response_serializer=chat__server__pb2.GossipMessage.SerializeToString,
+            ),
+            'Join': grpc.unary_unary_rpc_method_handler(
+                    servicer.Join,
+                    request_deserializer=chat__server__pb2.JoinRequest.FromString,
+                    response_serializer=chat__server__pb2.JoinResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'chat_server.MembershipModule', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('chat_server.MembershipModule', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class MembershipModule(object):
+    """Pertinência dinâmica ao cluster (gossip no estilo SWIM)
+    """
+
+    @staticmethod
+    def Ping(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat_server.MembershipModule/Ping',
+            chat__server__pb2.GossipMessage.SerializeToString,
+            chat__server__pb2.GossipMessage.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def PingReq(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat_server.MembershipModule/PingReq',
+            chat__server__pb2.PingReqRequest.SerializeToString,
+            chat__server__pb2.GossipMessage.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Join(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat_server.MembershipModule/Join',
+            chat__server__pb2.JoinRequest.SerializeToString,
+            chat__server__pb2.JoinResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+
+class AdminModuleStub(object):
+    """Diagnóstico de um servidor vivo (perfil de CPU, pilhas, memória)
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.Profile = channel.unary_unary(
+                '/chat_server.AdminModule/Profile',
+                request_serializer=chat__server__pb2.ProfileRequest.SerializeToString,
+                response_deserializer=chat__server__pb2.ProfileResponse.FromString,
+                _registered_method=True)
+
+
+class AdminModuleServicer(object):
+    """Diagnóstico de um servidor vivo (perfil de CPU, pilhas, memória)
+    """
+
+    def Profile(self, request, context):
+        """Ações: cpu-start, cpu-stop, stacks, heap-snapshot, heap-stop, status
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_AdminModuleServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'Profile': grpc.unary_unary_rpc_method_handler(
+                    servicer.Profile,
+                    request_deserializer=chat__server__pb2.ProfileRequest.FromString,
+                    response_serializer=chat__server__pb2.ProfileResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'chat_server.AdminModule', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('chat_server.AdminModule', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class AdminModule(object):
+    """Diagnóstico de um servidor vivo (perfil de CPU, pilhas, memória)
+    """
+
+    @staticmethod
+    def Profile(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/chat_server.AdminModule/Profile',
+            chat__server__pb2.ProfileRequest.SerializeToString,
+            chat__server__pb2.ProfileResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
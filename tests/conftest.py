@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Raiz do projeto (common, election, chat_server...) e experiments/ (scripts de medição)
+for path in (ROOT, os.path.join(ROOT, "experiments")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+class FakeClock:
+    """Relógio controlado pelo teste: devolve `now`, que o teste avança à mão."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
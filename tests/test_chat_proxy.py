@@ -0,0 +1,48 @@
+import queue
+
+import pytest
+
+pytest.importorskip("grpc")
+pytest.importorskip("google.protobuf")
+
+from proto import chat_server_pb2 as pb
+from chat_proxy import ChatProxy
+
+
+def _drain(q):
+    items = []
+    while not q.empty():
+        items.append(q.get_nowait())
+    return [(m.lamport_timestamp, m.client_id_from, m.content) for m in items]
+
+
+@pytest.fixture
+def proxy():
+    # Sem start(): nenhum canal é aberto, só o fan-out local é exercitado
+    proxy = ChatProxy(port=0, servers=[])
+    proxy.a, proxy.b = queue.Queue(), queue.Queue()
+    proxy._subscribers.update({100001: proxy.a, 100002: proxy.b})
+    return proxy
+
+
+def test_deliver_drops_duplicates_by_timestamp_and_sender(proxy):
+    proxy._deliver(pb.TextMessage(client_id_from=5, content="x", lamport_timestamp=10))
+    proxy._deliver(pb.TextMessage(client_id_from=5, content="x", lamport_timestamp=10))
+    # Mesmo timestamp, outro remetente (timestamp reatribuído após failover): não é duplicata
+    proxy._deliver(pb.TextMessage(client_id_from=6, content="y", lamport_timestamp=10))
+
+    assert _drain(proxy.a) == [(10, 5, "x"), (10, 6, "y")]
+    assert _drain(proxy.b) == [(10, 5, "x"), (10, 6, "y")]
+
+
+def test_deliver_skips_the_sender(proxy):
+    proxy._deliver(pb.TextMessage(client_id_from=100001, content="minha", lamport_timestamp=3))
+    assert _drain(proxy.a) == []
+    assert _drain(proxy.b) == [(3, 100001, "minha")]
+
+
+def test_seen_window_is_bounded(proxy):
+    proxy.SEEN_WINDOW = 3
+    for ts in range(1, 6):
+        proxy._deliver(pb.TextMessage(client_id_from=5, content="m", lamport_timestamp=ts))
+    assert list(proxy._seen) == [(3, 5), (4, 5), (5, 5)]
@@ -0,0 +1,216 @@
+import queue
+from concurrent import futures
+
+import pytest
+
+# O servidor depende das mensagens geradas do protocolo (proto/) e do gRPC
+grpc = pytest.importorskip("grpc")
+pytest.importorskip("google.protobuf")
+
+from proto import chat_server_pb2 as pb
+from proto import chat_server_pb2_grpc as pb_grpc
+import chat_server
+from chat_server import ChatService
+
+
+class Aborted(Exception):
+    def __init__(self, code, details):
+        super().__init__(details)
+        self.code = code
+
+
+class FakeContext:
+    """Contexto de servidor gRPC mínimo para chamar os handlers diretamente."""
+
+    def __init__(self, metadata=(), peer='ipv4:127.0.0.1:40000'):
+        self._metadata = tuple(metadata)
+        self._peer = peer
+        self.trailing_metadata = ()
+
+    def invocation_metadata(self):
+        return self._metadata
+
+    def peer(self):
+        return self._peer
+
+    def is_active(self):
+        return True
+
+    def set_trailing_metadata(self, metadata):
+        self.trailing_metadata = metadata
+
+    def abort(self, code, details):
+        raise Aborted(code, details)
+
+
+@pytest.fixture
+def make_service(tmp_path):
+    services = []
+
+    def make(**opts):
+        opts.setdefault('peers', [])
+        service = ChatService(server_id=1, port=0, profile_dir=str(tmp_path), **opts)
+        services.append(service)
+        return service
+
+    yield make
+    for service in services:
+        service._search_index.stop()
+        service._replicator.stop()
+
+
+def _subscribe(service, client_id):
+    q = queue.Queue()
+    with service._lock:
+        service._subscribers[client_id] = q
+    return q
+
+
+def test_majority_timeout_still_delivers_and_reports_failure(make_service):
+    # Peer inalcançável e replicador parado: a maioria nunca confirma
+    service = make_service(peers=[(2, 'localhost:1')], ack_level='majority', ack_timeout=0.05)
+    other = _subscribe(service, 8)
+    sender = _subscribe(service, 7)
+
+    response = service.SendMessageToServer(
+        pb.TextMessage(client_id_from=7, content="sem quorum", lamport_timestamp=1), FakeContext())
+
+    assert not response.success
+    assert response.message == chat_server.QUORUM_TIMEOUT_MESSAGE
+    delivered = other.get_nowait()
+    assert (delivered.client_id_from, delivered.content) == (7, "sem quorum")
+    assert sender.empty()
+    with service._lock:
+        assert [c for _, _, c in service._message_history] == ["sem quorum"]
+
+
+def _msg(ts, sender, content=""):
+    return pb.TextMessage(lamport_timestamp=ts, client_id_from=sender, content=content)
+
+
+def _keys(messages):
+    return [(m.lamport_timestamp, m.client_id_from) for m in messages]
+
+
+def test_merge_histories_orders_by_timestamp_then_sender():
+    a = [_msg(1, 2), _msg(4, 1), _msg(6, 3)]
+    b = [_msg(2, 1), _msg(4, 0), _msg(7, 1)]
+    assert _keys(chat_server.merge_histories([a, b])) == [
+        (1, 2), (2, 1), (4, 0), (4, 1), (6, 3), (7, 1)]
+
+
+def test_merge_histories_drops_overlapping_copies():
+    # Três peers com históricos sobrepostos: cada mensagem aparece uma única vez
+    a = [_msg(1, 1, "x"), _msg(2, 2, "y"), _msg(3, 1, "z")]
+    b = [_msg(2, 2, "y"), _msg(3, 1, "z"), _msg(5, 2, "w")]
+    c = [_msg(3, 1, "z")]
+    merged = chat_server.merge_histories([a, b, c])
+    assert _keys(merged) == [(1, 1), (2, 2), (3, 1), (5, 2)]
+    assert [m.content for m in merged] == ["x", "y", "z", "w"]
+
+
+def test_merge_histories_keeps_same_timestamp_from_different_senders():
+    assert _keys(chat_server.merge_histories([[_msg(3, 1)], [_msg(3, 2)], []])) == [(3, 1), (3, 2)]
+    assert chat_server.merge_histories([]) == []
+
+
+class Successor(pb_grpc.ElectionModuleServicer, pb_grpc.ClientModuleServicer):
+    """Peer real (gRPC local) que aceita a liderança e recebe as escritas repassadas."""
+
+    def __init__(self, server_id, on_transfer):
+        self.server_id = server_id
+        self.on_transfer = on_transfer
+        self.transfers = []
+        self.writes = []
+
+    def Heartbeat(self, request, context):
+        return pb.HeartbeatResponse(alive=True, leader_id=0)
+
+    def TransferLeadership(self, request, context):
+        self.transfers.append(request.target_id)
+        self.on_transfer(self.server_id)
+        return pb.TransferResponse(accepted=True)
+
+    def SendMessageToServer(self, request, context):
+        self.writes.append(request.content)
+        return pb.StatusResponse(success=True, client_id=request.client_id_from)
+
+
+@pytest.fixture
+def successor():
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    peer = Successor(2, on_transfer=lambda leader_id: None)
+    pb_grpc.add_ElectionModuleServicer_to_server(peer, server)
+    pb_grpc.add_ClientModuleServicer_to_server(peer, server)
+    peer.address = f"localhost:{server.add_insecure_port('localhost:0')}"
+    server.start()
+    yield peer
+    server.stop(0)
+
+
+def test_drain_hands_off_and_redirects_subscribers(make_service, successor):
+    service = make_service(peers=[(2, successor.address)], advertise={2: 'publico:50052'})
+    # O sucessor anuncia COORDINATOR ao aceitar a liderança
+    successor.on_transfer = lambda leader_id: service._election.handle_coordinator(
+        pb.CoordinatorRequest(leader_id=leader_id, lamport_timestamp=1))
+    service._election.set_leader(1)
+    subscriber = _subscribe(service, 7)
+
+    assert service.drain(timeout=2.0) == successor.address
+    assert successor.transfers == [2]
+    assert service._election.get_leader() == 2
+    redirect = subscriber.get_nowait()
+    assert redirect.content == "REDIRECT:publico:50052"
+    assert subscriber.get_nowait() is None  # stream encerrado
+
+    # Escritas que chegam depois da drenagem vão para o novo líder
+    response = service.SendMessageToServer(
+        pb.TextMessage(client_id_from=7, content="depois", lamport_timestamp=2), FakeContext())
+    assert response.success
+    assert successor.writes == ["depois"]
+
+
+def test_drain_is_a_no_op_on_followers(make_service):
+    service = make_service(peers=[(2, 'localhost:1')])
+    service._election.set_leader(2)
+    assert service.drain(timeout=0.1) is None
+    assert not service._draining
+
+
+def _send(service, client_id, ts, context=None):
+    return service.SendMessageToServer(
+        pb.TextMessage(client_id_from=client_id, content="oi", lamport_timestamp=ts), context or FakeContext())
+
+
+def test_rate_limit_is_off_by_default(make_service):
+    service = make_service()
+    for ts in range(1, 201):
+        assert _send(service, 7, ts).success
+
+
+def test_rate_limit_is_per_client_id_not_per_connection(make_service):
+    service = make_service(rate_limit=1.0, rate_burst=1.0)
+    assert _send(service, 7, 1).success
+    context = FakeContext()
+    with pytest.raises(Aborted) as exc:
+        _send(service, 7, 2, context)
+    assert exc.value.code == grpc.StatusCode.RESOURCE_EXHAUSTED
+    assert context.trailing_metadata[0][0] == chat_server.RETRY_AFTER_KEY
+    # Outro cliente pela mesma conexão (ex.: atrás do chat_proxy) tem o seu próprio limite
+    assert _send(service, 8, 3).success
+
+
+def test_history_query_rejects_negative_limit(make_service):
+    service = make_service()
+    for ts in range(1, 4):
+        _send(service, 7, ts)
+
+    page = service.QueryHistory(pb.HistoryQuery(limit=2), FakeContext())
+    assert [m.content for m in page.messages] == ["oi", "oi"] and page.has_more
+    assert len(service.QueryHistory(pb.HistoryQuery(), FakeContext()).messages) == 3
+    with pytest.raises(Aborted) as exc:
+        service.QueryHistory(pb.HistoryQuery(limit=-1), FakeContext())
+    assert exc.value.code == grpc.StatusCode.INVALID_ARGUMENT
+    with pytest.raises(Aborted) as exc:
+        service.SearchMessages(pb.SearchRequest(query="oi", limit=-1), FakeContext())
+    assert exc.value.code == grpc.StatusCode.INVALID_ARGUMENT
@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+
+from common import LamportClock, HybridLogicalClock
+from common.hybrid_clock import LOGICAL_BITS
+
+
+def test_lamport_update_takes_max_plus_one():
+    clock = LamportClock()
+    assert clock.incrementaRelogio() == 1
+    assert clock.updateRelogio(10) == 11
+    assert clock.updateRelogio(3) == 12
+    assert clock.get_time() == 12
+
+
+def test_lamport_reserva_equals_update_then_increments():
+    reserved = LamportClock()
+    stepped = LamportClock()
+    reserved.updateRelogio(5)
+    stepped.updateRelogio(5)
+
+    first = reserved.reservaRelogio(4, received_timestamp=20)
+    expected = [stepped.updateRelogio(20)] + [stepped.incrementaRelogio() for _ in range(3)]
+    assert list(range(first, first + 4)) == expected
+    assert reserved.get_time() == stepped.get_time()
+
+    with pytest.raises(ValueError):
+        reserved.reservaRelogio(0)
+
+
+def test_lamport_reservations_do_not_overlap_across_threads():
+    clock = LamportClock()
+    ranges = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(200):
+            first = clock.reservaRelogio(5)
+            with lock:
+                ranges.append(first)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stamps = [ts for first in ranges for ts in range(first, first + 5)]
+    assert len(stamps) == len(set(stamps)) == 4 * 200 * 5
+    assert clock.get_time() == max(stamps)
+
+
+def test_hlc_follows_physical_time_and_encodes_it(fake_clock):
+    wall = fake_clock
+    wall.now = 1700000000.0
+    clock = HybridLogicalClock(clock=wall)
+    ts = clock.incrementaRelogio()
+    assert ts == HybridLogicalClock.from_wall_time(wall.now)
+    assert HybridLogicalClock.wall_time(ts) == pytest.approx(wall.now, abs=0.001)
+
+    wall.now += 2.5
+    later = clock.incrementaRelogio()
+    assert later == HybridLogicalClock.from_wall_time(wall.now)
+    assert HybridLogicalClock.wall_time(later) - HybridLogicalClock.wall_time(ts) == pytest.approx(2.5, abs=0.001)
+
+
+def test_hlc_logical_counter_when_time_stalls_or_goes_back(fake_clock):
+    wall = fake_clock
+    wall.now = 1700000000.0
+    clock = HybridLogicalClock(clock=wall)
+    first = clock.incrementaRelogio()
+    second = clock.incrementaRelogio()
+    wall.now -= 10  # relógio físico recua: o HLC continua monotônico
+    third = clock.incrementaRelogio()
+    assert (second, third) == (first + 1, first + 2)
+    assert HybridLogicalClock.wall_time(third) == HybridLogicalClock.wall_time(first)
+    assert third & ((1 << LOGICAL_BITS) - 1) == 2
+
+
+def test_hlc_receive_is_causal(fake_clock):
+    wall = fake_clock
+    wall.now = 1700000000.0
+    clock = HybridLogicalClock(clock=wall)
+    remote = HybridLogicalClock.from_wall_time(wall.now + 60) + 7  # remetente adiantado
+    assert clock.updateRelogio(remote) == remote + 1
+    assert clock.updateRelogio(0) == remote + 2
+    # Evento recebido com timestamp antigo não faz o relógio recuar
+    wall.now += 120
+    now = HybridLogicalClock.from_wall_time(wall.now)
+    assert clock.updateRelogio(remote) == now
+
+
+def test_hlc_reserva_returns_contiguous_range(fake_clock):
+    wall = fake_clock
+    wall.now = 1700000000.0
+    clock = HybridLogicalClock(clock=wall)
+    start = clock.incrementaRelogio()
+    first = clock.reservaRelogio(3)
+    assert first == start + 1
+    assert clock.get_time() == first + 2
+    assert clock.incrementaRelogio() == first + 3
+    with pytest.raises(ValueError):
+        clock.reservaRelogio(0)
@@ -0,0 +1,119 @@
+import pytest
+
+# As estratégias trocam as mensagens do protocolo (proto/) e tratam erros do gRPC
+grpc = pytest.importorskip("grpc")
+pytest.importorskip("google.protobuf")
+
+from proto import chat_server_pb2 as pb
+from common.lamport_clock import LamportClock
+from election import BullyElection, SystemRuntime
+
+
+class Unreachable(grpc.RpcError):
+    def code(self):
+        return grpc.StatusCode.UNAVAILABLE
+
+
+class FakeTransport:
+    """Responde às mensagens de eleição conforme o líder que cada peer anuncia."""
+
+    def __init__(self, leaders, down=()):
+        self.leaders = dict(leaders)  # endereço -> líder anunciado no heartbeat
+        self.down = set(down)
+        self.sent = []
+
+    def call(self, peer_addr, method, request, timeout):
+        if peer_addr in self.down:
+            raise Unreachable()
+        self.sent.append((peer_addr, method, request))
+        if method == 'Heartbeat':
+            return pb.HeartbeatResponse(alive=True, leader_id=self.leaders.get(peer_addr, 0))
+        if method == 'Election':
+            return pb.ElectionResponse(ok=False)
+        return pb.CoordinatorResponse(acknowledged=True)
+
+    def methods(self):
+        return [(addr, method) for addr, method, _ in self.sent]
+
+
+class InlineRuntime(SystemRuntime):
+    """Executa as threads da eleição no próprio chamador, para o teste ser determinístico."""
+
+    def spawn(self, target, *args):
+        target(*args)
+
+
+PEERS = [(1, 'n1'), (3, 'n3')]
+
+
+def _election(transport, sticky):
+    return BullyElection(5, list(PEERS), LamportClock(), sticky=sticky,
+                         transport=transport, runtime=InlineRuntime())
+
+
+def test_sticky_rejoin_follows_live_leader():
+    transport = FakeTransport({'n1': 3, 'n3': 3})
+    election = _election(transport, sticky=True)
+    election.join_cluster()
+    assert election.get_leader() == 3
+    assert not election.am_i_leader()
+    # Só heartbeats: nenhum COORDINATOR forçando os clientes a reconectar
+    assert {method for _, method in transport.methods()} == {'Heartbeat'}
+
+
+def test_plain_bully_rejoin_takes_leadership_back():
+    transport = FakeTransport({'n1': 3, 'n3': 3})
+    election = _election(transport, sticky=False)
+    election.join_cluster()
+    assert election.am_i_leader()
+    assert transport.methods() == [('n1', 'Coordinator'), ('n3', 'Coordinator')]
+
+
+def test_sticky_rejoin_without_leader_runs_election():
+    election = _election(FakeTransport({}, down={'n1', 'n3'}), sticky=True)
+    election.join_cluster()
+    assert election.am_i_leader()
+
+
+def test_sticky_node_points_candidate_to_live_leader():
+    transport = FakeTransport({'n3': 3})
+    election = _election(transport, sticky=True)
+    election.set_leader(3)
+
+    ok, responder = election.handle_election(pb.ElectionRequest(candidate_id=1, lamport_timestamp=1))
+    assert (ok, responder) == (True, 5)
+    assert election.get_leader() == 3
+    assert transport.methods() == [('n3', 'Heartbeat'), ('n1', 'Coordinator')]
+    assert transport.sent[-1][2].leader_id == 3
+
+
+def test_sticky_node_takes_over_when_leader_is_dead():
+    transport = FakeTransport({}, down={'n3'})
+    election = _election(transport, sticky=True)
+    election.set_leader(3)
+
+    election.handle_election(pb.ElectionRequest(candidate_id=1, lamport_timestamp=1))
+    assert election.am_i_leader()
+    assert transport.methods() == [('n1', 'Coordinator')]
+
+
+def test_explicit_request_hands_leadership_to_higher_id():
+    transport = FakeTransport({'n3': 3})
+    election = _election(transport, sticky=True)
+    election.join_cluster()
+    election.request_leadership()
+    assert election.am_i_leader()
+    assert transport.methods()[-2:] == [('n1', 'Coordinator'), ('n3', 'Coordinator')]
+
+
+def test_heartbeats_are_counted_apart_from_election_messages():
+    transport = FakeTransport({'n1': 3, 'n3': 3})
+    election = _election(transport, sticky=True)
+    election.join_cluster()
+    assert election.is_alive(3)
+    election.request_leadership()
+
+    stats = election.stats.as_dict()
+    assert stats['heartbeats_sent'] == 3
+    assert stats['messages_by_type'] == {'coordinator': 2}
+    assert stats['messages_sent'] == 2
@@ -0,0 +1,42 @@
+import pytest
+
+# O simulador usa as mensagens do protocolo (proto/) e os códigos de erro do gRPC
+pytest.importorskip("grpc")
+pytest.importorskip("google.protobuf")
+
+from election_simulator import simulate
+
+
+def _outcome(rows):
+    return [{k: v for k, v in r.items() if k != "wall_s"} for r in rows]
+
+
+@pytest.mark.parametrize("strategy", ["bully", "raft", "ring"])
+def test_same_seed_same_run(strategy):
+    first = simulate(strategy, 7, "cascade", seed=11, warmup=15.0, window=30.0)
+    second = simulate(strategy, 7, "cascade", seed=11, warmup=15.0, window=30.0)
+    assert _outcome(first) == _outcome(second)
+
+
+@pytest.mark.parametrize("strategy", ["bully", "ring"])
+def test_highest_live_id_wins(strategy):
+    rows = simulate(strategy, 6, "cascade", seed=2, warmup=15.0, window=30.0)
+    assert [r["event"] for r in rows][0] == "partida"
+    assert all(r["converged"] for r in rows)
+    # Partida elege o 6; cada queda do líder passa a liderança ao maior ID restante
+    assert [r["leader"] for r in rows] == [6, 5, 4, 3]
+
+
+def test_raft_elects_a_new_leader_after_crash():
+    rows = simulate("raft", 5, "leader_crash", seed=4, warmup=15.0, window=30.0)
+    start, crash = rows
+    assert start["converged"] and crash["converged"]
+    assert crash["leader"] != start["leader"]
+    assert crash["elections_started"] >= 1
+
+
+def test_isolated_leader_is_replaced_on_majority_side():
+    rows = simulate("bully", 5, "isolate_leader", seed=5, warmup=15.0, window=30.0)
+    start, isolated = rows[:2]
+    assert start["leader"] == 5
+    assert isolated["converged"] and isolated["leader"] == 4
@@ -0,0 +1,96 @@
+import socket
+import socketserver
+import threading
+import time
+
+import pytest
+
+from fault_proxy import CLIENTS, FaultProxy
+
+
+class _Echo(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            data = self.request.recv(4096)
+            if not data:
+                return
+            self.request.sendall(data)
+
+
+@pytest.fixture
+def echo_port():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _Echo)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def proxy(echo_port):
+    # Porta livre para o único enlace clientes -> nó 1 (base + 0*10 + 1)
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        free = s.getsockname()[1]
+    proxy = FaultProxy({1: echo_port}, base_port=free - 1, seed=1).start()
+    yield proxy
+    proxy.stop()
+
+
+def _connect(proxy):
+    host, port = proxy.link_addr(CLIENTS, 1).split(":")
+    conn = socket.create_connection((host, int(port)), timeout=2)
+    conn.settimeout(2)
+    return conn
+
+
+def test_addresses():
+    proxy = FaultProxy({1: 50051, 2: 50052, 3: 50053}, base_port=51000)
+    assert proxy.link_port(2, 3) == 51023
+    assert proxy.peers_for(2) == "1:127.0.0.1:51021,3:127.0.0.1:51023"
+    assert proxy.advertise() == "1:127.0.0.1:51001,2:127.0.0.1:51002,3:127.0.0.1:51003"
+    with pytest.raises(ValueError):
+        FaultProxy({10: 50060})
+
+
+def test_delay_applies_in_each_direction(proxy):
+    with _connect(proxy) as conn:
+        conn.sendall(b"ping")
+        assert conn.recv(16) == b"ping"  # conexão aquecida, sem atraso
+
+        proxy.set(delay=0.1)
+        t0 = time.monotonic()
+        conn.sendall(b"pong")
+        assert conn.recv(16) == b"pong"
+        assert time.monotonic() - t0 >= 0.2
+
+    stats = proxy.stats()
+    assert stats["0->1"]["bytes"] == stats["1->0"]["bytes"] == 8
+    assert stats["0->1"]["connections"] == 1
+
+
+def test_partition_holds_traffic_until_heal(proxy):
+    with _connect(proxy) as conn:
+        conn.sendall(b"a")
+        assert conn.recv(16) == b"a"
+
+        proxy.isolate(1)
+        assert proxy.stats()["0->1"]["blocked"]
+        conn.sendall(b"retido")
+        conn.settimeout(0.3)
+        with pytest.raises(socket.timeout):
+            conn.recv(16)
+
+        proxy.heal()
+        conn.settimeout(2)
+        assert conn.recv(16) == b"retido"
+
+
+def test_script_steps(proxy):
+    assert proxy.apply_step({"action": "set", "dst": 1, "loss": 0.5, "ignored": 1}) == \
+        "set *->1 {'loss': 0.5}"
+    assert proxy.apply_step({"action": "isolate_leader"}, resolve_leader=lambda: None).startswith(
+        "isolate_leader: líder desconhecido")
+    with pytest.raises(ValueError):
+        proxy.apply_step({"action": "reboot"})
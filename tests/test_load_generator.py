@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("grpc")
+pytest.importorskip("google.protobuf")
+
+from load_generator import LatencyHistogram
+
+
+def _us(n):
+    # Meio microssegundo a mais para o truncamento em record() não depender do arredondamento
+    return (n + 0.5) / 1e6
+
+
+def _filled(values_us):
+    h = LatencyHistogram()
+    for n in values_us:
+        h.record(_us(n))
+    return h
+
+
+def test_percentiles_are_exact_for_small_values():
+    h = _filled(range(1, 101))
+    assert h.total == 100
+    assert h.percentile(50) == pytest.approx(50e-6)
+    assert h.percentile(99) == pytest.approx(99e-6)
+    assert h.percentile(100) == pytest.approx(100e-6)
+    assert h.percentile(0) == pytest.approx(1e-6)
+    assert h.mean() == pytest.approx(50.5e-6)
+    assert LatencyHistogram().percentile(99) == 0.0
+
+
+def test_relative_error_is_bounded_for_large_values():
+    h = LatencyHistogram()
+    for seconds in (0.001, 0.01, 0.1, 1.0, 10.0):
+        h.record(seconds)
+    bound = 1.0 / 2 ** LatencyHistogram.SUB_BITS
+    assert h.percentile(20) == pytest.approx(0.001, rel=bound)
+    assert h.percentile(60) == pytest.approx(0.1, rel=bound)
+    assert h.percentile(80) == pytest.approx(1.0, rel=bound)
+    # O ponto médio do último balde nunca passa do máximo observado
+    assert h.percentile(100) == pytest.approx(10.0, rel=bound)
+    assert h.percentile(100) <= 10.0
+
+
+def test_merge_matches_single_histogram():
+    values = [3, 70, 255, 300, 4_000, 65_000, 1_000_000, 7]
+    single = _filled(values)
+    a = _filled(values[:4])
+    b = _filled(values[4:])
+
+    merged = LatencyHistogram().merge(a).merge(b)
+    assert merged.counts == single.counts
+    assert merged.total == single.total == len(values)
+    assert merged.min_us == 3
+    assert merged.max_us == 1_000_000
+    for p in (50, 90, 99, 99.9):
+        assert merged.percentile(p) == single.percentile(p)
+    assert merged.summary() == single.summary()
+
+
+def test_dict_round_trip():
+    h = _filled([1, 200, 5_000, 5_001, 90_000])
+    copy = LatencyHistogram.from_dict(h.to_dict())
+    assert copy.counts == h.counts
+    assert copy.summary("lat_") == h.summary("lat_")
@@ -0,0 +1,82 @@
+import pytest
+
+pytest.importorskip("grpc")
+pytest.importorskip("google.protobuf")
+
+from proto import chat_server_pb2 as pb
+from common import LamportClock
+from chat_server import Replicator
+from election import make_election
+from membership import SwimMembership
+
+
+def _update(server_id, state, incarnation, address=None):
+    return pb.MemberUpdate(server_id=server_id, address=address or f"sim:{server_id}",
+                           state=state, incarnation=incarnation)
+
+
+@pytest.fixture
+def swim():
+    # Sem start()/join(): só o merge de estado, nenhum RPC
+    events = []
+    peers = [(2, "sim:2"), (3, "sim:3")]
+    swim = SwimMembership(1, "sim:1", peers,
+                          on_join=lambda pid, addr: events.append(('join', pid)),
+                          on_leave=lambda pid: events.append(('leave', pid)))
+    swim.events = events
+    yield swim
+    swim._pool.shutdown(wait=False)
+
+
+def _state(swim, server_id):
+    member = swim._members[server_id]
+    return pb.MemberState.Name(member.state), member.incarnation
+
+
+def test_suspect_beats_alive_only_at_same_or_higher_incarnation(swim):
+    swim.merge([_update(2, pb.SUSPECT, 0)])
+    assert _state(swim, 2) == ('SUSPECT', 0)
+    swim.merge([_update(2, pb.ALIVE, 0)])  # refutação precisa de encarnação maior
+    assert _state(swim, 2) == ('SUSPECT', 0)
+    swim.merge([_update(2, pb.ALIVE, 1)])
+    assert _state(swim, 2) == ('ALIVE', 1)
+    swim.merge([_update(2, pb.SUSPECT, 0)])  # suspeita antiga é ignorada
+    assert _state(swim, 2) == ('ALIVE', 1)
+    assert swim.events == []
+
+
+def test_dead_needs_higher_incarnation_to_come_back(swim):
+    swim.merge([_update(3, pb.DEAD, 0)])
+    assert _state(swim, 3) == ('DEAD', 0)
+    swim.merge([_update(3, pb.ALIVE, 0)])
+    swim.merge([_update(3, pb.SUSPECT, 0)])
+    assert _state(swim, 3) == ('DEAD', 0)
+    swim.merge([_update(3, pb.ALIVE, 1)])
+    assert _state(swim, 3) == ('ALIVE', 1)
+    assert swim.events == [('leave', 3), ('join', 3)]
+
+
+def test_suspicion_about_self_is_refuted(swim):
+    swim.merge([_update(1, pb.SUSPECT, 4)])
+    assert swim.incarnation == 5
+    assert swim._updates[1][0].state == pb.ALIVE
+    assert swim._updates[1][0].incarnation == 5
+
+
+def test_failures_do_not_shrink_quorum_or_majority(swim):
+    peers = swim.peers
+    replicator = Replicator(1, peers, LamportClock())
+    raft = make_election('raft', server_id=1, peers=peers, lamport_clock=LamportClock())
+    assert (replicator.quorum_peers(), raft._majority()) == (1, 2)
+
+    # O lado minoritário (só o servidor 1) marca os outros como mortos
+    swim.merge([_update(2, pb.DEAD, 0), _update(3, pb.DEAD, 0)])
+    assert swim.peers is peers
+    assert peers == [(2, "sim:2"), (3, "sim:3")]
+    assert (replicator.quorum_peers(), raft._majority()) == (1, 2)
+
+    # Entrada aumenta o cluster; só a saída anunciada (LEFT) o reduz
+    swim.merge([_update(4, pb.ALIVE, 0)])
+    assert [pid for pid, _ in peers] == [2, 3, 4]
+    swim.merge([_update(4, pb.LEFT, 0)])
+    assert [pid for pid, _ in peers] == [2, 3]
@@ -0,0 +1,111 @@
+import pytest
+
+from common import MessageHistory
+
+
+def _fill(history, n, start=1, senders=3):
+    for ts in range(start, start + n):
+        history.append(ts % senders, ts, f"msg {ts}")
+
+
+def test_retention_by_count_survives_compaction():
+    history = MessageHistory(max_messages=100)
+    _fill(history, 5000)
+
+    assert len(history) == 100
+    assert history.first_timestamp() == 4901
+    assert history.last_timestamp() == 5000
+    assert [ts for ts, _, _ in history] == list(range(4901, 5001))
+    assert history.lookup(4900) is None
+    assert history.lookup(4950) == (4950, 4950 % 3, "msg 4950")
+
+
+def test_retention_by_bytes_and_age(fake_clock):
+    by_bytes = MessageHistory(max_messages=None, max_bytes=10)
+    for ts, content in enumerate(["abcd", "éfg", "hijk", "l"], start=1):
+        by_bytes.append(1, ts, content)
+    # "éfg" ocupa 4 bytes em UTF-8: 4 + 4 + 1 cabem em 10 bytes, 4 + 4 + 4 + 1 não
+    assert [c for _, _, c in by_bytes] == ["éfg", "hijk", "l"]
+    assert by_bytes.nbytes == 9
+
+    clock = fake_clock
+    by_age = MessageHistory(max_messages=None, max_age_s=10, clock=clock)
+    by_age.append(1, 1, "velha")
+    clock.now += 5
+    by_age.append(1, 2, "média")
+    clock.now += 6
+    by_age.append(1, 3, "nova")
+    assert [ts for ts, _, _ in by_age] == [2, 3]
+    clock.now += 20
+    by_age.evict()
+    assert len(by_age) == 0
+    assert by_age.first_timestamp() == 0
+
+
+def test_since_and_query_filters(fake_clock):
+    clock = fake_clock
+    history = MessageHistory(max_messages=None, clock=clock)
+    for ts in range(1, 21):
+        history.append(ts % 2, ts, f"m{ts}")
+        clock.now += 1.0
+
+    assert [ts for ts, _, _ in history.since(17)] == [18, 19, 20]
+    assert [ts for ts, _, _ in history.query(after_ts=5, before_ts=9)] == [6, 7, 8]
+    assert [ts for ts, _, _ in history.query(after_ts=5, limit=2)] == [6, 7]
+    assert [ts for ts, _, _ in history.query(before_ts=9, limit=2, reverse=True)] == [8, 7]
+    assert [ts for ts, _, _ in history.query(client_id=1, after_ts=10, limit=3)] == [11, 13, 15]
+    assert [ts for ts, _, _ in history.query(client_id=0, limit=2, reverse=True)] == [20, 18]
+    assert history.query(client_id=7) == []
+    # Chegadas em 1000, 1001, ...: [1003, 1006) são os timestamps 4, 5 e 6
+    assert [ts for ts, _, _ in history.query(start_time=1003, end_time=1006)] == [4, 5, 6]
+
+
+def test_sender_index_after_compaction():
+    history = MessageHistory(max_messages=50)
+    _fill(history, 3000, senders=4)
+
+    page = history.query(client_id=2, limit=5)
+    assert [ts for ts, _, _ in page] == [2954, 2958, 2962, 2966, 2970]
+    assert all(cid == 2 for _, cid, _ in page)
+    assert len(history.query(client_id=2)) == len([ts for ts, cid, _ in history if cid == 2])
+
+
+def test_snapshot_round_trip(fake_clock):
+    clock = fake_clock
+    history = MessageHistory(max_messages=100, clock=clock)
+    for ts in range(1, 2501):
+        history.append(ts % 5, ts, f"conteúdo {ts}")
+        clock.now += 0.5
+    data = history.to_bytes()
+
+    restored = MessageHistory(max_messages=100)
+    restored.load_bytes(data)
+    assert list(restored) == list(history)
+    assert restored.nbytes == history.nbytes
+    assert restored.query(client_id=3, limit=2) == history.query(client_id=3, limit=2)
+    assert restored.query(start_time=2200.0) == history.query(start_time=2200.0)
+
+    # O snapshot respeita a retenção de quem carrega
+    smaller = MessageHistory(max_messages=10)
+    smaller.load_bytes(data)
+    assert [ts for ts, _, _ in smaller] == list(range(2491, 2501))
+
+    empty = MessageHistory()
+    empty.load_bytes(MessageHistory().to_bytes())
+    assert len(empty) == 0
+
+    with pytest.raises(ValueError):
+        restored.load_bytes(b'XXXX' + data[4:])
+
+
+def test_capture_is_isolated_from_later_writes():
+    history = MessageHistory(max_messages=100)
+    _fill(history, 1500)
+    expected = list(history)
+    captured = history.capture()
+    # Escritas depois da captura (com compactação física) não alteram o snapshot
+    _fill(history, 3000, start=1501)
+
+    restored = MessageHistory(max_messages=100)
+    restored.load_bytes(MessageHistory.encode_snapshot(captured))
+    assert list(restored) == expected
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+import proc_stats
+from proc_stats import ProcSample, ProcSampler, cluster_usage, read_proc
+
+
+@pytest.fixture
+def fake_proc(tmp_path, monkeypatch):
+    """Redireciona /proc para um diretório temporário montado pelo teste."""
+    real_open, real_listdir = open, os.listdir
+
+    def redirect(path):
+        path = str(path)
+        return str(tmp_path / path.lstrip("/")) if path.startswith("/proc/") else path
+
+    monkeypatch.setattr(proc_stats, "open", lambda path, *a, **k: real_open(redirect(path), *a, **k),
+                        raising=False)
+    monkeypatch.setattr(proc_stats.os, "listdir", lambda path: real_listdir(redirect(path)))
+
+    def make(pid, state="S", utime=0, stime=0, rss_kb=0, threads=1, tasks=None):
+        base = tmp_path / "proc" / str(pid)
+        # Nome do executável com espaços e parênteses, como o kernel permite
+        rest = [state] + ["0"] * 10 + [str(utime), str(stime)] + ["0"] * 5
+        (base / "task").mkdir(parents=True)
+        (base / "stat").write_text(f"{pid} (python3 (srv) x) " + " ".join(rest) + "\n")
+        (base / "status").write_text(f"Name:\tpython3\nVmRSS:\t {rss_kb} kB\nThreads:\t{threads}\n")
+        for tid, (vol, invol) in (tasks or {pid: (0, 0)}).items():
+            (base / "task" / str(tid)).mkdir()
+            (base / "task" / str(tid) / "status").write_text(
+                f"voluntary_ctxt_switches:\t{vol}\nnonvoluntary_ctxt_switches:\t{invol}\n")
+
+    return make
+
+
+def test_read_proc_parses_stat_status_and_tasks(fake_proc):
+    fake_proc(4242, utime=3 * proc_stats.CLK_TCK, stime=proc_stats.CLK_TCK, rss_kb=2048,
+              threads=2, tasks={4242: (10, 1), 4243: (5, 2)})
+    s = read_proc(4242)
+    assert s.cpu == pytest.approx(4.0)
+    assert s.rss == 2048 * 1024
+    assert s.threads == 2
+    # Trocas de contexto somadas por thread, não só as da thread principal
+    assert (s.ctx_vol, s.ctx_invol) == (15, 3)
+
+
+def test_read_proc_ignores_zombies_and_missing_processes(fake_proc):
+    fake_proc(7, state="Z")
+    assert read_proc(7) is None
+    assert read_proc(8) is None
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/stat"), reason="requer /proc (Linux)")
+def test_read_proc_on_this_process():
+    s = read_proc(os.getpid())
+    assert s.rss > 0 and s.threads >= 1 and s.cpu > 0
+
+
+def test_summary_and_cluster_usage():
+    sampler = ProcSampler(interval=1.0)
+    sampler._procs = {10: "1", 20: "2"}
+    sampler._samples = {
+        10: [ProcSample(100.0, 1.0, 100 << 20, 5, 0, 0), ProcSample(101.0, 1.5, 110 << 20, 9, 40, 3),
+             ProcSample(102.0, 2.0, 105 << 20, 7, 50, 4)],
+        # A última amostra fica fora da janela pedida
+        20: [ProcSample(100.0, 0.0, 50 << 20, 3, 0, 0), ProcSample(102.0, 0.2, 50 << 20, 3, 10, 0),
+             ProcSample(103.0, 9.0, 900 << 20, 30, 99, 99)],
+    }
+    per_proc = sampler.summary(100.0, 102.0)
+    leader = per_proc["1"]
+    assert leader["cpu_s"] == pytest.approx(1.0)
+    assert leader["cpu_pct"] == pytest.approx(50.0)
+    assert leader["cpu_pico_pct"] == pytest.approx(50.0)
+    assert leader["rss_max"] == 110 << 20
+    assert leader["threads_max"] == 9
+    assert (leader["cs_voluntarias"], leader["cs_involuntarias"]) == (50, 4)
+
+    usage = cluster_usage(per_proc, messages=100, subscribers=10)
+    assert usage["cpu_total_s"] == pytest.approx(1.2)
+    assert usage["cpu_por_msg_ms"] == pytest.approx(12.0)
+    assert usage["bytes_por_assinante"] == pytest.approx((10 << 20) / 10)
+    assert cluster_usage({}, 100, 10) == dict.fromkeys(proc_stats.USAGE_KEYS, 0.0)
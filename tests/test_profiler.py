@@ -0,0 +1,76 @@
+import os
+import threading
+
+import pytest
+
+from common import RuntimeProfiler
+from common import profiler as profiler_module
+
+
+def _work():
+    return sum(i * i for i in range(20000))
+
+
+def test_concurrent_deterministic_calls(tmp_path):
+    profiler = RuntimeProfiler(output_dir=str(tmp_path))
+    profiler.start_cpu('deterministic')
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(5):
+                assert profiler.call(_work) == _work()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    prof_path, txt_path = profiler.stop_cpu()
+
+    assert errors == []
+    assert os.path.getsize(prof_path) > 0
+    assert '_work' in open(txt_path).read()
+
+
+def test_empty_deterministic_session(tmp_path):
+    profiler = RuntimeProfiler(output_dir=str(tmp_path))
+    profiler.start_cpu('deterministic')
+    prof_path, txt_path = profiler.stop_cpu()
+    assert os.path.exists(prof_path)
+    assert open(txt_path).read()
+
+
+@pytest.mark.skipif(profiler_module.PROCESS_WIDE_CPROFILE, reason="perfil por thread só até o 3.11")
+def test_enable_failure_runs_call_unprofiled(tmp_path, monkeypatch):
+    profiler = RuntimeProfiler(output_dir=str(tmp_path))
+    profiler.start_cpu('deterministic')
+
+    class Broken:
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+        def disable(self):
+            pass
+
+        def getstats(self):
+            return []
+
+    monkeypatch.setattr(profiler_module.cProfile, 'Profile', Broken)
+    assert profiler.call(_work) == _work()
+    profiler.stop_cpu()
+
+
+def test_state_errors(tmp_path):
+    profiler = RuntimeProfiler(output_dir=str(tmp_path))
+    with pytest.raises(ValueError):
+        profiler.stop_cpu()
+    with pytest.raises(ValueError):
+        profiler.start_cpu('outro')
+    profiler.start_cpu('sampling')
+    with pytest.raises(ValueError):
+        profiler.start_cpu('deterministic')
+    collapsed, txt = profiler.stop_cpu()
+    assert collapsed.endswith('.collapsed') and os.path.exists(txt)
@@ -0,0 +1,59 @@
+import pytest
+
+from common import TokenBucket, RateLimiter, OverloadDetector
+
+
+def test_token_bucket_burst_then_refill():
+    bucket = TokenBucket(rate=10.0, burst=3.0, now=0.0)
+    assert [bucket.try_acquire(0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Sem fichas: espera 1/rate pela próxima
+    assert bucket.try_acquire(0.0) == pytest.approx(0.1)
+    assert bucket.try_acquire(0.05) == pytest.approx(0.05)
+    assert bucket.try_acquire(0.1) == 0.0
+
+
+def test_token_bucket_never_exceeds_burst():
+    bucket = TokenBucket(rate=10.0, burst=2.0, now=0.0)
+    assert bucket.try_acquire(1000.0) == 0.0
+    assert bucket.tokens == pytest.approx(1.0)
+    assert bucket.try_acquire(1000.0) == 0.0
+    assert bucket.try_acquire(1000.0) > 0.0
+
+
+def test_rate_limiter_is_per_client_and_expires_idle_buckets(fake_clock):
+    clock = fake_clock
+    limiter = RateLimiter(rate=1.0, burst=1.0, clock=clock)
+    assert limiter.check('a') == 0.0
+    assert limiter.check('a') == pytest.approx(1.0)
+    assert limiter.check('b') == 0.0
+
+    clock.now += RateLimiter.IDLE_EXPIRY + 1
+    assert limiter.check('c') == 0.0
+    assert set(limiter._buckets) == {'c'}
+
+
+def test_rate_limiter_disabled():
+    limiter = RateLimiter(rate=0)
+    assert all(limiter.check('a') == 0.0 for _ in range(1000))
+
+
+def test_overload_detector_rate_and_backlog(fake_clock):
+    clock = fake_clock
+    detector = OverloadDetector(max_ingest_rate=100.0, max_backlog=50, interval=0.5, alpha=1.0, clock=clock)
+    for _ in range(40):
+        detector.record_ingest()
+    clock.now += 1.0
+    assert detector.sample(backlog=10) is False
+    assert detector.retry_after() == 0.0
+
+    for _ in range(300):
+        detector.record_ingest()
+    clock.now += 1.0
+    assert detector.sample(backlog=10) is True
+    assert detector.ingest_rate == pytest.approx(300.0)
+    assert detector.retry_after() == 0.5
+
+    clock.now += 1.0
+    assert detector.sample(backlog=51) is True
+    clock.now += 1.0
+    assert detector.sample(backlog=0) is False
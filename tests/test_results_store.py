@@ -0,0 +1,69 @@
+import statistics
+
+import pytest
+
+import results_store
+from results_store import mean_ci, permutation_test, t_critical, compare
+
+
+def test_mean_ci():
+    assert mean_ci([]) == (0.0, 0.0)
+    assert mean_ci([3.0]) == (3.0, float("inf"))
+    xs = [10.0, 12.0, 11.0, 13.0, 9.0]
+    mean, half = mean_ci(xs)
+    assert mean == 11.0
+    # t(4) = 2.776; desvio padrão amostral = sqrt(2.5)
+    assert half == pytest.approx(2.776 * statistics.stdev(xs) / 5 ** 0.5)
+    assert mean_ci([5.0, 5.0, 5.0]) == (5.0, 0.0)
+
+
+def test_t_critical_is_conservative_between_table_entries():
+    assert t_critical(1) == 12.706
+    assert t_critical(11) == t_critical(10) == 2.228
+    assert t_critical(5000) == 1.960
+
+
+def test_permutation_test_exact():
+    # Grupos totalmente separados: só as 2 divisões extremas (de 20) são tão diferentes
+    assert permutation_test([1.0, 2.0, 3.0], [10.0, 11.0, 12.0]) == pytest.approx(2 / 20)
+    assert permutation_test([1.0, 2.0], [1.0, 2.0]) == 1.0
+    assert permutation_test([], [1.0]) == 1.0
+
+
+def test_permutation_test_sampled_is_deterministic():
+    a = [float(x) for x in range(20)]
+    b = [float(x) + 15 for x in range(20)]
+    p1 = permutation_test(a, b, iterations=2000, seed=3)
+    assert p1 == permutation_test(a, b, iterations=2000, seed=3)
+    assert p1 < 0.01
+    assert permutation_test(a, list(a), iterations=2000) > 0.9
+
+
+def test_compare_flags_regression_and_improvement():
+    def rows(execucao, vazao, lat):
+        return [{"execucao": execucao, "script": "perf", "cenario": "x", "vazao": v, "lat_p99": l}
+                for v, l in zip(vazao, lat)]
+
+    base = rows("a", [100, 102, 98, 101, 99], [10, 11, 9, 10, 10])
+    new = rows("b", [70, 71, 69, 72, 68], [5, 6, 4, 5, 5])
+    result = {r["metrica"]: r for r in compare(base, new, alpha=0.05, threshold=0.05)}
+
+    assert result["vazao"]["regressao"] and not result["vazao"]["melhora"]
+    assert result["lat_p99"]["melhora"] and not result["lat_p99"]["regressao"]
+    assert result["vazao"]["variacao"] == pytest.approx(-0.3)
+
+    same = {r["metrica"]: r for r in compare(base, rows("c", [100, 102, 98, 101, 99], [10, 11, 9, 10, 10]),
+                                             alpha=0.05, threshold=0.05)}
+    assert not any(r["regressao"] or r["melhora"] for r in same.values())
+
+
+def test_append_load_select(tmp_path, monkeypatch):
+    monkeypatch.setattr(results_store, "git_commit", lambda: "abc1234")
+    path = str(tmp_path / "db" / "resultados.jsonl")
+    results_store.append([{"vazao": 1.0}, {"vazao": 2.0}], "exec-1", "perf", path=path)
+    results_store.append([{"vazao": 3.0}], "exec-2", "perf", path=path)
+    records = results_store.load(path)
+
+    assert [r["vazao"] for r in results_store.select(records, "exec-1")] == [1.0, 2.0]
+    assert len(results_store.select(records, "abc")) == 3
+    assert results_store.load(str(tmp_path / "nada.jsonl")) == []
@@ -0,0 +1,68 @@
+from common import MessageHistory, SearchIndex
+
+
+def test_search_terms_and_prefix():
+    index = SearchIndex()
+    index.submit(1, "Olá mundo distribuído")
+    index.submit(2, "eleição bully no mundo")
+    index.submit(3, "relógio de Lamport")
+    index.flush()
+
+    assert sorted(index.search("mundo")) == [1, 2]
+    assert index.search("mundo bully") == [2]
+    assert index.search("lamp*") == [3]
+    assert index.search("mundo", order_by_time=True) == [2, 1]
+    assert index.search("inexistente") == []
+    assert index.search("  ") == []
+
+
+def test_index_follows_history_retention_without_searches():
+    history = MessageHistory(max_messages=100)
+    index = SearchIndex()
+    sends = 30000
+    for ts in range(1, sends + 1):
+        content = f"mensagem comum palavra{ts}"
+        history.append(1, ts, content)
+        index.submit(ts, content, history.first_timestamp())
+    index.flush()
+
+    messages, postings, terms = index.size()
+    # Sem podas o índice teria 30k mensagens, 90k postings e 30k termos
+    bound = len(history) + SearchIndex.PRUNE_MIN + 1024
+    assert messages <= bound
+    assert postings <= 3 * bound
+    assert terms <= bound + 2
+
+    assert index.search("palavra1") == []
+    assert index.search(f"palavra{sends}") == [sends]
+    assert len(index.search("comum", limit=1000)) == len(history)
+
+
+def test_evict_before_hides_old_messages():
+    index = SearchIndex()
+    index.submit_many([(1, "alfa"), (2, "alfa beta"), (3, "beta")])
+    index.flush()
+
+    index.evict_before(2)
+    assert index.search("alfa") == [2]
+    assert sorted(index.search("beta")) == [2, 3]
+
+
+def test_prefix_search_sees_terms_added_after_previous_search():
+    index = SearchIndex()
+    index.submit(1, "zebra alfa")
+    index.flush()
+    assert index.search("al*") == [1]
+    index.submit_many([(2, "alface"), (3, "beta")])
+    index.flush()
+    assert sorted(index.search("al*")) == [1, 2]
+    assert index.search("b*") == [3]
+
+
+def test_flush_after_stop_does_not_hang():
+    index = SearchIndex()
+    index.submit(1, "alfa")
+    index.stop()
+    index._thread.join(timeout=5)
+    assert not index._thread.is_alive()
+    index.flush()
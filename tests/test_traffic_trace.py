@@ -0,0 +1,57 @@
+import os
+import time
+
+import pytest
+
+from common import TraceWriter, read_trace
+from common.traffic_trace import room_id
+
+
+def test_round_trip_anonymizes_senders_and_keeps_timing(tmp_path, fake_clock):
+    path = str(tmp_path / "envios.trace")
+    writer = TraceWriter(path, clock=fake_clock)
+    writer.record(42, 10)
+    fake_clock.now += 0.25
+    writer.record(7, 300, room="geral")
+    fake_clock.now += 1.5
+    writer.record(42, 0, room="geral")
+    writer.close()
+    writer.record(99, 1)  # depois do close é ignorado
+
+    records = list(read_trace(path))
+    assert [(r.sender, r.size, r.room) for r in records] == [
+        (1, 10, 0), (2, 300, room_id("geral")), (1, 0, room_id("geral"))]
+    assert [r.t for r in records] == pytest.approx([0.0, 0.25, 1.75])
+    assert writer.records == 3
+
+
+def test_idle_writer_flushes_in_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(TraceWriter, "FLUSH_INTERVAL", 0.01)
+    path = str(tmp_path / "envios.trace")
+    writer = TraceWriter(path)
+    writer.record(1, 5)
+    try:
+        # Sem novos envios: só a thread de flush pode levar o registro ao disco
+        deadline = time.monotonic() + 2.0
+        while os.path.getsize(path) < 5 + 16 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert [r.size for r in read_trace(path)] == [5]
+    finally:
+        writer.close()
+
+
+def test_truncated_record_and_bad_header(tmp_path, fake_clock):
+    path = str(tmp_path / "envios.trace")
+    writer = TraceWriter(path, clock=fake_clock)
+    for size in (1, 2, 3):
+        writer.record(1, size)
+    writer.close()
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 5)
+    assert [r.size for r in read_trace(path)] == [1, 2]
+
+    bad = tmp_path / "outro.bin"
+    for content in (b"XXXX\x01", b""):
+        bad.write_bytes(content)
+        with pytest.raises(ValueError):
+            list(read_trace(str(bad)))